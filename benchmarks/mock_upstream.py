@@ -0,0 +1,348 @@
+# benchmarks/mock_upstream.py
+"""
+Local stand-in for the terminliste API used by the ingest benchmark.
+
+Payloads are generated deterministically from a seed and a scale, using the
+same field names the services read. Recorded responses can be dropped into a
+fixtures directory to be served instead (see FixtureStore).
+"""
+import asyncio
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, Response
+
+# 1x1 grey JPEG, served for every image URL
+_TINY_JPEG = bytes.fromhex(
+    "ffd8ffe000104a46494600010100000100010000ffdb004300080606070605080707070909080a0c140d0c0b0b0c1912130f"
+    "141d1a1f1e1d1a1c1c20242e2720222c231c1c2837292c30313434341f27393d38323c2e333432ffc0000b080001000101"
+    "011100ffc4001f0000010501010101010100000000000000000102030405060708090a0bffc400b5100002010303020403"
+    "050504040000017d01020300041105122131410613516107227114328191a1082342b1c11552d1f02433627282090a1617"
+    "18191a25262728292a3435363738393a434445464748494a535455565758595a636465666768696a737475767778797a83"
+    "8485868788898a92939495969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4c5c6c7c8c9cad2d3d4d5d6d7"
+    "d8d9dae1e2e3e4e5e6e7e8e9eaf1f2f3f4f5f6f7f8f9faffda0008010100003f00fbd3ffd9"
+)
+
+FIRST_NAMES = ["Ola", "Kari", "Jonas", "Emma", "Magnus", "Nora", "Håkon", "Sofie", "Øyvind", "Ingrid", "Mats", "Åse"]
+LAST_NAMES = ["Hansen", "Johansen", "Olsen", "Larsen", "Andersen", "Pedersen", "Nilsen", "Kristiansen", "Bærheim", "Sæther"]
+POSITIONS = ["F", "D", "G", "C", "LW", "RW"]
+END_RESULTS = ["Ordinary", "Ordinary", "Ordinary", "Overtime", "Penalties"]
+
+
+@dataclass
+class MockConfig:
+    seed: int = 42
+    season_id: int = 201036
+    tournaments: int = 20
+    teams_per_tournament: int = 10
+    players_per_team: int = 25
+    clubs: int = 40
+    latency_ms: float = 0.0  # added to every response
+    error_rate: float = 0.0  # share of requests answered with 503 + Retry-After
+    retry_after_seconds: int = 1
+    fixtures_dir: Optional[str] = None
+
+
+class FixtureStore:
+    """Serves recorded payloads from <fixtures_dir>/<kind>_<id>.json when present"""
+    def __init__(self, fixtures_dir: Optional[str]):
+        self.root = Path(fixtures_dir) if fixtures_dir else None
+
+    def get(self, kind: str, key: Any) -> Optional[Any]:
+        if not self.root:
+            return None
+        path = self.root / f"{kind}_{key}.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+
+class PayloadFactory:
+    """Deterministic synthetic payloads shaped like the upstream API"""
+    def __init__(self, config: MockConfig, base_url: str = ""):
+        self.config = config
+        self.base_url = base_url
+        self.tournament_ids = [430000 + i for i in range(config.tournaments)]
+        self.club_ids = [20000 + i for i in range(config.clubs)]
+        # Club teams (team_id -> club) are shared between tournaments, as upstream
+        team_pool = max(config.teams_per_tournament, config.tournaments * config.teams_per_tournament // 2)
+        self.team_clubs = {700000 + i: self.club_ids[i % config.clubs] for i in range(team_pool)}
+
+    def _rng(self, *key) -> random.Random:
+        # str seeds are hashed with sha512, so unlike hash() this is stable across runs
+        return random.Random(":".join(map(str, (self.config.seed,) + key)))
+
+    def tournament_teams(self, tournament_id: int) -> List[int]:
+        team_ids = sorted(self.team_clubs)
+        return sorted(self._rng("teams", tournament_id).sample(team_ids, self.config.teams_per_tournament))
+
+    def season(self, season_id: int) -> Dict[str, Any]:
+        tournaments = []
+        for index, tournament_id in enumerate(self.tournament_ids):
+            rng = self._rng("tournament", tournament_id)
+            tournaments.append({
+                "tournamentId": tournament_id,
+                "tournamentNo": f"T{index:04d}",
+                "fromDate": "2024-09-01T00:00:00",
+                "toDate": "2025-04-30T00:00:00",
+                "isArchival": False,
+                "isDeleted": False,
+                "orgIdOwner": 365,
+                "parentTournamentId": None,
+                "seasonId": season_id,
+                "seasonName": "2024/2025",
+                "tournamentName": f"Benchmark League {index}",
+                "tournamentShortName": f"BL{index}",
+                "division": rng.randint(1, 4),
+                "logoUrl": None,
+                "isTablePublished": True,
+                "isResultPublished": True,
+                "areMatchesPublished": True,
+                "publishMatchesToDate": None,
+                "areRefereesPublished": False,
+                "publishRefereesToDate": None,
+                "areStatisticsPublished": True,
+                "areTeamsPublished": True,
+                "liveArena": False,
+                "liveClient": False,
+                "withdrawalsVisible": False,
+                "teamEntry": False,
+                "tournamentType": "Serie",
+                "sportId": 2,
+                "tournamentClasses": [{
+                    "classId": 5000 + index % 8,
+                    "className": f"U{10 + 2 * (index % 8)}",
+                    "fromAge": 8 + 2 * (index % 8),
+                    "toAge": 10 + 2 * (index % 8),
+                    "allowedFromAge": 8 + 2 * (index % 8),
+                    "allowedToAge": 10 + 2 * (index % 8),
+                    "gender": rng.choice(["Male", "Female", "Mixed"]),
+                    "liveArenaStorage": None,
+                }],
+            })
+        return {"seasonId": season_id, "seasonName": "2024/2025", "tournamentsInSeason": tournaments}
+
+    def teams(self, tournament_id: int) -> Dict[str, Any]:
+        return {"tournamentId": tournament_id, "teams": [{
+            "teamId": team_id,
+            "clubOrgId": self.team_clubs[team_id],
+            "teamNo": team_id % 10,
+            "team": f"Club {self.team_clubs[team_id]} Team {team_id}",
+            "overriddenName": None,
+            "describingName": f"Club {self.team_clubs[team_id]}",
+        } for team_id in self.tournament_teams(tournament_id)]}
+
+    def matches(self, tournament_id: int) -> Dict[str, Any]:
+        team_ids = self.tournament_teams(tournament_id)
+        rng = self._rng("matches", tournament_id)
+        matches = []
+        match_id = tournament_id * 1000
+        for round_no, (home, away) in enumerate((h, a) for h in team_ids for a in team_ids if h != a):
+            match_id += 1
+            home_goals, away_goals = rng.randint(0, 7), rng.randint(0, 7)
+            end_result = rng.choice(END_RESULTS)
+            if end_result != "Ordinary" and home_goals == away_goals:
+                home_goals += 1
+            matches.append({
+                "matchId": match_id,
+                "matchNo": str(match_id),
+                "activityAreaId": 100 + round_no % 5,
+                "activityAreaName": f"Arena {round_no % 5}",
+                "hometeamId": home,
+                "hometeam": f"Team {home}",
+                "hometeamOrgName": f"Club {self.team_clubs[home]}",
+                "hometeamClubOrgId": self.team_clubs[home],
+                "awayteamId": away,
+                "awayteam": f"Team {away}",
+                "awayteamOrgName": f"Club {self.team_clubs[away]}",
+                "awayteamClubOrgId": self.team_clubs[away],
+                "roundId": round_no // max(1, len(team_ids) // 2) + 1,
+                "roundName": f"Runde {round_no // max(1, len(team_ids) // 2) + 1}",
+                "seasonId": self.config.season_id,
+                "tournamentName": f"Benchmark League {tournament_id}",
+                "matchDate": f"2024-{9 + (round_no // 28) % 4:02d}-{1 + round_no % 28:02d}T00:00:00",
+                "matchStartTime": 1800,
+                "matchEndTime": 2000,
+                "matchResult": {"homeGoals": home_goals, "awayGoals": away_goals, "matchEndResult": end_result},
+                "statusTypeId": 3,
+                "statusType": "Ferdig",
+                "lastChangeDate": "2025-01-01T12:00:00",
+                "spectators": rng.randint(50, 3000),
+                "sportId": 2,
+            })
+        return {"tournamentId": tournament_id, "matches": matches}
+
+    def standings(self, tournament_id: int) -> Dict[str, Any]:
+        rng = self._rng("standings", tournament_id)
+        rows = []
+        for position, team_id in enumerate(self.tournament_teams(tournament_id), 1):
+            played = 2 * (self.config.teams_per_tournament - 1)
+            victories = rng.randint(0, played)
+            rows.append({
+                "teamId": team_id,
+                "teamName": f"Team {team_id}",
+                "position": position,
+                "matches": played,
+                "victories": victories,
+                "losses": played - victories,
+                "draws": 0,
+                "points": 3 * victories,
+                "goalsScored": rng.randint(20, 90),
+                "goalsConceeded": rng.randint(20, 90),
+            })
+        return {"tournamentId": tournament_id, "standings": rows}
+
+    def _person_ids(self, team_id: int) -> List[int]:
+        # Neighbouring teams of the same club share a few players
+        base = team_id * 100
+        return [base + i for i in range(self.config.players_per_team - 3)] + [(team_id - 1) * 100 + i for i in range(3)]
+
+    def team_members(self, team_id: int) -> List[Dict[str, Any]]:
+        members = []
+        for person_id in self._person_ids(team_id):
+            rng = self._rng("person", person_id)
+            members.append({
+                "personId": person_id,
+                "firstName": rng.choice(FIRST_NAMES),
+                "lastName": rng.choice(LAST_NAMES),
+                "nationality": "NOR",
+                "birthDate": f"{rng.randint(1990, 2012)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T00:00:00",
+                "gender": "Male",
+                "height": rng.randint(160, 200),
+                "number": str(rng.randint(1, 99)),
+                "position": rng.choice(POSITIONS),
+                "owningOrgId": self.team_clubs.get(team_id),
+                "memberType": "Player" if person_id % 12 else "Coach",
+                "imageUrl": f"{self.base_url}/images/{person_id}/1.jpg?jwt={rng.getrandbits(32):x}",
+                "image2Url": None,
+            })
+        return members
+
+    def tournament_players(self, tournament_id: int) -> List[Dict[str, Any]]:
+        players = []
+        rank = 0
+        for team_id in self.tournament_teams(tournament_id):
+            for person_id in self._person_ids(team_id):
+                rng = self._rng("stats", tournament_id, person_id)
+                rank += 1
+                goals, assists, shots = rng.randint(0, 30), rng.randint(0, 40), rng.randint(0, 120)
+                players.append({
+                    "personId": person_id,
+                    "orgId": self.team_clubs[team_id],
+                    "firstName": rng.choice(FIRST_NAMES),
+                    "lastName": rng.choice(LAST_NAMES),
+                    "teamName": f"Team {team_id}",
+                    "teamShortName": f"T{team_id % 1000}",
+                    "position": rng.choice(POSITIONS),
+                    "rank": rank,
+                    "pts": goals + assists,
+                    "points": rng.randint(-15, 25),
+                    "gamesPlayed": rng.randint(1, 40),
+                    "goalsScored": goals,
+                    "assists": assists,
+                    "pim": rng.randint(0, 80),
+                    "powerPlayGoals": rng.randint(0, goals),
+                    "shots": shots,
+                    "shotsPct": round(100 * goals / shots, 1) if shots else None,
+                    "faceOffs": rng.randint(0, 400),
+                    "faceoffsWinPct": round(rng.uniform(30, 65), 1),
+                })
+        return players
+
+    def organisations(self, org_ids: List[int]) -> List[Dict[str, Any]]:
+        return [{
+            "orgId": org_id,
+            "orgName": f"Club {org_id}",
+            "abbreviation": f"C{org_id % 1000}",
+            "describingName": f"Club {org_id} Ishockey",
+            "orgTypeId": 5,
+            "city": "Oslo",
+            "country": "Norge",
+            "members": 100 + org_id % 400,
+            "orgLogoBase64": None,
+        } for org_id in org_ids]
+
+
+def create_mock_app(config: MockConfig, base_url: str = "") -> FastAPI:
+    """Build the mock upstream app; /_bench/stats returns per-route request counts"""
+    app = FastAPI(title="Mock terminliste API")
+    factory = PayloadFactory(config, base_url)
+    fixtures = FixtureStore(config.fixtures_dir)
+    requests_by_route = Counter()
+    rng = random.Random(config.seed)
+
+    @app.middleware("http")
+    async def latency_and_errors(request: Request, call_next):
+        if request.url.path.startswith("/_bench"):
+            return await call_next(request)
+        route = request.url.path.strip("/").split("/")[0:2]
+        requests_by_route["/".join(route)] += 1
+        if config.latency_ms:
+            await asyncio.sleep(config.latency_ms / 1000)
+        if config.error_rate and rng.random() < config.error_rate:
+            requests_by_route["errors"] += 1
+            return JSONResponse({"errorMessage": "Service unavailable"}, status_code=503,
+                                headers={"Retry-After": str(config.retry_after_seconds)})
+        return await call_next(request)
+
+    def serve(kind: str, key: Any, generate):
+        recorded = fixtures.get(kind, key)
+        return JSONResponse(recorded if recorded is not None else generate())
+
+    @app.get("/ta/Tournament/Season/{season_id}")
+    async def season(season_id: int):
+        return serve("season", season_id, lambda: factory.season(season_id))
+
+    @app.get("/ta/TournamentTeams/")
+    async def tournament_teams(tournamentId: int):
+        return serve("teams", tournamentId, lambda: factory.teams(tournamentId))
+
+    @app.get("/ta/TournamentMatches/")
+    async def tournament_matches(tournamentId: int):
+        return serve("matches", tournamentId, lambda: factory.matches(tournamentId))
+
+    @app.get("/ta/TournamentStandings/")
+    async def tournament_standings(tournamentId: int):
+        return serve("standings", tournamentId, lambda: factory.standings(tournamentId))
+
+    @app.get("/ta/TeamMembers/{team_id}")
+    async def team_members(team_id: int):
+        return serve("team_members", team_id, lambda: factory.team_members(team_id))
+
+    @app.get("/icehockey/TournamentPlayers/{tournament_id}")
+    async def tournament_players(tournament_id: int):
+        return serve("players", tournament_id, lambda: factory.tournament_players(tournament_id))
+
+    @app.get("/org/Organisation")
+    async def organisations(orgIds: List[int] = Query(...)):
+        return JSONResponse(factory.organisations(orgIds))
+
+    @app.get("/images/{person_id}/{image_no}.jpg")
+    async def image(person_id: int, image_no: int):
+        return Response(_TINY_JPEG, media_type="image/jpeg")
+
+    @app.get("/_bench/stats")
+    async def stats():
+        return dict(requests_by_route)
+
+    @app.post("/_bench/reset")
+    async def reset():
+        requests_by_route.clear()
+        return {"reset": True}
+
+    return app
+
+
+def run_mock_server(config: MockConfig, host: str = "127.0.0.1", port: int = 8765) -> None:
+    """Blocking; run in a separate process so its memory is not counted in the benchmark"""
+    import uvicorn
+    app = create_mock_app(config, base_url=f"http://{host}:{port}")
+    uvicorn.run(app, host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    run_mock_server(MockConfig())
@@ -0,0 +1,232 @@
+# benchmarks/run_ingest.py
+"""
+Offline ingest benchmark.
+
+Starts the mock upstream (benchmarks/mock_upstream.py) in a child process,
+points API_BASE_URL at it and runs the fetch_all stages against the database
+configured in .env. Reports wall time, upstream requests, rows written and
+peak RSS per stage, then for the materialized view refresh fetch_all runs
+last, so two commits can be compared on the same fixtures. --end-to-end
+times fetch_all.main itself as one run instead.
+
+Use a scratch database: the stages write to it exactly like a real ingest.
+
+    python -m benchmarks.run_ingest --tournaments 20 --latency-ms 20
+    python -m benchmarks.run_ingest --streaming --refresh-mode swap --json out.json
+    python -m benchmarks.run_ingest --end-to-end
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import threading
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.mock_upstream import MockConfig, run_mock_server
+
+# Tables counted after each stage
+COUNTED_TABLES = ["tournaments", "teams", "team_members", "standings", "matches",
+                  "player_statistics", "organisations"]
+
+
+class PeakRssSampler:
+    """Samples this process' resident set size; ru_maxrss alone cannot be reset per stage"""
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current_kb() -> int:
+        try:
+            with open("/proc/self/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, self.current_kb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_kb = self.current_kb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_kb = max(self.peak_kb, self.current_kb())
+
+
+def wait_for_server(base_url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/_bench/stats", timeout=1.0).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Mock upstream did not start at {base_url}")
+
+
+def count_rows(db) -> Dict[str, int]:
+    from sqlalchemy import text
+    counts = {}
+    for table in COUNTED_TABLES:
+        counts[table] = db.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+    return counts
+
+
+# Name of the materialized view refresh fetch_all runs after the fetch stages
+REFRESH_STAGE = "Materialized views"
+
+
+async def measure_stage(db, base_url: str, name: str, run) -> Dict[str, Any]:
+    """Run one stage (a coroutine function) with fresh counters and measure it"""
+    from src.utils.resilience import reset_upstream_state, upstream_metrics
+
+    httpx.post(f"{base_url}/_bench/reset")
+    reset_upstream_state()
+    before = count_rows(db)
+    db.commit()
+
+    with PeakRssSampler() as rss:
+        started = time.perf_counter()
+        error = None
+        try:
+            await run()
+        except Exception as e:
+            error = str(e)
+        elapsed = time.perf_counter() - started
+
+    after = count_rows(db)
+    db.commit()
+    upstream = httpx.get(f"{base_url}/_bench/stats").json()
+    requests_made = sum(v for k, v in upstream.items() if k != "errors")
+    rows_changed = sum(abs(after[t] - before[t]) for t in COUNTED_TABLES)
+    return {
+        "stage": name,
+        "seconds": round(elapsed, 3),
+        "requests": requests_made,
+        "upstream_errors": upstream.get("errors", 0),
+        "requests_per_second": round(requests_made / elapsed, 1) if elapsed else None,
+        "rows_changed": rows_changed,
+        "rows_per_second": round(rows_changed / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": round(rss.peak_kb / 1024, 1),
+        "table_rows": after,
+        "resilience": upstream_metrics(),
+        "error": error,
+    }
+
+
+async def run_stages(base_url: str, stages: List[str], end_to_end: bool = False) -> List[Dict[str, Any]]:
+    # Imported here so settings pick up the environment set in main()
+    from src.scripts import fetch_all
+    from src.utils.database import get_db
+    from src.utils.materialized_views import refresh_materialized_views
+
+    db = next(get_db())
+    results = []
+    try:
+        if end_to_end:
+            # fetch_all.main as deployed: every stage, the view refresh and its logging in one timing
+            results.append(await measure_stage(db, base_url, "fetch_all (end to end)", fetch_all.main))
+            return results
+
+        for name, stage in fetch_all.FETCH_STAGES:
+            if stages and name not in stages:
+                continue
+            results.append(await measure_stage(db, base_url, name, stage))
+
+        if not stages or REFRESH_STAGE in stages:
+            view_seconds = {}
+
+            async def refresh_views():
+                view_seconds.update(refresh_materialized_views())
+            result = await measure_stage(db, base_url, REFRESH_STAGE, refresh_views)
+            result["view_seconds"] = {view: round(seconds, 3) for view, seconds in view_seconds.items()}
+            results.append(result)
+    finally:
+        db.close()
+    return results
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    header = f"{'stage':<30}{'seconds':>9}{'requests':>10}{'req/s':>9}{'rows':>9}{'rows/s':>10}{'peak MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['stage']:<30}{r['seconds']:>9.2f}{r['requests']:>10}{r['requests_per_second'] or 0:>9.1f}"
+              f"{r['rows_changed']:>9}{r['rows_per_second'] or 0:>10.1f}{r['peak_rss_mb']:>9.1f}"
+              + (f"  ERROR: {r['error']}" if r["error"] else ""))
+    print("-" * len(header))
+    print(f"{'total':<30}{sum(r['seconds'] for r in results):>9.2f}{sum(r['requests'] for r in results):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ingest pipeline against a local mock upstream")
+    parser.add_argument("--tournaments", type=int, default=20)
+    parser.add_argument("--teams-per-tournament", type=int, default=10)
+    parser.add_argument("--players-per-team", type=int, default=25)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added to every upstream response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of upstream requests answered with 503")
+    parser.add_argument("--fixtures-dir", help="Serve recorded <kind>_<id>.json payloads from here when present")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stage", action="append", default=[],
+                        help=f"Only run this stage (repeatable), e.g. Teams or '{REFRESH_STAGE}'")
+    parser.add_argument("--end-to-end", action="store_true",
+                        help="Time src.scripts.fetch_all.main as one run instead of stage by stage")
+    parser.add_argument("--streaming", action="store_true", help="Set INGEST_STREAMING=true")
+    parser.add_argument("--refresh-mode", choices=["replace", "swap"], help="Set INGEST_REFRESH_MODE")
+    parser.add_argument("--throttle-scale", type=float, default=0.0,
+                        help="INGEST_THROTTLE_SCALE; the default 0 removes the polite sleeps from the timings")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        seed=args.seed,
+        tournaments=args.tournaments,
+        teams_per_tournament=args.teams_per_tournament,
+        players_per_team=args.players_per_team,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        fixtures_dir=args.fixtures_dir,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    os.environ["API_BASE_URL"] = base_url
+    os.environ["INGEST_THROTTLE_SCALE"] = str(args.throttle_scale)
+    if args.streaming:
+        os.environ["INGEST_STREAMING"] = "true"
+    if args.refresh_mode:
+        os.environ["INGEST_REFRESH_MODE"] = args.refresh_mode
+
+    server = multiprocessing.Process(target=run_mock_server, args=(config, "127.0.0.1", args.port), daemon=True)
+    server.start()
+    try:
+        wait_for_server(base_url)
+        results = asyncio.run(run_stages(base_url, args.stage, args.end_to_end))
+    finally:
+        server.terminate()
+        server.join()
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "stages": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
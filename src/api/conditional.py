@@ -0,0 +1,123 @@
+# src/api/conditional.py
+"""
+Conditional GET for the hockey routes.
+
+Every response of a GET route depends only on the URL and the ingested
+data, so a strong ETag is the data version plus a hash of the path and
+query, and Last-Modified is the time of the last version bump. A request
+whose If-None-Match (or, without it, If-Modified-Since) still matches is
+answered with 304 before the route runs, so repeat traffic between two
+ingests costs a header exchange. When the version cannot be read the
+ETag falls back to a hash of the body. The version is read on the session
+the route then queries with (see read_session), so with a replica the ETag
+never names a newer version than the data behind it.
+"""
+import hashlib
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import AsyncIterator, Callable, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from src.config.settings import get_settings
+from src.utils.data_version import data_version_tracker
+from src.utils.logging_config import setup_logging
+
+logger = setup_logging("conditional")
+
+
+def cache_control(policy: str) -> Callable:
+    """Route decorator (below @router.get) setting the Cache-Control header of its responses"""
+    def decorator(endpoint):
+        endpoint.cache_control = policy
+        return endpoint
+    return decorator
+
+
+async def read_session(request: Request) -> AsyncIterator:
+    """
+    Dependency yielding the AsyncSession ConditionalRoute read the data
+    version from, so a route's queries see the same replica as its ETag;
+    a new session outside of conditional GETs.
+    """
+    db = getattr(request.state, "read_session", None)
+    if db is not None:
+        yield db
+        return
+    from src.utils.database import get_async_db
+    async for db in get_async_db():
+        yield db
+
+
+async def _data_state(db) -> Optional[Tuple[int, Optional[datetime]]]:
+    try:
+        return await data_version_tracker.state(db)
+    except Exception as e:
+        logger.warning("Data version unavailable, using body ETags", extra={"error": str(e)})
+        return None
+
+
+def _url_hash(request: Request) -> str:
+    return hashlib.sha1(f"{request.url.path}?{request.url.query}".encode()).hexdigest()[:16]
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """RFC 9110: If-None-Match wins; If-Modified-Since is only used without it"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _is_failure(response: Response) -> bool:
+    # Analytics errors are answered with 200 and {"success": false, ...}; they must not be revalidated as fresh
+    return getattr(response, "body", b"").startswith(b'{"success":false')
+
+
+class ConditionalRoute(APIRoute):
+    """APIRoute adding ETag, Last-Modified, Cache-Control and 304 handling to GET routes"""
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if "GET" not in self.methods:
+            return handler
+        policy = getattr(self.endpoint, "cache_control", None) or get_settings().API_CACHE_CONTROL
+
+        async def conditional_handler(request: Request) -> Response:
+            from src.utils.database import get_async_sessionmaker
+            async with get_async_sessionmaker()() as db:
+                request.state.read_session = db
+                state = await _data_state(db)
+                headers = {"Cache-Control": policy}
+                if state is not None:
+                    version, updated_at = state
+                    headers["ETag"] = f'"v{version}-{_url_hash(request)}"'
+                    if updated_at is not None:
+                        headers["Last-Modified"] = format_datetime(updated_at, usegmt=True)
+                    if is_not_modified(request, headers["ETag"], updated_at):
+                        return Response(status_code=304, headers=headers)
+
+                response = await handler(request)
+                if response.status_code != 200 or _is_failure(response):
+                    return response
+
+                if state is None:
+                    body = getattr(response, "body", None)
+                    if body is None:  # streamed, nothing to hash
+                        return response
+                    headers["ETag"] = f'"b{hashlib.sha1(body).hexdigest()[:24]}"'
+                    if is_not_modified(request, headers["ETag"], None):
+                        return Response(status_code=304, headers=headers)
+                response.headers.update(headers)
+                return response
+
+        return conditional_handler
@@ -1,11 +1,44 @@
 # src/api/hockey_routes.py
-from fastapi import APIRouter, Query, HTTPException
+import asyncio
+import inspect
+import time
+from functools import lru_cache
+from fastapi import APIRouter, Depends, Query, HTTPException
 from fastapi.responses import StreamingResponse
-from typing import Optional
-from src.services.hockey_analytics import HockeyAnalytics
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
+from typing import Any, Dict, List, Optional
+from src.config.settings import get_settings
+from src.api.conditional import ConditionalRoute, cache_control, read_session
+from src.services.export_service import EXPORT_FORMATS, ExportError, check_export, export_filename, stream_export
+from src.services.head_to_head_service import HEAD_TO_HEAD_RECENT
+from src.services.hockey_analytics import AsyncHockeyAnalytics, percentile_options, standing_fields
+from src.services.leaderboard_snapshot import LeaderboardSnapshot, leaderboard_snapshots
+from src.services.standings_engine import parse_point_rules
+from src.utils.data_version import data_version_tracker
+from src.utils.database import get_async_sessionmaker, get_read_engine
+from src.utils.pagination import InvalidCursor
+from src.utils.response_cache import get_response_cache
 # from src.services.image_service import ImageService  # You'll need to create this
 
-router = APIRouter()
+# GET routes answer conditional requests (ETag / Last-Modified / 304), see src/api/conditional.py
+router = APIRouter(route_class=ConditionalRoute)
+
+# Data that only changes with an ingest: shared caches may serve it briefly, then revalidate
+INGEST_DATA_CACHE = "public, max-age=60, stale-while-revalidate=300"
+
+def get_analytics(db=Depends(read_session)) -> AsyncHockeyAnalytics:
+    """Analytics on the request's async session, so queries do not block the event loop"""
+    return AsyncHockeyAnalytics(db)
+
+async def _cached(endpoint: str, params: dict, analytics: AsyncHockeyAnalytics, compute):
+    """Serve compute() from the response cache while the data version is unchanged"""
+    # Read on the session compute() queries with, so a replica's results are cached under its own version
+    version = await data_version_tracker.current(analytics.db)
+    return await get_response_cache().get_or_compute(endpoint, params, version, compute)
+
+async def _leaderboard_snapshot(analytics: AsyncHockeyAnalytics) -> Optional[LeaderboardSnapshot]:
+    """The in-memory leaderboard if it is loaded for the current data version, else None (SQL answers)"""
+    return leaderboard_snapshots.get(await data_version_tracker.current(analytics.db))
 
 @router.get("/")
 async def hockey_root():
@@ -17,20 +50,27 @@ async def hockey_root():
             "filters": "/filters - Get available filter options",
             "teams": "/teams - Get teams with filtering",
             "players": "/players - Get players with filtering", 
+            "search": "/search?q= - Find players, teams and clubs by name",
             "standings": "/tournaments/{id}/standings - Get tournament standings",
-            "insights": "/insights - Get data insights"
+            "computed_standings": "/tournaments/{id}/standings/computed - Standings recomputed from the match results",
+            "standings_history": "/tournaments/{id}/standings/history - Standings after every round",
+            "head_to_head": "/teams/{id}/head-to-head/{opponent_id} - Record of two teams against each other",
+            "team_form": "/tournaments/{id}/teams/{team_id}/form - Last 5/10 games, streaks and goal trends of a team",
+            "insights": "/insights - Get data insights",
+            "export": "/export/{dataset}?format= - Download a table as CSV, NDJSON, Parquet or Arrow",
+            "batch": "POST /batch - Run several of the above in one request"
         }
     }
 
 @router.get("/filters")
-async def get_available_filters():
+@cache_control(INGEST_DATA_CACHE)
+async def get_available_filters(analytics: AsyncHockeyAnalytics = Depends(get_analytics)):
     """
     Get all available filter options for teams, players, etc.
     Use this to populate dropdowns and understand what data is available.
     """
     try:
-        analytics = HockeyAnalytics()
-        return analytics.get_available_filters()
+        return await _cached("filters", {}, analytics, analytics.get_available_filters)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -39,15 +79,39 @@ async def get_teams(
     tournament_id: Optional[int] = Query(None, description="Filter by tournament ID"),
     club_id: Optional[int] = Query(None, description="Filter by club/organisation ID"),
     search: Optional[str] = Query(None, description="Search team names"),
-    limit: int = Query(50, ge=1, le=200, description="Max results to return")
+    limit: int = Query(50, ge=1, le=200, description="Max results to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    analytics: AsyncHockeyAnalytics = Depends(get_analytics)
 ):
     """
     Get teams with smart filtering options.
     Use /filters endpoint to see available tournament_id and club_id values.
+    Results are paged: pass the response's next_cursor to get the next page (null on the last one).
+    """
+    try:
+        return await analytics.get_teams(tournament_id, club_id, search, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/teams/{team_id}/head-to-head/{opponent_id}")
+@cache_control(INGEST_DATA_CACHE)
+async def get_head_to_head(
+    team_id: int,
+    opponent_id: int,
+    recent: int = Query(5, ge=0, le=HEAD_TO_HEAD_RECENT, description="Latest meetings to return"),
+    analytics: AsyncHockeyAnalytics = Depends(get_analytics)
+):
     """
+    Wins, draws, losses and goals of a team against another, per tournament and
+    across every tournament they met in, and their latest meetings.
+    """
+    if team_id == opponent_id:
+        raise HTTPException(status_code=400, detail="A team has no head-to-head record with itself")
     try:
-        analytics = HockeyAnalytics()
-        return analytics.get_teams(tournament_id, club_id, search, limit)
+        return await _cached("head_to_head", {"team_id": team_id, "opponent_id": opponent_id, "recent": recent},
+                             analytics, lambda: analytics.get_head_to_head(team_id, opponent_id, recent))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -58,39 +122,122 @@ async def get_players(
     tournament_id: Optional[int] = Query(None, description="Filter by tournament ID"),
     club_id: Optional[int] = Query(None, description="Filter by club ID"),
     search: Optional[str] = Query(None, description="Search player names"),
-    limit: int = Query(100, ge=1, le=500, description="Max results to return")
+    limit: int = Query(100, ge=1, le=500, description="Max results to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    analytics: AsyncHockeyAnalytics = Depends(get_analytics)
 ):
     """
     Get players with smart filtering options.
     Use /filters endpoint to see available values for position, tournament_id, etc.
+    Results are paged: pass the response's next_cursor to get the next page (null on the last one).
+    """
+    try:
+        return await analytics.get_players(team_id, position, tournament_id, club_id, search, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search")
+async def search_names(
+    q: str = Query(..., min_length=2, max_length=100, description="Name or part of a name; accents and case are ignored"),
+    limit: int = Query(10, ge=1, le=50, description="Max results per category"),
+    analytics: AsyncHockeyAnalytics = Depends(get_analytics)
+):
+    """
+    Search players, teams and clubs by name, best matches first.
+    Tolerates missing diacritics (Sondre finds Søndre) and partial words.
     """
     try:
-        analytics = HockeyAnalytics()
-        return analytics.get_players(team_id, position, tournament_id, club_id, search, limit)
+        return await analytics.search_names(q, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/tournaments/{tournament_id}/standings")
-async def get_tournament_standings(tournament_id: int):
+@cache_control(INGEST_DATA_CACHE)
+async def get_tournament_standings(
+    tournament_id: int,
+    view: str = Query("full", description="compact: the ten columns of a league table, full: every column"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return instead of a view, e.g. position,display_name,points"),
+    analytics: AsyncHockeyAnalytics = Depends(get_analytics)
+):
     """
     Get standings/table for a specific tournament.
     Use /filters endpoint to see available tournament IDs.
     """
     try:
-        analytics = HockeyAnalytics()
-        return analytics.get_tournament_standings(tournament_id)
+        columns = standing_fields(view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return await _cached("standings", {"tournament_id": tournament_id, "fields": columns}, analytics,
+                             lambda: analytics.get_tournament_standings(tournament_id, columns))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tournaments/{tournament_id}/standings/computed")
+@cache_control(INGEST_DATA_CACHE)
+async def get_computed_tournament_standings(
+    tournament_id: int,
+    points: Optional[str] = Query(None, description="Point rules, e.g. win=3,overtime_win=2,penalty_win=2,draw=1,overtime_loss=1,penalty_loss=1,loss=0; unnamed outcomes keep these defaults"),
+    compare: bool = Query(False, description="Also list where the result differs from the upstream standings"),
+    analytics: AsyncHockeyAnalytics = Depends(get_analytics)
+):
+    """
+    Standings computed from the tournament's matches, so they include every
+    ingested result. Same columns as the full standings view.
+    """
+    try:
+        rules = parse_point_rules(points or get_settings().STANDINGS_POINT_RULES)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return await _cached("computed_standings", {"tournament_id": tournament_id, "rules": tuple(rules),
+                                                    "compare": compare}, analytics,
+                             lambda: analytics.get_computed_standings(tournament_id, rules, compare))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tournaments/{tournament_id}/standings/history")
+@cache_control(INGEST_DATA_CACHE)
+async def get_tournament_standings_history(
+    tournament_id: int,
+    team_id: Optional[int] = Query(None, description="Only this team's series"),
+    analytics: AsyncHockeyAnalytics = Depends(get_analytics)
+):
+    """
+    Position, points, games and goals of every team after each round, for
+    position-over-time charts. Rebuilt whenever the tournament's matches are ingested.
+    """
+    try:
+        return await _cached("standings_history", {"tournament_id": tournament_id, "team_id": team_id}, analytics,
+                             lambda: analytics.get_standings_history(tournament_id, team_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tournaments/{tournament_id}/teams/{team_id}/form")
+@cache_control(INGEST_DATA_CACHE)
+async def get_team_form(tournament_id: int, team_id: int, analytics: AsyncHockeyAnalytics = Depends(get_analytics)):
+    """
+    Form of a team in a tournament: last 5 and 10 results, points and goals,
+    home and away form, current streaks and per-game rolling averages.
+    Recomputed when the team's matches are ingested.
+    """
+    try:
+        return await _cached("team_form", {"tournament_id": tournament_id, "team_id": team_id}, analytics,
+                             lambda: analytics.get_team_form(tournament_id, team_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/insights")
-async def get_insights():
+@cache_control(INGEST_DATA_CACHE)
+async def get_insights(analytics: AsyncHockeyAnalytics = Depends(get_analytics)):
     """
     Get interesting insights and statistics about the hockey data.
     Shows totals, most common positions, biggest tournaments, etc.
     """
     try:
-        analytics = HockeyAnalytics()
-        return analytics.get_insights_summary()
+        return await _cached("insights", {}, analytics, analytics.get_insights_summary)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -115,10 +262,13 @@ async def get_insights():
 
 ## player statistics
 @router.get("/tournaments/{tournament_id}/players")
+@cache_control(INGEST_DATA_CACHE)
 async def get_tournament_player_statistics(
     tournament_id: int,
     stat_type: str = Query("points", description="Type of stats to sort by: points, goals, assists, pim, shots, saves, faceoffs"),
-    limit: int = Query(20, ge=1, le=100, description="Max results to return")
+    limit: int = Query(20, ge=1, le=100, description="Max results to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    analytics: AsyncHockeyAnalytics = Depends(get_analytics)
 ):
     """
     Get player statistics for a specific tournament.
@@ -131,18 +281,25 @@ async def get_tournament_player_statistics(
     - shots: Shots taken
     - saves: Shooting percentage (best)
     - faceoffs: Face-off win percentage (best)
+
+    Results are paged: pass the response's next_cursor to get the next page.
     """
     try:
-        analytics = HockeyAnalytics()
-        return analytics.get_tournament_player_stats(tournament_id, stat_type, limit)
+        snapshot = await _leaderboard_snapshot(analytics)
+        return await analytics.get_tournament_player_stats(tournament_id, stat_type, limit, cursor, snapshot)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/players/top-scorers")
+@cache_control(INGEST_DATA_CACHE)
 async def get_top_scorers_overall(
     stat_type: str = Query("points", description="Type of stats to sort by: points, goals, assists, pim, shots, saves, faceoffs"),
     position: Optional[str] = Query(None, description="Filter by player position"),
-    limit: int = Query(50, ge=1, le=200, description="Max results to return")
+    limit: int = Query(50, ge=1, le=200, description="Max results to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    analytics: AsyncHockeyAnalytics = Depends(get_analytics)
 ):
     """
     Get top scorers across all tournaments.
@@ -157,35 +314,195 @@ async def get_top_scorers_overall(
     - faceoffs: Face-off win percentage (best)
     
     **Common positions:** F, D, LW, RW, C, G
+
+    Results are paged: pass the response's next_cursor to get the next page.
     """
     try:
-        analytics = HockeyAnalytics()
-        return analytics.get_top_scorers_overall(stat_type, position, limit)
+        params = {"stat_type": stat_type, "position": position, "limit": limit, "cursor": cursor}
+
+        async def compute():
+            snapshot = await _leaderboard_snapshot(analytics)
+            return await analytics.get_top_scorers_overall(stat_type, position, limit, cursor, snapshot)
+
+        return await _cached("top_scorers", params, analytics, compute)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/players/{person_id}/career")
-async def get_player_career_statistics(person_id: int):
+async def get_player_career_statistics(person_id: int, analytics: AsyncHockeyAnalytics = Depends(get_analytics)):
     """
     Get career statistics for a specific player across all tournaments.
     Includes tournament-by-tournament breakdown and career totals.
     """
     try:
-        analytics = HockeyAnalytics()
-        return analytics.get_player_career_stats(person_id)
+        return await analytics.get_player_career_stats(person_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/players/{person_id}/percentiles")
+@cache_control(INGEST_DATA_CACHE)
+async def get_player_percentiles(
+    person_id: int,
+    tournament_id: Optional[int] = Query(None, description="Only this tournament (default: every tournament played)"),
+    cohort: str = Query("tournament_position", description="tournament, tournament_position, class or class_position"),
+    stats: Optional[str] = Query(None, description="Comma-separated stats, e.g. points,goals,pim (default: all)"),
+    analytics: AsyncHockeyAnalytics = Depends(get_analytics)
+):
+    """
+    Rank and percentile of a player's stats among comparable players.
+
+    **cohort options:**
+    - tournament: everyone in the tournament
+    - tournament_position: same tournament and position
+    - class: every tournament of the season in the same age class
+    - class_position: same age class and position
+
+    Rank 1 is the highest value; the percentile is the share of the cohort below the player (0-100).
+    Players without a value for a stat (e.g. shots_pct) are not ranked in it; each stat's
+    cohort_size counts the players ranked in it.
+    """
+    try:
+        cohort, names = percentile_options(cohort, stats)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        params = {"person_id": person_id, "tournament_id": tournament_id, "cohort": cohort, "stats": names}
+        return await _cached("player_percentiles", params, analytics,
+                             lambda: analytics.get_player_percentiles(person_id, tournament_id, cohort, names))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/players/summary")
+@cache_control(INGEST_DATA_CACHE)
 async def get_player_statistics_summary(
-    tournament_id: Optional[int] = Query(None, description="Filter by specific tournament")
+    tournament_id: Optional[int] = Query(None, description="Filter by specific tournament"),
+    analytics: AsyncHockeyAnalytics = Depends(get_analytics)
 ):
     """
     Get summary statistics about player performance.
     Includes top performers, position breakdowns, and overall stats.
     """
     try:
-        analytics = HockeyAnalytics()
-        return analytics.get_player_stats_summary(tournament_id)
+        return await _cached("player_summary", {"tournament_id": tournament_id}, analytics,
+                             lambda: analytics.get_player_stats_summary(tournament_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = Query("csv", description="One of: " + ", ".join(EXPORT_FORMATS)),
+    tournament_id: Optional[int] = Query(None, description="Only this tournament"),
+    season_id: Optional[int] = Query(None, description="Only tournaments of this season"),
+    chunk_size: int = Query(5000, ge=100, le=50000, description="Rows fetched and encoded at a time")
+):
+    """
+    Stream a whole table (player_statistics, matches, standings or team_members)
+    as CSV, NDJSON, Parquet or Arrow, for a tournament, a season or everything.
+    Rows are read through a server-side cursor and sent chunk by chunk.
+    """
+    try:
+        check_export(dataset, format)
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = export_filename(dataset, format, tournament_id, season_id)
+    # A sync generator: Starlette iterates it in the threadpool, one chunk at a time
+    return StreamingResponse(
+        stream_export(get_read_engine(), dataset, format, tournament_id, season_id, chunk_size),
+        media_type=EXPORT_FORMATS[format][0],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+## batch
+# Sub-queries POST /batch can run, by name, and the route that serves each
+BATCH_ROUTES = {
+    "filters": get_available_filters,
+    "teams": get_teams,
+    "head_to_head": get_head_to_head,
+    "players": get_players,
+    "search": search_names,
+    "standings": get_tournament_standings,
+    "computed_standings": get_computed_tournament_standings,
+    "standings_history": get_tournament_standings_history,
+    "team_form": get_team_form,
+    "insights": get_insights,
+    "tournament_players": get_tournament_player_statistics,
+    "top_scorers": get_top_scorers_overall,
+    "player_career": get_player_career_statistics,
+    "player_percentiles": get_player_percentiles,
+    "player_summary": get_player_statistics_summary,
+}
+
+class BatchQuery(BaseModel):
+    query: str = Field(..., description="One of: " + ", ".join(BATCH_ROUTES))
+    params: Dict[str, Any] = Field(default_factory=dict, description="The query's parameters, as for its endpoint")
+    id: Optional[str] = Field(None, description="Echoed back with the result; defaults to the query's position")
+
+class BatchRequest(BaseModel):
+    queries: List[BatchQuery] = Field(..., min_length=1)
+
+@lru_cache()
+def _batch_params_model(name: str):
+    """Pydantic model of a route's parameters, with the same validation as its Query(...) declarations"""
+    fields = {}
+    for param in inspect.signature(BATCH_ROUTES[name]).parameters.values():
+        if param.name == "analytics":
+            continue
+        default = ... if param.default is inspect.Parameter.empty else param.default
+        fields[param.name] = (param.annotation, default)
+    return create_model(f"{name}_params", __config__=ConfigDict(extra="forbid"), **fields)
+
+async def _run_batch_query(position: int, item: BatchQuery, slots: asyncio.Semaphore) -> Dict[str, Any]:
+    started = time.perf_counter()
+    result = {"id": item.id or str(position), "query": item.query}
+    try:
+        if item.query not in BATCH_ROUTES:
+            raise HTTPException(status_code=400, detail=f"Unknown query {item.query!r}")
+        params = _batch_params_model(item.query)(**item.params).model_dump()
+        # Each sub-query gets its own pooled session, so they can run concurrently
+        async with slots:
+            async with get_async_sessionmaker()() as db:
+                data = await BATCH_ROUTES[item.query](**params, analytics=AsyncHockeyAnalytics(db))
+        failed = isinstance(data, dict) and data.get("success") is False
+        result.update(status=500 if failed else 200, data=data)
+    except ValidationError as e:
+        result.update(status=422, error=e.errors(include_url=False, include_context=False))
+    except HTTPException as e:
+        result.update(status=e.status_code, error=e.detail)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        result.update(status=500, error=str(e))
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+@router.post("/batch")
+async def run_batch(request: BatchRequest):
+    """
+    Run several analytics queries in one request, e.g. everything a tournament page needs:
+
+        {"queries": [
+            {"id": "table", "query": "standings", "params": {"tournament_id": 123, "view": "compact"}},
+            {"id": "points", "query": "tournament_players", "params": {"tournament_id": 123}},
+            {"id": "goals", "query": "tournament_players", "params": {"tournament_id": 123, "stat_type": "goals"}}
+        ]}
+
+    Queries run concurrently and each result carries its own status (as its endpoint would answer)
+    and elapsed_ms; one failing query does not fail the others.
+    """
+    settings = get_settings()
+    if len(request.queries) > settings.API_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.API_BATCH_MAX_QUERIES} queries per batch")
+
+    started = time.perf_counter()
+    # Leave pool connections for other requests
+    slots = asyncio.Semaphore(max(1, min(settings.API_BATCH_CONCURRENCY, settings.DB_POOL_SIZE)))
+    results = await asyncio.gather(*[
+        _run_batch_query(position, item, slots) for position, item in enumerate(request.queries)
+    ])
+    return {
+        "success": all(r["status"] == 200 for r in results),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "results": results
+    }
@@ -1,8 +1,17 @@
 # src/api/routes.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from src.utils.data_version import data_version_tracker
 
-app = FastAPI(title="Norwegian Hockey Backend")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Follow data version changes so cached responses are dropped after each ingest
+    data_version_tracker.start()
+    yield
+    data_version_tracker.stop()
+
+app = FastAPI(title="Norwegian Hockey Backend", lifespan=lifespan)
 
 # Add CORS at the main app level
 app.add_middleware(
@@ -32,6 +41,22 @@ async def root():
         }
     }
 
+@app.get("/metrics/db")
+async def database_pool_metrics():
+    """Connection pool usage of this API process"""
+    from src.utils.database import pool_metrics
+    return pool_metrics()
+
+@app.get("/metrics/cache")
+async def response_cache_metrics():
+    """Response cache usage of this API process and the data version it follows"""
+    from src.utils.response_cache import get_response_cache
+    return {
+        **get_response_cache().stats(),
+        "data_version": data_version_tracker.version,
+        "listening": data_version_tracker.listening,
+    }
+
 # Add this to make it runnable
 if __name__ == "__main__":
     import uvicorn
@@ -10,6 +10,32 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_PORT: int = 5432
     POSTGRES_HOST: str = "localhost"
+    DATABASE_REPLICA_URL: Optional[str] = None  # Read-only analytics go here when set, e.g. postgresql://user:pw@replica:5432/db
+
+    # Connection pool (one per engine, created on first use)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_STATEMENT_TIMEOUT_MS: int = 300000  # Primary: ingest statements can be long
+    DB_READ_STATEMENT_TIMEOUT_MS: int = 15000  # API reads
+
+    # API response cache, invalidated when the data version changes (see src/utils/data_version.py)
+    RESPONSE_CACHE_SIZE: int = 256  # Responses kept per API process
+
+    # In-memory copy of the player leaderboard view answering the leaderboard routes (see src/services/leaderboard_snapshot.py)
+    LEADERBOARD_SNAPSHOT: bool = True
+    LEADERBOARD_SNAPSHOT_RELOAD_SECONDS: float = 30.0  # Least time between two loads, so an ingest's many commits cost few reloads
+
+    # Default point rules of /hockey/tournaments/{id}/standings/computed, e.g. "win=3,overtime_win=2,draw=1" (see src/services/standings_engine.py)
+    STANDINGS_POINT_RULES: str = ""
+
+    # Cache-Control of /hockey GET routes without their own policy; responses carry ETags either way
+    API_CACHE_CONTROL: str = "public, no-cache"
+
+    # POST /hockey/batch
+    API_BATCH_MAX_QUERIES: int = 20  # Sub-queries per request
+    API_BATCH_CONCURRENCY: int = 4  # Sub-queries running at once per request, capped at DB_POOL_SIZE
 
     # MinIO settings
     MINIO_ENDPOINT: str
@@ -21,13 +47,38 @@ class Settings(BaseSettings):
 
    # Claude API (add this now)
     ANTHROPIC_API_KEY: Optional[str] = None
-    
+
+    # Ingestion
+    INGEST_STREAMING: bool = False  # Parse large API payloads incrementally instead of response.json()
+    INGEST_CHUNK_SIZE: int = 500  # Records per chunk handed to the save pipeline when streaming
+    INGEST_THROTTLE_SCALE: float = 1.0  # Multiplier for the polite delays between API calls, 0 disables them
+    INGEST_REFRESH_MODE: str = "replace"  # replace: delete then insert, swap: staged atomic swap per tournament/team
+
+    # Upstream API resilience (see src/utils/resilience.py)
+    UPSTREAM_TIMEOUT: float = 30.0  # Seconds per request
+    UPSTREAM_MAX_ATTEMPTS: int = 3  # Default attempts per request, including the first one
+    UPSTREAM_BACKOFF_BASE: float = 1.0  # Smallest delay between attempts, seconds
+    UPSTREAM_BACKOFF_CAP: float = 30.0  # Largest jittered delay between attempts, seconds
+    UPSTREAM_RETRY_AFTER_CAP: float = 120.0  # Longest Retry-After we are willing to wait
+    UPSTREAM_BREAKER_THRESHOLD: int = 5  # Consecutive failed attempts before the circuit opens
+    UPSTREAM_BREAKER_RESET_SECONDS: float = 30.0  # Time the circuit stays open before a half-open probe
+    UPSTREAM_RETRY_BUDGET_RATIO: float = 0.2  # Retries earned per request
+    UPSTREAM_RETRY_BUDGET_RESERVE: float = 10.0  # Retries available before the ratio applies
+
     # Environment detection
     ENVIRONMENT: str = "development"  # development, production, test
     
     @property
     def DATABASE_URL(self) -> str:
-        return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        return f"postgresql+psycopg2://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+    @property
+    def READ_DATABASE_URL(self) -> str:
+        return self.DATABASE_REPLICA_URL or self.DATABASE_URL
+
+    @property
+    def ASYNC_READ_DATABASE_URL(self) -> str:
+        return "postgresql+asyncpg://" + self.READ_DATABASE_URL.split("://", 1)[1]
 
     @property
     def is_production(self) -> bool:
@@ -68,6 +68,8 @@ CREATE TABLE IF NOT EXISTS teams (
 
 CREATE INDEX idx_teams_tournament_id ON teams(tournament_id);
 CREATE INDEX idx_teams_team_id ON teams(team_id);
+-- Sort key of the paginated /hockey/teams listing
+CREATE INDEX idx_teams_keyset ON teams(tournament_id, COALESCE(team_name, ''), team_id);
 
 -- Create matches table
 CREATE TABLE IF NOT EXISTS matches (
@@ -289,6 +291,33 @@ CREATE INDEX idx_team_members_team_id ON team_members(team_id);
 CREATE INDEX idx_team_members_person_id ON team_members(person_id);
 CREATE INDEX idx_team_members_position ON team_members(position);
 CREATE INDEX idx_team_members_member_type ON team_members(member_type);
+-- Sort key of the paginated /hockey/players listing
+CREATE INDEX idx_team_members_players_keyset ON team_members(person_id, id) WHERE member_type = 'Player';
+
+-- One row per person (team_members has one per person and team), written with the
+-- rosters; image keys are copied in by the image download
+CREATE TABLE IF NOT EXISTS persons (
+    person_id INTEGER PRIMARY KEY,
+    first_name VARCHAR,
+    last_name VARCHAR,
+    birth_date DATE,
+    gender VARCHAR,
+    nationality VARCHAR,
+    height FLOAT,
+    image_object_key VARCHAR,
+    image2_object_key VARCHAR,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Roster sizes per team, written together with the team's members at ingest
+CREATE TABLE IF NOT EXISTS team_roster_counts (
+    team_id INTEGER PRIMARY KEY,
+    member_count INTEGER NOT NULL DEFAULT 0,
+    player_count INTEGER NOT NULL DEFAULT 0,
+    staff_count INTEGER NOT NULL DEFAULT 0,
+    position_counts JSON,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
 
 
 ---------------------------------------
@@ -416,4 +445,110 @@ CREATE INDEX idx_player_statistics_tournament_id ON player_statistics(tournament
 CREATE INDEX idx_player_statistics_person_id ON player_statistics(person_id);
 CREATE INDEX idx_player_statistics_points ON player_statistics(points DESC);
 CREATE INDEX idx_player_statistics_goals ON player_statistics(goals_scored DESC);
-CREATE INDEX idx_player_statistics_rank ON player_statistics(rank);
\ No newline at end of file
+CREATE INDEX idx_player_statistics_rank ON player_statistics(rank);
+
+-- Career totals per person, recomputed for the affected persons whenever a
+-- tournament's player statistics are saved
+CREATE TABLE IF NOT EXISTS player_careers (
+    person_id INTEGER PRIMARY KEY,
+    first_name VARCHAR(100),
+    last_name VARCHAR(100),
+    tournaments_played INTEGER NOT NULL DEFAULT 0,
+    seasons_played INTEGER NOT NULL DEFAULT 0,
+    total_games INTEGER NOT NULL DEFAULT 0,
+    total_goals INTEGER NOT NULL DEFAULT 0,
+    total_assists INTEGER NOT NULL DEFAULT 0,
+    total_points INTEGER NOT NULL DEFAULT 0,
+    total_pim INTEGER NOT NULL DEFAULT 0,
+    total_pp_goals INTEGER NOT NULL DEFAULT 0,
+    total_pp_assists INTEGER NOT NULL DEFAULT 0,
+    total_sh_goals INTEGER NOT NULL DEFAULT 0,
+    total_sh_assists INTEGER NOT NULL DEFAULT 0,
+    total_gwg INTEGER NOT NULL DEFAULT 0,
+    total_shots INTEGER NOT NULL DEFAULT 0,
+    total_faceoffs INTEGER NOT NULL DEFAULT 0,
+    career_shot_pct FLOAT NOT NULL DEFAULT 0,
+    points_per_game FLOAT NOT NULL DEFAULT 0,
+    goals_per_game FLOAT NOT NULL DEFAULT 0,
+    assists_per_game FLOAT NOT NULL DEFAULT 0,
+    pim_per_game FLOAT NOT NULL DEFAULT 0,
+    seasons JSON,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Standings after every round of a tournament, one series per team, rewritten
+-- whenever the tournament's matches are saved
+CREATE TABLE IF NOT EXISTS standings_history (
+    tournament_id INTEGER PRIMARY KEY REFERENCES tournaments(tournament_id),
+    rounds JSON NOT NULL,
+    teams JSON NOT NULL,
+    series JSON NOT NULL,
+    point_rules JSON,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Record of every pair of teams per tournament, lower team_id first, rebuilt
+-- whenever the tournament's matches are saved
+CREATE TABLE IF NOT EXISTS head_to_head (
+    team_low_id INTEGER NOT NULL,
+    team_high_id INTEGER NOT NULL,
+    tournament_id INTEGER NOT NULL,
+    tournament_name VARCHAR,
+    season_id INTEGER,
+    team_low_name VARCHAR,
+    team_high_name VARCHAR,
+    games INTEGER NOT NULL DEFAULT 0,
+    team_low_wins INTEGER NOT NULL DEFAULT 0,
+    team_high_wins INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0,
+    team_low_goals INTEGER NOT NULL DEFAULT 0,
+    team_high_goals INTEGER NOT NULL DEFAULT 0,
+    last_match_date TIMESTAMP,
+    recent JSON,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (team_low_id, team_high_id, tournament_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_head_to_head_tournament_id ON head_to_head(tournament_id);
+
+-- Rolling form of every team per tournament, recomputed for the teams whose
+-- matches changed whenever the tournament's matches are saved
+CREATE TABLE IF NOT EXISTS team_form (
+    tournament_id INTEGER NOT NULL,
+    team_id INTEGER NOT NULL,
+    team_name VARCHAR,
+    games_played INTEGER NOT NULL DEFAULT 0,
+    form_last5 VARCHAR(5),
+    form_last10 VARCHAR(10),
+    points_last5 INTEGER NOT NULL DEFAULT 0,
+    points_last10 INTEGER NOT NULL DEFAULT 0,
+    goals_for_last5 INTEGER NOT NULL DEFAULT 0,
+    goals_against_last5 INTEGER NOT NULL DEFAULT 0,
+    goals_for_last10 INTEGER NOT NULL DEFAULT 0,
+    goals_against_last10 INTEGER NOT NULL DEFAULT 0,
+    home_form_last5 VARCHAR(5),
+    away_form_last5 VARCHAR(5),
+    home_points_last5 INTEGER NOT NULL DEFAULT 0,
+    away_points_last5 INTEGER NOT NULL DEFAULT 0,
+    streak_type VARCHAR(1),
+    streak_length INTEGER NOT NULL DEFAULT 0,
+    unbeaten_streak INTEGER NOT NULL DEFAULT 0,
+    trend JSON,
+    last_match_date TIMESTAMP,
+    point_rules JSON,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (tournament_id, team_id)
+);
+
+-- Bumped by every commit that changes ingested data (see src/utils/data_version.py)
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+-- Materialized views for the analytics endpoints (readonly.mv_*) are created by the
+-- application on first connect and refreshed by fetch_all, see src/utils/materialized_views.py
+-- Name search (pg_trgm, unaccent, normalize_name() and the trigram indexes) is set up
+-- the same way, see src/utils/name_search.py
@@ -6,6 +6,13 @@ from src.models.standing import Standing
 from src.models.organisation import Organisation
 from src.models.team_member import TeamMember
 from src.models.team_member_custom_data import TeamMemberCustomData
+from src.models.person import Person
+from src.models.team_roster_count import TeamRosterCount
 from src.models.player_statistic import PlayerStatistic
+from src.models.player_career import PlayerCareer
+from src.models.standings_history import StandingsHistory
+from src.models.head_to_head import HeadToHead
+from src.models.team_form import TeamForm
+from src.models.data_version import DataVersion
 
 # This ensures all models are loaded when models package is imported
\ No newline at end of file
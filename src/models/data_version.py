@@ -0,0 +1,11 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer
+from src.models.base import Base
+from datetime import datetime
+
+class DataVersion(Base):
+    __tablename__ = "data_version"
+
+    # Single row (id = 1), bumped by every commit that changed ingested data
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.now, nullable=True)
@@ -1,25 +1,2 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from src.config.settings import get_settings
-from src.models.base import Base
-# import all models to ensure they are registered with SQLAlchemy
-from src.models.tournament import Tournament, TournamentClass
-from src.models.team import Team
-from src.models.match import Match
-from src.models.standing import Standing
-from src.models.organisation import Organisation
-from src.models.team_member import TeamMember
-from src.models.player_statistic import PlayerStatistic
-
-
-settings = get_settings()
-engine = create_engine(settings.DATABASE_URL)
-Base.metadata.create_all(bind=engine) # Create all tables in the database which are defined by Base's subclasses
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+# Kept for imports of src.models.database; the engines live in src.utils.database
+from src.utils.database import SessionLocal, get_db, get_engine, get_read_engine, get_read_session
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, DateTime, Index, Integer, JSON, PrimaryKeyConstraint, String
+from src.models.base import Base
+from datetime import datetime
+
+class HeadToHead(Base):
+    __tablename__ = "head_to_head"
+
+    # One row per pair of teams and tournament they met in, the lower team_id
+    # first, so a pair is found on the primary key whichever team asks. Rebuilt
+    # for a tournament whenever its matches are saved (see HeadToHeadService).
+    team_low_id = Column(Integer, nullable=False)
+    team_high_id = Column(Integer, nullable=False)
+    tournament_id = Column(Integer, nullable=False)
+    tournament_name = Column(String, nullable=True)
+    season_id = Column(Integer, nullable=True)
+    team_low_name = Column(String, nullable=True)
+    team_high_name = Column(String, nullable=True)
+
+    # Played meetings only
+    games = Column(Integer, nullable=False, default=0)
+    team_low_wins = Column(Integer, nullable=False, default=0)
+    team_high_wins = Column(Integer, nullable=False, default=0)
+    draws = Column(Integer, nullable=False, default=0)
+    team_low_goals = Column(Integer, nullable=False, default=0)
+    team_high_goals = Column(Integer, nullable=False, default=0)
+    last_match_date = Column(DateTime, nullable=True)
+    recent = Column(JSON, nullable=True)  # the latest meetings, newest first (see HEAD_TO_HEAD_RECENT)
+
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("team_low_id", "team_high_id", "tournament_id"),
+        Index("idx_head_to_head_tournament_id", "tournament_id"),
+    )
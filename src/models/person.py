@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String
+from src.models.base import Base
+from datetime import datetime
+
+class Person(Base):
+    __tablename__ = "persons"
+
+    # One row per person; team_members has one per (person, team). Demographics are
+    # written with the rosters (see TeamMemberService.save_roster_plan), image keys
+    # by PersonImageService.
+    person_id = Column(Integer, primary_key=True)
+    first_name = Column(String, nullable=True)
+    last_name = Column(String, nullable=True)
+    birth_date = Column(Date, nullable=True)
+    gender = Column(String, nullable=True)
+    nationality = Column(String, nullable=True)
+    height = Column(Float, nullable=True)
+
+    # MinIO object keys, as in team_member_custom_data
+    image_object_key = Column(String, nullable=True)
+    image2_object_key = Column(String, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=True)
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, DateTime, Float, Integer, JSON, String
+from src.models.base import Base
+from datetime import datetime
+
+class PlayerCareer(Base):
+    __tablename__ = "player_careers"
+
+    # One row per person, recomputed from player_statistics whenever a tournament's
+    # statistics are saved (see PlayerCareerService)
+    person_id = Column(Integer, primary_key=True)
+    first_name = Column(String(100), nullable=True)  # from the most recent season
+    last_name = Column(String(100), nullable=True)
+
+    tournaments_played = Column(Integer, nullable=False, default=0)
+    seasons_played = Column(Integer, nullable=False, default=0)
+    total_games = Column(Integer, nullable=False, default=0)
+    total_goals = Column(Integer, nullable=False, default=0)
+    total_assists = Column(Integer, nullable=False, default=0)
+    total_points = Column(Integer, nullable=False, default=0)
+    total_pim = Column(Integer, nullable=False, default=0)
+    total_pp_goals = Column(Integer, nullable=False, default=0)
+    total_pp_assists = Column(Integer, nullable=False, default=0)
+    total_sh_goals = Column(Integer, nullable=False, default=0)
+    total_sh_assists = Column(Integer, nullable=False, default=0)
+    total_gwg = Column(Integer, nullable=False, default=0)
+    total_shots = Column(Integer, nullable=False, default=0)
+    total_faceoffs = Column(Integer, nullable=False, default=0)
+    career_shot_pct = Column(Float, nullable=False, default=0)
+
+    # Per-game rates, 0 without games
+    points_per_game = Column(Float, nullable=False, default=0)
+    goals_per_game = Column(Float, nullable=False, default=0)
+    assists_per_game = Column(Float, nullable=False, default=0)
+    pim_per_game = Column(Float, nullable=False, default=0)
+
+    # Per-season splits, newest first: [{"season_id", "season_name", "tournaments", "games", "goals", ...}]
+    seasons = Column(JSON, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=True)
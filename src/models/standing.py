@@ -1,5 +1,5 @@
 # src/models/standing.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from src.models.base import Base
 from datetime import datetime
@@ -101,5 +101,6 @@ class Standing(Base):
     
     # Unique constraint to ensure a team only appears once per tournament
     __table_args__ = (
+        UniqueConstraint('tournament_id', 'team_id', name='standings_tournament_id_team_id_key'),
         {'sqlite_autoincrement': True},
     )
\ No newline at end of file
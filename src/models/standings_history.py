@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, JSON
+from src.models.base import Base
+from datetime import datetime
+
+class StandingsHistory(Base):
+    __tablename__ = "standings_history"
+
+    # One row per tournament: the table after every round, as one series per team
+    # (see standings_engine.standings_timeline). Rewritten whenever the
+    # tournament's matches are saved (see StandingsHistoryService).
+    tournament_id = Column(Integer, ForeignKey("tournaments.tournament_id"), primary_key=True)
+    rounds = Column(JSON, nullable=False)  # [{round_id, round_name, date}] in order
+    teams = Column(JSON, nullable=False)  # [{team_id, team_name, overridden_name}]
+    series = Column(JSON, nullable=False)  # {position|points|...: [[value per round] per team]}
+    point_rules = Column(JSON, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint, PrimaryKeyConstraint, Index, text
 from sqlalchemy.orm import relationship
 from src.models.tournament import Tournament
 from src.models.base import Base
@@ -24,5 +24,7 @@ class Team(Base):
     # Define composite primary key and unique constraint
     __table_args__ = (
         PrimaryKeyConstraint('team_id', 'tournament_id'),
+        # Sort key of the paginated /hockey/teams listing
+        Index("idx_teams_keyset", "tournament_id", text("COALESCE(team_name, '')"), "team_id"),
         {},
     )
\ No newline at end of file
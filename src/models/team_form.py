@@ -0,0 +1,45 @@
+from sqlalchemy import Column, DateTime, Integer, JSON, PrimaryKeyConstraint, String
+from src.models.base import Base
+from datetime import datetime
+
+class TeamForm(Base):
+    __tablename__ = "team_form"
+
+    # One row per team and tournament, recomputed for the teams whose matches
+    # changed whenever the tournament's matches are saved (see TeamFormService).
+    # Forms are W/D/L letters, newest first.
+    tournament_id = Column(Integer, nullable=False)
+    team_id = Column(Integer, nullable=False)
+    team_name = Column(String, nullable=True)
+    games_played = Column(Integer, nullable=False, default=0)
+
+    form_last5 = Column(String(5), nullable=True)
+    form_last10 = Column(String(10), nullable=True)
+    points_last5 = Column(Integer, nullable=False, default=0)
+    points_last10 = Column(Integer, nullable=False, default=0)
+    goals_for_last5 = Column(Integer, nullable=False, default=0)
+    goals_against_last5 = Column(Integer, nullable=False, default=0)
+    goals_for_last10 = Column(Integer, nullable=False, default=0)
+    goals_against_last10 = Column(Integer, nullable=False, default=0)
+
+    home_form_last5 = Column(String(5), nullable=True)
+    away_form_last5 = Column(String(5), nullable=True)
+    home_points_last5 = Column(Integer, nullable=False, default=0)
+    away_points_last5 = Column(Integer, nullable=False, default=0)
+
+    # Current run of equal results (e.g. W, 3) and games since the last loss
+    streak_type = Column(String(1), nullable=True)
+    streak_length = Column(Integer, nullable=False, default=0)
+    unbeaten_streak = Column(Integer, nullable=False, default=0)
+
+    # Per game, oldest first: match ids and rolling averages (see FORM_TREND_WINDOW)
+    trend = Column(JSON, nullable=True)
+    last_match_date = Column(DateTime, nullable=True)
+    # The PointRules the points were computed under; other rules recompute every team
+    point_rules = Column(JSON, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("tournament_id", "team_id"),
+    )
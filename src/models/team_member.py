@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Index, text
 from sqlalchemy.orm import relationship
 from src.models.base import Base
 from datetime import datetime
@@ -38,5 +38,8 @@ class TeamMember(Base):
     
     # Unique constraint to avoid duplicates
     __table_args__ = (
+        # Sort key of the paginated /hockey/players listing
+        Index("idx_team_members_players_keyset", "person_id", "id",
+              postgresql_where=text("member_type = 'Player'")),
         {'sqlite_autoincrement': True},
     )
\ No newline at end of file
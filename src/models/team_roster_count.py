@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, Integer, JSON
+from src.models.base import Base
+from datetime import datetime
+
+class TeamRosterCount(Base):
+    __tablename__ = "team_roster_counts"
+
+    # One row per team, written with the team's members (see TeamMemberService.save_roster_plan)
+    team_id = Column(Integer, primary_key=True)
+    member_count = Column(Integer, nullable=False, default=0)
+    player_count = Column(Integer, nullable=False, default=0)
+    staff_count = Column(Integer, nullable=False, default=0)  # every member that is not a Player
+    position_counts = Column(JSON, nullable=True)  # players per position, e.g. {"F": 12, "D": 7}
+
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=True)
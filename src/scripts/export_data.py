@@ -0,0 +1,39 @@
+# src/scripts/export_data.py
+"""
+Export a table as CSV, NDJSON, Parquet or Arrow, the same stream GET /hockey/export/{dataset} sends.
+
+    python -m src.scripts.export_data player_statistics --season-id 200 --format parquet -o stats.parquet
+"""
+import argparse
+import sys
+from src.services.export_service import EXPORT_DATASETS, EXPORT_FORMATS, ExportError, check_export, stream_export
+from src.utils.database import get_read_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a table to a file or stdout")
+    parser.add_argument("dataset", choices=list(EXPORT_DATASETS))
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--tournament-id", type=int, help="Only this tournament")
+    parser.add_argument("--season-id", type=int, help="Only tournaments of this season")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows fetched and encoded at a time")
+    parser.add_argument("-o", "--output", help="File to write (default: stdout)")
+    args = parser.parse_args()
+
+    try:
+        check_export(args.dataset, args.format)
+    except ExportError as e:
+        parser.error(str(e))
+
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for part in stream_export(get_read_engine(), args.dataset, args.format,
+                                  args.tournament_id, args.season_id, args.chunk_size):
+            output.write(part)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
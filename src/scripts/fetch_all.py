@@ -9,23 +9,28 @@ from src.scripts.fetch_team_members import main as fetch_team_members_main
 from src.scripts.fetch_standings import main as fetch_standings_main
 from src.scripts.fetch_matches import main as fetch_matches_main
 from src.scripts.fetch_tournament_players import main as fetch_tournament_players_main
+from src.utils.materialized_views import refresh_materialized_views
+from src.utils.resilience import upstream_metrics
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fetch stages in the order they must run
+FETCH_STAGES = [
+    ("Organisations", fetch_organisations_main),
+    ("Tournaments", fetch_tournaments_main),
+    ("Teams", fetch_teams_main),
+    ("Team Members", fetch_team_members_main),
+    ("Standings", fetch_standings_main),
+    ("Matches", fetch_matches_main),
+    ("Tournament Player Statistics", fetch_tournament_players_main),
+]
+
 async def main():
     """Run all fetch scripts in the correct order"""
     
-    scripts = [
-        ("Organisations", fetch_organisations_main),
-        ("Tournaments", fetch_tournaments_main),
-        ("Teams", fetch_teams_main),
-        ("Team Members", fetch_team_members_main),
-        ("Standings", fetch_standings_main),
-        ("Matches", fetch_matches_main),
-        ("Tournament Player Statistics", fetch_tournament_players_main),
-    ]
+    scripts = FETCH_STAGES
     
     total_scripts = len(scripts)
     
@@ -42,5 +47,15 @@ async def main():
     
     logger.info("🎉 All fetch scripts completed!")
 
+    # The API reads its leaderboards and totals from these views
+    try:
+        timings = refresh_materialized_views()
+        logger.info(f"✅ Materialized views refreshed in {sum(timings.values()):.1f}s")
+    except Exception as e:
+        logger.error(f"❌ Refreshing materialized views failed: {e}")
+
+    for host, metrics in upstream_metrics().items():
+        logger.info(f"Upstream {host}: {metrics}")
+
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -25,11 +25,16 @@ async def main():
             for tournament_id in batch:
                 try:
                     print(f"Fetching matches for tournament {tournament_id}")
-                    data = await service.fetch_tournament_matches(tournament_id)
-                    service.save_tournament_matches(db, data)
-                    print(f"  Matches saved: {len(data.get('matches', []))}")
+                    if service.settings.INGEST_STREAMING:
+                        chunks = service.stream_tournament_matches(tournament_id, service.settings.INGEST_CHUNK_SIZE)
+                        match_count = await service.save_tournament_matches_stream(db, tournament_id, chunks)
+                    else:
+                        data = await service.fetch_tournament_matches(tournament_id)
+                        service.save_tournament_matches(db, data)
+                        match_count = len(data.get('matches', []))
+                    print(f"  Matches saved: {match_count}")
                     # Small delay to be nice to the API
-                    await asyncio.sleep(1)
+                    await asyncio.sleep(1 * service.settings.INGEST_THROTTLE_SCALE)
                 except Exception as e:
                     print(f"  Error fetching matches for tournament {tournament_id}: {e}")
         
@@ -33,7 +33,7 @@ async def main():
                 print(f"  Saved {len(data['organisations'])} organisations")
                 
                 # Small delay to be nice to the API
-                await asyncio.sleep(1)
+                await asyncio.sleep(1 * service.settings.INGEST_THROTTLE_SCALE)
             except Exception as e:
                 print(f"  Error processing batch: {e}")
         
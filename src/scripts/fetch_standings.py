@@ -32,7 +32,7 @@ async def main():
                     service.save_tournament_standings(db, data)
                     print(f"  Standings saved: {len(data.get('standings', []))}")
                     # Small delay to be nice to the API
-                    await asyncio.sleep(1)
+                    await asyncio.sleep(1 * service.settings.INGEST_THROTTLE_SCALE)
                 except Exception as e:
                     print(f"  Error fetching standings for tournament {tournament_id}: {e}")
         
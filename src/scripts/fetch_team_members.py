@@ -1,7 +1,7 @@
 import asyncio
 from sqlalchemy.orm import Session
 from sqlalchemy import distinct
-from src.services.team_member_service import TeamMemberService
+from src.services.team_member_service import RosterPlan, TeamMemberService
 from src.utils.database import get_db
 from src.models.team import Team
 
@@ -20,7 +20,8 @@ async def main():
             print("No teams to fetch members for. Run fetch_teams first.")
             return
         
-        # Process teams in batches to avoid overwhelming the API
+        # Fetch every roster once and collect the work per person first
+        plan = RosterPlan()
         batch_size = 20
         for i in range(0, len(team_ids), batch_size):
             batch = team_ids[i:i+batch_size]
@@ -30,19 +31,27 @@ async def main():
                 try:
                     print(f"Fetching members for team {team_id}")
                     data = await service.fetch_team_members(team_id)
-                    member_count = len(data.get("members", []))
+                    member_count = service.plan_roster(plan, data)
                     
                     if member_count > 0:
-                        service.save_team_members(db, data)
-                        print(f"  Saved {member_count} team members")
+                        print(f"  Planned {member_count} team members")
                     else:
                         print(f"  No members found for team {team_id}")
                     
                     # Small delay to be nice to the API
-                    await asyncio.sleep(0.5)
+                    await asyncio.sleep(0.5 * service.settings.INGEST_THROTTLE_SCALE)
                 except Exception as e:
                     print(f"  Error processing team {team_id}: {e}")
         
+        # Membership links in bulk, then each person's images once
+        saved = service.save_roster_plan(db, plan)
+        print(f"Saved {saved} team members for {len(plan.members_by_team)} teams")
+        
+        print(f"Processing images for {len(plan.images_by_person)} persons "
+              f"({plan.duplicate_image_jobs} duplicate jobs skipped)")
+        processed = await service.process_roster_images(db, plan)
+        print(f"Processed images for {processed} persons")
+        
         print("Finished fetching team members")
     finally:
         db.close()
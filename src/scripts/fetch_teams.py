@@ -29,7 +29,7 @@ async def main():
                     service.save_tournament_teams(db, data)
                     print(f"  Teams saved: {len(data.get('teams', []))}")
                     # Small delay to be nice to the API
-                    await asyncio.sleep(0.5)
+                    await asyncio.sleep(0.5 * service.settings.INGEST_THROTTLE_SCALE)
                 except Exception as e:
                     print(f"  Error fetching teams for tournament {tournament_id}: {e}")
         
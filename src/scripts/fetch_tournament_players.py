@@ -30,18 +30,24 @@ async def main():
             for tournament_id, tournament_name in batch:
                 try:
                     print(f"Fetching player statistics for tournament {tournament_id} ({tournament_name})")
-                    data = await service.fetch_tournament_players(tournament_id)
+                    if service.settings.INGEST_STREAMING:
+                        chunks = service.stream_tournament_players(tournament_id, service.settings.INGEST_CHUNK_SIZE)
+                        player_count = await service.save_tournament_player_statistics_stream(db, tournament_id, chunks)
+                    else:
+                        data = await service.fetch_tournament_players(tournament_id)
+                        player_count = len(data) if data else 0
+                        if player_count > 0:
+                            service.save_tournament_player_statistics(db, tournament_id, data)
                     
-                    if data and len(data) > 0:
-                        service.save_tournament_player_statistics(db, tournament_id, data)
-                        print(f"  ✓ Player statistics saved: {len(data)}")
+                    if player_count > 0:
+                        print(f"  ✓ Player statistics saved: {player_count}")
                         success_count += 1
                     else:
                         print(f"  - No player statistics found")
                         empty_count += 1
                     
                     # Delay to be nice to the API
-                    await asyncio.sleep(1.0)
+                    await asyncio.sleep(1.0 * service.settings.INGEST_THROTTLE_SCALE)
                     
                 except Exception as e:
                     error_count += 1
@@ -50,7 +56,7 @@ async def main():
             # Brief pause between batches
             if i + batch_size < len(tournaments):
                 print("  Pausing between batches...")
-                await asyncio.sleep(2.0)
+                await asyncio.sleep(2.0 * service.settings.INGEST_THROTTLE_SCALE)
         
         print("\n" + "="*60)
         print("SUMMARY:")
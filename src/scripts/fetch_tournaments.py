@@ -9,9 +9,15 @@ async def main():
     # 2025/2026 season is 201059
     
     try:
-        data = await service.fetch_season_tournaments(season_id)
-
         db = next(get_db())
+
+        if service.settings.INGEST_STREAMING:
+            chunks = service.stream_season_tournaments(season_id, service.settings.INGEST_CHUNK_SIZE)
+            saved_count = await service.save_tournaments_stream(db, chunks)
+            print(f"Successfully streamed and saved {saved_count} tournaments for season {season_id}")
+            return
+
+        data = await service.fetch_season_tournaments(season_id)
  
         # Filter to only save specific tournaments in testphase
         # comment out this in production
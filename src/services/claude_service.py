@@ -6,7 +6,7 @@ from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import text, inspect
 from src.config.settings import get_settings
-from src.utils.database import get_db
+from src.utils.database import get_read_session
 from src.utils.logging_config import setup_logging
 
 logger = setup_logging("claude_service")
@@ -26,7 +26,7 @@ class ClaudeService:
     
     def _get_fresh_db(self):
         """Get a fresh database connection"""
-        return next(get_db())
+        return get_read_session()
     
     def _get_schema_info(self) -> str:
         """Get comprehensive database schema information for Claude"""
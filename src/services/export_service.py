@@ -0,0 +1,206 @@
+# src/services/export_service.py
+"""
+Bulk exports of the ingested tables as CSV, NDJSON, Parquet or Arrow.
+
+Rows are read through a server-side cursor in chunks and each chunk is
+encoded and handed on before the next one is fetched, so memory stays flat
+however large the export is. Used by GET /hockey/export/{dataset} and by
+python -m src.scripts.export_data.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Time, select
+from sqlalchemy.engine import Connection, Engine
+from src.models.match import Match
+from src.models.player_statistic import PlayerStatistic
+from src.models.standing import Standing
+from src.models.team import Team
+from src.models.team_member import TeamMember
+from src.models.tournament import Tournament
+from src.utils.logging_config import setup_logging
+
+logger = setup_logging("export_service")
+
+EXPORT_DATASETS = {
+    "player_statistics": PlayerStatistic,
+    "matches": Match,
+    "standings": Standing,
+    "team_members": TeamMember,
+}
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+
+class ExportError(ValueError):
+    """Unknown dataset or format, or a format whose library is not installed"""
+
+
+def export_filename(dataset: str, fmt: str, tournament_id: Optional[int] = None,
+                    season_id: Optional[int] = None) -> str:
+    scope = f"tournament-{tournament_id}" if tournament_id else f"season-{season_id}" if season_id else "all"
+    return f"{dataset}-{scope}.{EXPORT_FORMATS[fmt][1]}"
+
+
+def _check_dataset(dataset: str) -> None:
+    if dataset not in EXPORT_DATASETS:
+        raise ExportError(f"Unknown dataset {dataset!r}, use one of: {', '.join(EXPORT_DATASETS)}")
+
+
+def _export_query(dataset: str, tournament_id: Optional[int], season_id: Optional[int]):
+    _check_dataset(dataset)
+    table = EXPORT_DATASETS[dataset].__table__
+    query = select(table)
+
+    tournament_ids = None
+    if tournament_id:
+        tournament_ids = [tournament_id]
+    elif season_id:
+        tournament_ids = select(Tournament.tournament_id).where(Tournament.season_id == season_id)
+
+    if tournament_ids is not None:
+        if "tournament_id" in table.c:
+            query = query.where(table.c.tournament_id.in_(tournament_ids))
+        else:
+            # team_members belong to a team, which plays in tournaments
+            query = query.where(table.c.team_id.in_(
+                select(Team.team_id).where(Team.tournament_id.in_(tournament_ids))
+            ))
+    # Primary key order, so exports of unchanged data are identical
+    return query.order_by(*table.primary_key.columns)
+
+
+def iter_row_chunks(conn: Connection, dataset: str, tournament_id: Optional[int] = None,
+                    season_id: Optional[int] = None, chunk_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+    """Rows of the dataset in chunks, fetched through a server-side cursor"""
+    query = _export_query(dataset, tournament_id, season_id)
+    result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+    for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _encode_csv(columns: List[str], chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield "".join(json.dumps(row, default=_json_default) + "\n" for row in chunk).encode("utf-8")
+
+
+def _arrow_schema(pa, table):
+    types = ((Boolean, pa.bool_()), (Integer, pa.int64()), (Float, pa.float64()),
+             (DateTime, pa.timestamp("us")), (Date, pa.date32()), (Time, pa.time64("us")))
+    fields = []
+    for column in table.columns:
+        arrow_type = next((t for sql_type, t in types if isinstance(column.type, sql_type)), pa.string())
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose written bytes are taken out after each batch"""
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _encode_arrow(fmt: str, table, chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError(f"{fmt} exports need pyarrow (pip install pyarrow)")
+
+    # Fixed schema from the model, so a chunk of NULLs cannot change a column's type
+    schema = _arrow_schema(pa, table)
+    sink = _Drain()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    else:
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        # One Parquet row group / Arrow record batch per chunk
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def encode_chunks(dataset: str, fmt: str, chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """Encode row chunks of a dataset in the requested format, chunk by chunk"""
+    table = EXPORT_DATASETS[dataset].__table__
+    if fmt == "csv":
+        return _encode_csv([c.name for c in table.columns], chunks)
+    if fmt == "ndjson":
+        return _encode_ndjson(chunks)
+    if fmt in ("parquet", "arrow"):
+        return _encode_arrow(fmt, table, chunks)
+    raise ExportError(f"Unknown format {fmt!r}, use one of: {', '.join(EXPORT_FORMATS)}")
+
+
+def check_export(dataset: str, fmt: str) -> None:
+    """Raise ExportError before streaming starts, while a proper error can still be sent"""
+    _check_dataset(dataset)
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown format {fmt!r}, use one of: {', '.join(EXPORT_FORMATS)}")
+    if fmt in ("parquet", "arrow"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ExportError(f"{fmt} exports need pyarrow (pip install pyarrow)")
+
+
+def stream_export(engine: Engine, dataset: str, fmt: str, tournament_id: Optional[int] = None,
+                  season_id: Optional[int] = None, chunk_size: int = 5000) -> Iterator[bytes]:
+    """Encoded export, holding one connection (and one chunk in memory) until exhausted or closed"""
+    check_export(dataset, fmt)
+    with engine.connect() as conn:
+        rows = 0
+        chunks = iter_row_chunks(conn, dataset, tournament_id, season_id, chunk_size)
+
+        def counted():
+            nonlocal rows
+            for chunk in chunks:
+                rows += len(chunk)
+                yield chunk
+
+        yield from encode_chunks(dataset, fmt, counted())
+        logger.info("Export finished", extra={
+            "dataset": dataset, "format": fmt, "tournament_id": tournament_id,
+            "season_id": season_id, "rows": rows
+        })
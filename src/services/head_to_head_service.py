@@ -0,0 +1,87 @@
+# src/services/head_to_head_service.py
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from src.models.head_to_head import HeadToHead
+from src.models.match import Match
+from src.utils.logging_config import setup_logging
+
+logger = setup_logging("head_to_head_service")
+
+# Meetings kept per pair and tournament, newest first
+HEAD_TO_HEAD_RECENT = 10
+
+_MEETING_COLUMNS = (Match.match_id, Match.tournament_id, Match.tournament_name, Match.season_id,
+                    Match.hometeam_id, Match.awayteam_id, Match.hometeam, Match.awayteam,
+                    Match.hometeam_overridden_name, Match.awayteam_overridden_name,
+                    Match.home_goals, Match.away_goals, Match.match_end_result, Match.match_date)
+
+
+def build_pairs(tournament_id: int, matches: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """head_to_head rows of a tournament from its played matches, the lower team_id first"""
+    pairs: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    meetings: Dict[Tuple[int, int], List[Mapping[str, Any]]] = {}
+    for match in matches:
+        home, away = match["hometeam_id"], match["awayteam_id"]
+        if home is None or away is None or home == away or match["home_goals"] is None or match["away_goals"] is None:
+            continue
+        low, high = min(home, away), max(home, away)
+        names = {home: match["hometeam_overridden_name"] or match["hometeam"],
+                 away: match["awayteam_overridden_name"] or match["awayteam"]}
+        pair = pairs.setdefault((low, high), {
+            "team_low_id": low, "team_high_id": high, "tournament_id": tournament_id,
+            "tournament_name": match["tournament_name"], "season_id": match["season_id"],
+            "team_low_name": names[low], "team_high_name": names[high],
+            "games": 0, "team_low_wins": 0, "team_high_wins": 0, "draws": 0,
+            "team_low_goals": 0, "team_high_goals": 0, "last_match_date": None,
+        })
+        goals = {home: match["home_goals"], away: match["away_goals"]}
+        pair["games"] += 1
+        pair["team_low_goals"] += goals[low]
+        pair["team_high_goals"] += goals[high]
+        if goals[low] > goals[high]:
+            pair["team_low_wins"] += 1
+        elif goals[low] < goals[high]:
+            pair["team_high_wins"] += 1
+        else:
+            pair["draws"] += 1
+        if match["match_date"] is not None and (pair["last_match_date"] is None or match["match_date"] > pair["last_match_date"]):
+            pair["last_match_date"] = match["match_date"]
+        meetings.setdefault((low, high), []).append(match)
+
+    for key, pair in pairs.items():
+        newest = sorted(meetings[key], key=lambda m: (m["match_date"] is not None, m["match_date"] or 0, m["match_id"]),
+                        reverse=True)[:HEAD_TO_HEAD_RECENT]
+        pair["recent"] = [{
+            "match_id": m["match_id"], "tournament_id": tournament_id,
+            "match_date": m["match_date"].isoformat() if m["match_date"] else None,
+            "hometeam_id": m["hometeam_id"], "awayteam_id": m["awayteam_id"],
+            "home_goals": m["home_goals"], "away_goals": m["away_goals"], "match_end_result": m["match_end_result"],
+        } for m in newest]
+    return list(pairs.values())
+
+
+class HeadToHeadService:
+    """Keeps head_to_head in step with matches, one tournament at a time"""
+
+    def refresh_head_to_head(self, db: Session, tournament_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Recompute the pairs of the given tournaments (every tournament with
+        matches if None). The caller commits. Returns the number of pairs written.
+        """
+        if tournament_ids is None:
+            tournament_ids = db.execute(select(Match.tournament_id).distinct()).scalars().all()
+
+        written = 0
+        now = datetime.now()
+        for tournament_id in sorted(set(tournament_ids)):
+            matches = db.execute(
+                select(*_MEETING_COLUMNS).where(Match.tournament_id == tournament_id)
+            ).mappings().all()
+            pairs = build_pairs(tournament_id, matches)
+            db.query(HeadToHead).filter(HeadToHead.tournament_id == tournament_id).delete(synchronize_session=False)
+            if pairs:
+                db.execute(insert(HeadToHead), [{**pair, "updated_at": now} for pair in pairs])
+            written += len(pairs)
+        return written
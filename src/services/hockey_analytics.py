@@ -1,945 +1,1048 @@
 # src/services/hockey_analytics.py
-from typing import Dict, Any, List, Optional
+import functools
+import json
+from typing import TYPE_CHECKING, Dict, Any, Generator, List, NamedTuple, Optional, Sequence, Tuple
 from sqlalchemy import text
-from src.utils.database import get_db
+from src.models.standing import Standing
+from src.services.standings_engine import (CHECK_COLUMNS, DEFAULT_POINT_RULES, PointRules, compute_standings,
+                                           standings_differences)
+from src.utils.database import get_read_session
 from src.utils.logging_config import setup_logging
+from src.utils import name_search
+from src.utils.materialized_views import PERCENTILE_COHORTS, PERCENTILE_STATS
+from src.utils.pagination import InvalidCursor, Keyset
 import logging
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from src.services.leaderboard_snapshot import LeaderboardSnapshot
+
 logger = setup_logging("hockey_analytics")
 
+
+class _Query(NamedTuple):
+    sql: str
+    params: Dict[str, Any]
+    one: bool
+
+
+def _all(sql: str, params: Optional[Dict[str, Any]] = None) -> _Query:
+    """Plan step: run sql, receive all rows as dicts"""
+    return _Query(sql, params or {}, False)
+
+
+def _one(sql: str, params: Optional[Dict[str, Any]] = None) -> _Query:
+    """Plan step: run sql, receive the first row as a dict (or None)"""
+    return _Query(sql, params or {}, True)
+
+
+def _rows(result, one: bool):
+    if one:
+        row = result.fetchone()
+        return dict(row._mapping) if row else None
+    return [dict(row._mapping) for row in result.fetchall()]
+
+
+def _json_value(value):
+    """A JSON column's value: PostgreSQL drivers decode JSON columns, SQLite hands back the text"""
+    return json.loads(value) if isinstance(value, str) else value
+
+
+# Leaderboard sorts: non-NULL key expressions and their direction; ps.id is
+# appended to make them unique for keyset pagination
+_STAT_SORTS = {
+    "points": (("ps.scoring_points", "ps.goals_scored"), True),
+    "goals": (("ps.goals_scored", "ps.scoring_points"), True),
+    "assists": (("ps.assists", "ps.scoring_points"), True),
+    "plus_minus": (("ps.plus_minus",), True),
+    "pim": (("ps.pim",), True),
+    "shots": (("ps.shots",), True),
+    "saves": (("COALESCE(ps.shots_pct, -1)",), True),
+    "faceoffs": (("COALESCE(ps.faceoffs_win_pct, -1)",), True),
+    "rank": (("COALESCE(ps.rank, 2147483647)",), False),
+}
+
+
+# Columns the standings endpoint can return, by name
+STANDING_COLUMNS = {
+    **{column.name: f"s.{column.name}" for column in Standing.__table__.columns},
+    "display_name": "COALESCE(s.overridden_name, s.team_name)",
+    "org_logo_base64": "o.org_logo_base64",
+}
+
+STANDING_VIEWS = {
+    # What a league table shows; no logo, which is most of the full payload
+    "compact": ("position", "team_id", "display_name", "matches_played", "victories", "draws",
+                "losses", "goals_diff", "points", "total_goals_formatted"),
+    "full": tuple(STANDING_COLUMNS),
+}
+
+
+def standing_fields(view: str = "full", fields: Optional[str] = None) -> Tuple[str, ...]:
+    """Columns for a standings request: a comma-separated fields list, else a named view"""
+    if fields:
+        names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in names if name not in STANDING_COLUMNS]
+        if unknown or not names:
+            raise ValueError(f"Unknown standings fields: {', '.join(unknown) or fields}. "
+                             f"Available: {', '.join(STANDING_COLUMNS)}")
+        return names
+    if view not in STANDING_VIEWS:
+        raise ValueError(f"Unknown view {view!r}, use one of: {', '.join(STANDING_VIEWS)}")
+    return STANDING_VIEWS[view]
+
+
+def percentile_options(cohort: str = "tournament_position",
+                       stats: Optional[str] = None) -> Tuple[str, Tuple[str, ...]]:
+    """Cohort and stats of a percentiles request; stats is a comma-separated list, all stats if empty"""
+    if cohort not in PERCENTILE_COHORTS:
+        raise ValueError(f"Unknown cohort {cohort!r}, use one of: {', '.join(PERCENTILE_COHORTS)}")
+    if not stats:
+        return cohort, tuple(PERCENTILE_STATS)
+    names = tuple(dict.fromkeys(name.strip() for name in stats.split(",") if name.strip()))
+    unknown = [name for name in names if name not in PERCENTILE_STATS]
+    if unknown or not names:
+        raise ValueError(f"Unknown stats: {', '.join(unknown) or stats}. Available: {', '.join(PERCENTILE_STATS)}")
+    return cohort, names
+
+
+# Columns of readonly.mv_player_leaderboard returned by the leaderboard endpoints
+_LEADERBOARD_STATS = (
+    "id", "person_id", "first_name", "last_name", "team_name", "team_short_name", "position",
+    "rank", "games_played", "goals_scored", "assists", "scoring_points", "plus_minus", "pim",
+    "power_play_goals", "power_play_goal_assists", "short_handed_goals", "short_handed_goal_assists",
+    "gwg", "shots", "shots_pct", "face_offs", "faceoffs_win_pct", "org_id",
+)
+# Player demographics and images
+_LEADERBOARD_PERSON = ("birth_date", "gender", "nationality", "image_object_key", "image2_object_key")
+
+TOURNAMENT_PLAYER_FIELDS = _LEADERBOARD_STATS + _LEADERBOARD_PERSON
+TOP_SCORER_FIELDS = (_LEADERBOARD_STATS + ("tournament_id", "tournament_name", "season_name")
+                     + _LEADERBOARD_PERSON + ("original_image_url", "original_image2_url"))
+
+
+def _leaderboard_columns(fields: Sequence[str]) -> str:
+    return ", ".join(f"ps.{name}" for name in fields)
+
+
+def _leaderboard_keyset(endpoint: str, stat_type: str, default: str) -> Keyset:
+    if stat_type not in _STAT_SORTS:
+        stat_type = default
+    keys, descending = _STAT_SORTS[stat_type]
+    return Keyset(f"{endpoint}:{stat_type}", keys + ("ps.id",), descending)
+
+
+def query_plan(action: str):
+    """
+    Turn a generator that yields _all()/_one() steps into an analytics method.
+    The SQL lives in one place; HockeyAnalytics runs the steps on a sync
+    session and AsyncHockeyAnalytics awaits them on an async session.
+    """
+    def decorator(plan):
+        @functools.wraps(plan)
+        def method(self, *args, **kwargs):
+            return self._run(plan(self, *args, **kwargs), action)
+        return method
+    return decorator
+
+
 class HockeyAnalytics:
     def __init__(self):
         pass
     
     def _get_fresh_db(self):
-        """Get a fresh database connection"""
-        return next(get_db())
-    
-    # get available filters for frontend
-    def get_available_filters(self) -> Dict[str, Any]:
-        """Get all available filter options for the frontend"""
+        """Get a fresh read-only session; _run closes it"""
+        return get_read_session()
+
+    def _run(self, plan: Generator, action: str) -> Dict[str, Any]:
         db = self._get_fresh_db()
         try:
-            # Get active tournaments - FIX: Use table aliases
-            tournaments = db.execute(text("""
-                SELECT 
-                    tour.tournament_id, 
-                    tour.tournament_name, 
-                    tour.season_name,
-                    COUNT(DISTINCT t.team_id) as team_count
-                FROM tournaments tour
-                LEFT JOIN teams t ON tour.tournament_id = t.tournament_id
-                WHERE tour.is_deleted = FALSE
-                GROUP BY tour.tournament_id, tour.tournament_name, tour.season_name
-                HAVING COUNT(DISTINCT t.team_id) > 0
-                ORDER BY tour.tournament_name
-            """)).fetchall()
-            
-            # Get available positions
-            positions = db.execute(text("""
-                SELECT DISTINCT position, COUNT(*) as count
-                FROM team_members
-                WHERE position IS NOT NULL
-                GROUP BY position
-                ORDER BY count DESC
-            """)).fetchall()
-            
-            # Get clubs with teams
-            clubs = db.execute(text("""
-                SELECT DISTINCT 
-                    o.org_id,
-                    o.org_name, 
-                    COUNT(DISTINCT t.team_id) as team_count
-                FROM organisations o
-                JOIN teams t ON o.org_id = t.club_org_id
-                GROUP BY o.org_id, o.org_name
-                ORDER BY team_count DESC, o.org_name
-                LIMIT 100
-            """)).fetchall()
-            
-            return {
-                "success": True,
-                "tournaments": [dict(row._mapping) for row in tournaments],
-                "positions": [dict(row._mapping) for row in positions],
-                "clubs": [dict(row._mapping) for row in clubs]
-            }
-            
+            rows = None
+            while True:
+                query = plan.send(rows)
+                rows = _rows(db.execute(text(query.sql), query.params), query.one)
+        except StopIteration as done:
+            return done.value
+        except InvalidCursor:
+            raise  # the client's mistake, reported as 400 by the routes
         except Exception as e:
-            logger.error(f"Error getting filters: {e}")
+            logger.error(f"Error {action}: {e}")
             return {"success": False, "error": str(e)}
         finally:
             db.close()
     
+    # get available filters for frontend
+    @query_plan("getting filters")
+    def get_available_filters(self) -> Dict[str, Any]:
+        """Get all available filter options for the frontend"""
+        # Get active tournaments - FIX: Use table aliases
+        tournaments = yield _all("""
+            SELECT 
+                tour.tournament_id, 
+                tour.tournament_name, 
+                tour.season_name,
+                COUNT(DISTINCT t.team_id) as team_count
+            FROM tournaments tour
+            LEFT JOIN teams t ON tour.tournament_id = t.tournament_id
+            WHERE tour.is_deleted = FALSE
+            GROUP BY tour.tournament_id, tour.tournament_name, tour.season_name
+            HAVING COUNT(DISTINCT t.team_id) > 0
+            ORDER BY tour.tournament_name
+        """)
+        
+        # Get available positions
+        positions = yield _all("""
+            SELECT DISTINCT position, COUNT(*) as count
+            FROM team_members
+            WHERE position IS NOT NULL
+            GROUP BY position
+            ORDER BY count DESC
+        """)
+        
+        # Get clubs with teams
+        clubs = yield _all("""
+            SELECT DISTINCT 
+                o.org_id,
+                o.org_name, 
+                COUNT(DISTINCT t.team_id) as team_count
+            FROM organisations o
+            JOIN teams t ON o.org_id = t.club_org_id
+            GROUP BY o.org_id, o.org_name
+            ORDER BY team_count DESC, o.org_name
+            LIMIT 100
+        """)
+        
+        return {
+            "success": True,
+            "tournaments": tournaments,
+            "positions": positions,
+            "clubs": clubs
+        }
+    
     # get teams with smart filtering
+    @query_plan("getting teams")
     def get_teams(self, tournament_id: Optional[int] = None, 
                 club_id: Optional[int] = None,
                 search: Optional[str] = None,
-                limit: int = 50) -> Dict[str, Any]:
-        """Get teams with smart filtering"""
-        db = self._get_fresh_db()
-        try:
-            query = """
-                SELECT DISTINCT 
-                    t.team_id,
-                    t.team_name,
-                    COALESCE(t.overridden_name, t.team_name) AS display_name,
-                    tour.tournament_name,
-                    tour.season_name,
-                    o.org_name AS org_name,
-                    t.club_org_id AS org_id,
-                    o.org_logo_base64 as logo,
-                    tour.tournament_id AS tournament_id,
-                    COUNT(tm.id) AS member_count,
-                    COUNT(CASE WHEN tm.member_type = 'Player' THEN 1 END) AS player_count
-                FROM teams t
-                LEFT JOIN tournaments tour ON t.tournament_id = tour.tournament_id
-                LEFT JOIN organisations o ON t.club_org_id = o.org_id
-                LEFT JOIN team_members tm ON t.team_id = tm.team_id
-                WHERE tour.is_deleted IS NOT TRUE
-            """
+                limit: int = 50,
+                cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get teams with smart filtering, one page at a time (pass next_cursor back for the next page)"""
+        # Sorted on teams' own columns, so idx_teams_keyset serves the order and the cursor
+        keyset = Keyset("teams", ("t.tournament_id", "COALESCE(t.team_name, '')", "t.team_id"))
+        query = f"""
+            SELECT 
+                t.team_id,
+                t.team_name,
+                COALESCE(t.overridden_name, t.team_name) AS display_name,
+                tour.tournament_name,
+                tour.season_name,
+                o.org_name AS org_name,
+                t.club_org_id AS org_id,
+                o.org_logo_base64 as logo,
+                tour.tournament_id AS tournament_id,
+                COALESCE(rc.member_count, 0) AS member_count,
+                COALESCE(rc.player_count, 0) AS player_count,
+                COALESCE(rc.staff_count, 0) AS staff_count,
+                rc.position_counts
+                {keyset.select()}
+            FROM teams t
+            LEFT JOIN tournaments tour ON t.tournament_id = tour.tournament_id
+            LEFT JOIN organisations o ON t.club_org_id = o.org_id
+            -- Counted at ingest, see TeamMemberService.save_roster_plan
+            LEFT JOIN team_roster_counts rc ON t.team_id = rc.team_id
+            WHERE tour.is_deleted IS NOT TRUE
+        """
+        
+        params = {}
+        
+        if tournament_id:
+            query += " AND t.tournament_id = :tournament_id"
+            params["tournament_id"] = tournament_id
             
-            params = {}
+        if club_id:
+            query += " AND t.club_org_id = :club_id"
+            params["club_id"] = club_id
             
-            if tournament_id:
-                query += " AND t.tournament_id = :tournament_id"
-                params["tournament_id"] = tournament_id
-                
-            if club_id:
-                query += " AND t.club_org_id = :club_id"
-                params["club_id"] = club_id
-                
-            if search:
-                query += " AND (t.team_name ILIKE :search OR t.overridden_name ILIKE :search OR o.org_name ILIKE :search)"
-                params["search"] = f"%{search}%"
-            
-            query += """
-                GROUP BY t.team_id, t.team_name, t.overridden_name, o.org_logo_base64,
-                        tour.tournament_name, tour.season_name, o.org_name, t.club_org_id, tour.tournament_id
-                ORDER BY tour.tournament_name, t.team_name
-                LIMIT :limit
-            """
-            params["limit"] = limit
-            
-            result = db.execute(text(query), params)
-            teams = [dict(row._mapping) for row in result.fetchall()]
-            
-            return {
-                "success": True,
-                "data": teams,
-                "count": len(teams),
-                "filters_applied": {
-                    "tournament_id": tournament_id,
-                    "club_id": club_id,
-                    "search": search
-                }
+        if search:
+            query += f" AND ({name_search.contains(name_search.team_name('t'))} OR {name_search.contains(name_search.club_name('o'))})"
+            params["search"] = search
+        
+        query += keyset.after(cursor, params)
+        query += f" {keyset.order_by()} LIMIT :limit"
+        params["limit"] = limit + 1
+        
+        teams, next_cursor = keyset.page((yield _all(query, params)), limit)
+        
+        return {
+            "success": True,
+            "data": teams,
+            "count": len(teams),
+            "next_cursor": next_cursor,
+            "filters_applied": {
+                "tournament_id": tournament_id,
+                "club_id": club_id,
+                "search": search
             }
-            
-        except Exception as e:
-            logger.error(f"Error getting teams: {e}")
-            return {"success": False, "error": str(e)}
-        finally:
-            db.close()
+        }
 
     # get players with smart filters and images
+    @query_plan("getting players")
     def get_players(self, team_id: Optional[int] = None,
                 position: Optional[str] = None,
                 tournament_id: Optional[int] = None,
                 club_id: Optional[int] = None,
                 search: Optional[str] = None,
-                limit: int = 100) -> Dict[str, Any]:
-        """Get players with smart filters and images"""
-        db = self._get_fresh_db()
-        try:
-            query = """
-                SELECT DISTINCT
-                    tm.id,
-                    tm.person_id,
-                    tm.first_name,
-                    tm.last_name,
-                    tm.position,
-                    tm.number,
-                    tm.height,
-                    tm.member_type,
-                    tm.nationality,
-                    tm.birth_date,
-                    tm.gender,
-                    t.team_name,
-                    COALESCE(t.overridden_name, t.team_name) AS team_display_name,
-                    o.org_name as club_name,
-                    tcd.image_object_key,
-                    tcd.image2_object_key,
-                    t.team_id as team_id,
-                    o.org_id as org_id
-                FROM team_members tm
-                LEFT JOIN teams t ON tm.team_id = t.team_id
-                LEFT JOIN organisations o ON t.club_org_id = o.org_id
-                LEFT JOIN team_member_custom_data tcd ON tm.person_id = tcd.person_id
-                WHERE tm.member_type = 'Player'
-            """
-            
-            params = {}
+                limit: int = 100,
+                cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get players with smart filters and images, one page at a time (pass next_cursor back for the next page)"""
+        # A team can play in several tournaments, so a member row can appear once per tournament;
+        # idx_team_members_players_keyset covers (person_id, id), the tournament only breaks ties
+        keyset = Keyset("players", ("tm.person_id", "tm.id", "COALESCE(t.tournament_id, 0)"), index_prefix=2)
+        query = f"""
+            SELECT
+                tm.id,
+                tm.person_id,
+                tm.first_name,
+                tm.last_name,
+                tm.position,
+                tm.number,
+                tm.height,
+                tm.member_type,
+                tm.nationality,
+                tm.birth_date,
+                tm.gender,
+                t.team_name,
+                COALESCE(t.overridden_name, t.team_name) AS team_display_name,
+                o.org_name as club_name,
+                p.image_object_key,
+                p.image2_object_key,
+                t.team_id as team_id,
+                t.tournament_id,
+                o.org_id as org_id
+                {keyset.select()}
+            FROM team_members tm
+            LEFT JOIN teams t ON tm.team_id = t.team_id
+            LEFT JOIN organisations o ON t.club_org_id = o.org_id
+            LEFT JOIN persons p ON tm.person_id = p.person_id
+            WHERE tm.member_type = 'Player'
+        """
+        
+        params = {}
+        
+        if team_id:
+            query += " AND tm.team_id = :team_id"
+            params["team_id"] = team_id
             
-            if team_id:
-                query += " AND tm.team_id = :team_id"
-                params["team_id"] = team_id
-                
-            if position:
-                query += " AND tm.position = :position"
-                params["position"] = position
-                
-            if tournament_id:
-                query += " AND t.tournament_id = :tournament_id"
-                params["tournament_id"] = tournament_id
-                
-            if club_id:
-                query += " AND t.club_org_id = :club_id"
-                params["club_id"] = club_id
-                
-            if search:
-                query += " AND (tm.first_name ILIKE :search OR tm.last_name ILIKE :search)"
-                params["search"] = f"%{search}%"
+        if position:
+            query += " AND tm.position = :position"
+            params["position"] = position
             
-            query += " ORDER BY tm.person_id LIMIT :limit"
-            params["limit"] = limit
+        if tournament_id:
+            query += " AND t.tournament_id = :tournament_id"
+            params["tournament_id"] = tournament_id
             
-            result = db.execute(text(query), params)
-            players = [dict(row._mapping) for row in result.fetchall()]
+        if club_id:
+            query += " AND t.club_org_id = :club_id"
+            params["club_id"] = club_id
             
-            return {
-                "success": True,
-                "data": players,
-                "count": len(players),
-                "filters_applied": {
-                    "team_id": team_id,
-                    "position": position,
-                    "tournament_id": tournament_id,
-                    "club_id": club_id,
-                    "search": search
-                }
+        if search:
+            query += f" AND {name_search.contains(name_search.player_name('tm'))}"
+            params["search"] = search
+        
+        query += keyset.after(cursor, params)
+        query += f" {keyset.order_by()} LIMIT :limit"
+        params["limit"] = limit + 1
+        
+        players, next_cursor = keyset.page((yield _all(query, params)), limit)
+        
+        return {
+            "success": True,
+            "data": players,
+            "count": len(players),
+            "next_cursor": next_cursor,
+            "filters_applied": {
+                "team_id": team_id,
+                "position": position,
+                "tournament_id": tournament_id,
+                "club_id": club_id,
+                "search": search
             }
-            
-        except Exception as e:
-            logger.error(f"Error getting players: {e}")
-            return {"success": False, "error": str(e)}
-        finally:
-            db.close()
+        }
+
+
+    # search players, teams and clubs by name
+    @query_plan("searching names")
+    def search_names(self, q: str, limit: int = 10) -> Dict[str, Any]:
+        """
+        Fuzzy, accent-insensitive name search ranked by similarity to q.
+        Matches whole words or parts of them, so "sondre bjorn" finds "Bjørn Søndre".
+        """
+        params = {"q": q, "limit": limit}
+
+        players = yield _all(f"""
+            SELECT person_id, first_name, last_name, position, team_id, score
+            FROM (
+                SELECT DISTINCT ON (tm.person_id)
+                    tm.person_id, tm.first_name, tm.last_name, tm.position, tm.team_id,
+                    word_similarity(normalize_name(:q), {name_search.player_name('tm')}) AS score
+                FROM team_members tm
+                WHERE normalize_name(:q) <% {name_search.player_name('tm')}
+                  AND tm.member_type = 'Player'
+                ORDER BY tm.person_id, tm.updated_at DESC NULLS LAST
+            ) matches
+            ORDER BY score DESC, last_name, first_name
+            LIMIT :limit
+        """, params)
+
+        teams = yield _all(f"""
+            SELECT team_id, team_name, display_name, club_org_id, tournament_id, score
+            FROM (
+                SELECT DISTINCT ON (t.team_id)
+                    t.team_id, t.team_name, COALESCE(t.overridden_name, t.team_name) AS display_name,
+                    t.club_org_id, t.tournament_id,
+                    word_similarity(normalize_name(:q), {name_search.team_name('t')}) AS score
+                FROM teams t
+                WHERE normalize_name(:q) <% {name_search.team_name('t')}
+                ORDER BY t.team_id, t.tournament_id DESC
+            ) matches
+            ORDER BY score DESC, team_name
+            LIMIT :limit
+        """, params)
+
+        clubs = yield _all(f"""
+            SELECT o.org_id, o.org_name, o.org_logo_base64 AS logo,
+                word_similarity(normalize_name(:q), {name_search.club_name('o')}) AS score
+            FROM organisations o
+            WHERE normalize_name(:q) <% {name_search.club_name('o')}
+            ORDER BY score DESC, o.org_name
+            LIMIT :limit
+        """, params)
 
+        return {
+            "success": True,
+            "query": q,
+            "players": players,
+            "teams": teams,
+            "clubs": clubs
+        }
 
     # get standings for a specific tournament
-    def get_tournament_standings(self, tournament_id: int) -> Dict[str, Any]:
-        """Get standings for a specific tournament"""
-        db = self._get_fresh_db()
-        try:
-            query = """
-                SELECT distinct
-                    s.id,
-                    s.tournament_id,
-                    s.team_id,
-                    s.team_name,
-                    s.overridden_name,
-                    COALESCE(s.overridden_name, s.team_name) AS display_name,
-                    s.position,
-                    s.entry_id,
-                    
-                    -- Match stats
-                    s.matches_played,
-                    s.matches_home,
-                    s.matches_away,
-                    
-                    -- Points
-                    s.points,
-                    s.points_home,
-                    s.points_away,
-                    s.points_start,
-                    s.total_points,
-                    
-                    -- Victories
-                    s.victories,
-                    s.victories_home,
-                    s.victories_away,
-                    s.victories_fulltime_total,
-                    s.victories_fulltime_home,
-                    s.victories_fulltime_away,
-                    s.victories_overtime_total,
-                    s.victories_overtime_home,
-                    s.victories_overtime_away,
-                    s.victories_penalties_total,
-                    s.victories_penalties_home,
-                    s.victories_penalties_away,
-                    
-                    -- Draws
-                    s.draws,
-                    s.draws_home,
-                    s.draws_away,
-                    
-                    -- Losses
-                    s.losses,
-                    s.losses_home,
-                    s.losses_away,
-                    s.losses_fulltime_total,
-                    s.losses_fulltime_home,
-                    s.losses_fulltime_away,
-                    s.losses_overtime_total,
-                    s.losses_overtime_home,
-                    s.losses_overtime_away,
-                    s.losses_penalties_total,
-                    s.losses_penalties_home,
-                    s.losses_penalties_away,
-                    
-                    -- Goals
-                    s.goals_scored,
-                    s.goals_scored_home,
-                    s.goals_scored_away,
-                    s.goals_conceded,
-                    s.goals_conceded_home,
-                    s.goals_conceded_away,
-                    s.goals_diff,
-                    s.goals_ratio,
-                    
-                    -- Penalty minutes
-                    s.penalty_minutes,
-                    
-                    -- Records
-                    s.home_record,
-                    s.away_record,
-                    
-                    -- Formatted strings
-                    s.goals_home_formatted,
-                    s.goals_away_formatted,
-                    s.total_goals_formatted,
-                    
-                    -- Additional fields
-                    s.team_penalty,
-                    s.team_penalty_negative,
-                    s.team_penalty_positive,
-                    s.dispensation,
-                    s.team_entry_status,
-                    
-                    -- Metadata
-                    s.created_at,
-                    s.updated_at,
-
-                    -- logo
-                    o.org_logo_base64
-                FROM standings s
-                JOIN teams t ON t.team_id = s.team_id
-                JOIN organisations o ON t.club_org_id = o.org_id
-                WHERE s.tournament_id = :tournament_id
-                ORDER BY s.position ASC
-            """
-            
-            result = db.execute(text(query), {"tournament_id": tournament_id})
-            standings = [dict(row._mapping) for row in result.fetchall()]
-            
-            # Get tournament info
-            tournament_info = db.execute(text("""
-                SELECT tournament_name, season_name, tournament_type
-                FROM tournaments 
+    @query_plan("getting standings")
+    def get_tournament_standings(self, tournament_id: int,
+                                 fields: Sequence[str] = STANDING_VIEWS["full"]) -> Dict[str, Any]:
+        """Get standings for a specific tournament, with the columns named in fields (see standing_fields)"""
+        columns = ",\n                ".join(f"{STANDING_COLUMNS[name]} AS {name}" for name in fields)
+        # standings holds one row per (tournament_id, team_id); teams is joined on its whole key
+        query = f"""
+            SELECT
+                {columns}
+            FROM standings s
+            LEFT JOIN teams t ON t.team_id = s.team_id AND t.tournament_id = s.tournament_id
+            LEFT JOIN organisations o ON t.club_org_id = o.org_id
+            WHERE s.tournament_id = :tournament_id
+            ORDER BY s.position ASC, s.team_id
+        """
+        
+        standings = yield _all(query, {"tournament_id": tournament_id})
+        
+        # Get tournament info
+        tournament_info = yield _one("""
+            SELECT tournament_name, season_name, tournament_type
+            FROM tournaments 
+            WHERE tournament_id = :tournament_id
+        """, {"tournament_id": tournament_id})
+        
+        return {
+            "success": True,
+            "tournament": tournament_info or {},
+            "standings": standings,
+            "count": len(standings)
+        }
+
+    @query_plan("computing standings")
+    def get_computed_standings(self, tournament_id: int, rules: Optional[PointRules] = None,
+                               compare: bool = False) -> Dict[str, Any]:
+        """
+        Standings of a tournament computed from its matches (see standings_engine),
+        in the shape of get_tournament_standings. With compare, also where they
+        differ from the stored upstream table.
+        """
+        matches = yield _all("""
+            SELECT hometeam_id, awayteam_id, hometeam, awayteam,
+                   hometeam_overridden_name, awayteam_overridden_name,
+                   home_goals, away_goals, match_end_result
+            FROM matches
+            WHERE tournament_id = :tournament_id
+        """, {"tournament_id": tournament_id})
+        rules = rules or DEFAULT_POINT_RULES
+        standings = compute_standings(matches, rules, tournament_id)
+        for row in standings:
+            row["display_name"] = row["overridden_name"] or row["team_name"]
+
+        tournament_info = yield _one("""
+            SELECT tournament_name, season_name, tournament_type
+            FROM tournaments
+            WHERE tournament_id = :tournament_id
+        """, {"tournament_id": tournament_id})
+
+        result = {
+            "success": True,
+            "tournament": tournament_info or {},
+            "point_rules": rules._asdict(),
+            "standings": standings,
+            "count": len(standings)
+        }
+        if compare:
+            stored = yield _all(f"""
+                SELECT team_id, {", ".join(CHECK_COLUMNS)}
+                FROM standings
                 WHERE tournament_id = :tournament_id
-            """), {"tournament_id": tournament_id}).fetchone()
-            
-            return {
-                "success": True,
-                "tournament": dict(tournament_info._mapping) if tournament_info else {},
-                "standings": standings,
-                "count": len(standings)
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting standings: {e}")
-            return {"success": False, "error": str(e)}
-        finally:
-            db.close()
+            """, {"tournament_id": tournament_id})
+            result["differences"] = standings_differences(standings, stored)
+        return result
+
+    @query_plan("getting standings history")
+    def get_standings_history(self, tournament_id: int, team_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        The table after every round of a tournament (see standings_history), as one
+        series per team for position-over-time charts; with team_id, that team's only.
+        """
+        history = yield _one("""
+            SELECT rounds, teams, series, point_rules, updated_at
+            FROM standings_history
+            WHERE tournament_id = :tournament_id
+        """, {"tournament_id": tournament_id})
+
+        tournament_info = yield _one("""
+            SELECT tournament_name, season_name, tournament_type
+            FROM tournaments
+            WHERE tournament_id = :tournament_id
+        """, {"tournament_id": tournament_id})
+
+        rounds, teams, series = [], [], {}
+        if history:
+            rounds, teams, series = (_json_value(history[name]) for name in ("rounds", "teams", "series"))
+            if team_id is not None:
+                keep = [i for i, team in enumerate(teams) if team["team_id"] == team_id]
+                teams = [teams[i] for i in keep]
+                series = {name: [values[i] for i in keep] for name, values in series.items()}
+
+        return {
+            "success": True,
+            "tournament": tournament_info or {},
+            "rounds": rounds,
+            "teams": teams,
+            "series": series,
+            "updated_at": history["updated_at"] if history else None
+        }
+
+    @query_plan("getting head-to-head")
+    def get_head_to_head(self, team_id: int, opponent_id: int, recent: int = 5) -> Dict[str, Any]:
+        """
+        Record of team_id against opponent_id across every tournament they met in,
+        per tournament and in total, and their latest meetings; one primary key
+        range of head_to_head, whichever of the two teams asks.
+        """
+        low, high = min(team_id, opponent_id), max(team_id, opponent_id)
+        pairs = yield _all("""
+            SELECT *
+            FROM head_to_head
+            WHERE team_low_id = :low AND team_high_id = :high
+            ORDER BY last_match_date DESC NULLS LAST, tournament_id DESC
+        """, {"low": low, "high": high})
+
+        # Rows count from the lower team_id's side; turn them to team_id's
+        side, other = ("team_low", "team_high") if team_id == low else ("team_high", "team_low")
+        total = {"games": 0, "wins": 0, "draws": 0, "losses": 0, "goals_for": 0, "goals_against": 0}
+        tournaments, meetings = [], []
+        for pair in pairs:
+            record = {"games": pair["games"], "wins": pair[f"{side}_wins"], "draws": pair["draws"],
+                      "losses": pair[f"{other}_wins"], "goals_for": pair[f"{side}_goals"],
+                      "goals_against": pair[f"{other}_goals"]}
+            for name, value in record.items():
+                total[name] += value
+            tournaments.append({"tournament_id": pair["tournament_id"], "tournament_name": pair["tournament_name"],
+                                "season_id": pair["season_id"], **record, "last_match_date": pair["last_match_date"]})
+            meetings.extend(_json_value(pair["recent"]) or [])
+        meetings.sort(key=lambda m: (m["match_date"] or "", m["match_id"]), reverse=True)
+
+        return {
+            "success": True,
+            "team": {"team_id": team_id, "team_name": pairs[0][f"{side}_name"] if pairs else None},
+            "opponent": {"team_id": opponent_id, "team_name": pairs[0][f"{other}_name"] if pairs else None},
+            "record": total,
+            "tournaments": tournaments,
+            "recent_meetings": meetings[:recent]
+        }
+
+    @query_plan("getting team form")
+    def get_team_form(self, tournament_id: int, team_id: int) -> Dict[str, Any]:
+        """Rolling form of a team in a tournament (see team_form): one primary key lookup"""
+        form = yield _one("""
+            SELECT *
+            FROM team_form
+            WHERE tournament_id = :tournament_id AND team_id = :team_id
+        """, {"tournament_id": tournament_id, "team_id": team_id})
+        if form:
+            form["trend"] = _json_value(form["trend"])
+
+        return {
+            "success": True,
+            "form": form or {}
+        }
 
 
     # get interesting insights about the data, like small stats and summaries
+    # (aggregates come from the materialized views refreshed after each ingest, see src/utils/materialized_views.py)
+    @query_plan("getting insights")
     def get_insights_summary(self) -> Dict[str, Any]:
         """Get interesting insights about the data"""
-        db = self._get_fresh_db()
-        try:
-            # Total counts 
-            totals = db.execute(text("""
-                SELECT 
-                    (SELECT COUNT(*) FROM teams t JOIN tournaments tour ON t.tournament_id = tour.tournament_id WHERE tour.is_deleted = FALSE) as teams,
-                    (SELECT COUNT(*) FROM team_members WHERE member_type = 'Player') as players,
-                    (SELECT COUNT(*) FROM tournaments WHERE is_deleted = FALSE) as tournaments,
-                    (SELECT COUNT(*) FROM organisations) as clubs
-            """)).fetchone()
-            
-            # Most common positions 
-            top_positions = db.execute(text("""
-                SELECT position, COUNT(*) as count
-                FROM team_members
-                WHERE position IS NOT NULL AND member_type = 'Player'
-                GROUP BY position
-                ORDER BY count DESC
-                LIMIT 6
-            """)).fetchall()
-            
-            # Biggest tournaments by team count
-            biggest_tournaments = db.execute(text("""
-                SELECT 
-                    tour.tournament_name, 
-                    tour.season_name,
-                    COUNT(t.team_id) as team_count
-                FROM tournaments tour
-                JOIN teams t ON tour.tournament_id = t.tournament_id
-                WHERE tour.is_deleted = FALSE
-                GROUP BY tour.tournament_id, tour.tournament_name, tour.season_name
-                ORDER BY team_count DESC
-                LIMIT 5
-            """)).fetchall()
-            
-            # Clubs with most teams
-            biggest_clubs = db.execute(text("""
-                SELECT 
-                    o.org_name,
-                    COUNT(DISTINCT t.team_id) as team_count,
-                    COUNT(DISTINCT t.tournament_id) as tournament_count,
-					o.org_logo_base64
-                FROM organisations o
-                JOIN teams t ON o.org_id = t.club_org_id
-                JOIN tournaments tour ON t.tournament_id = tour.tournament_id
-                WHERE tour.is_deleted = FALSE
-                GROUP BY o.org_id, o.org_name
-                ORDER BY team_count DESC
-                LIMIT 5
-            """)).fetchall()
-            
-     # Top scorers across all tournaments
-            top_scorers_overall = db.execute(text("""
-                SELECT 
-                    ps.first_name,
-                    ps.last_name,
-                    ps.team_name,
-                    ps.scoring_points as points,
-                    ps.goals_scored,
-                    ps.assists,
-                    t.tournament_name
-                FROM player_statistics ps
-                LEFT JOIN tournaments t ON ps.tournament_id = t.tournament_id
-                WHERE t.is_deleted IS NOT TRUE
-                ORDER BY ps.scoring_points DESC
-                LIMIT 5
-            """)).fetchall()
-            
-            return {
-                "success": True,
-                "totals": dict(totals._mapping) if totals else {},
-                "top_positions": [dict(row._mapping) for row in top_positions],
-                "biggest_tournaments": [dict(row._mapping) for row in biggest_tournaments],
-                "biggest_clubs": [dict(row._mapping) for row in biggest_clubs],
-                "top_scorers": [dict(row._mapping) for row in top_scorers_overall]  # ADD this
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting insights: {e}")
-            return {"success": False, "error": str(e)}
-        finally:
-            db.close()
+        # Total counts 
+        totals = yield _one("""
+            SELECT teams, players, tournaments, clubs
+            FROM readonly.mv_league_totals
+        """)
+        
+        # Most common positions 
+        top_positions = yield _all("""
+            SELECT position, count
+            FROM readonly.mv_roster_positions
+            ORDER BY count DESC
+            LIMIT 6
+        """)
+        
+        # Biggest tournaments by team count
+        biggest_tournaments = yield _all("""
+            SELECT tournament_name, season_name, team_count
+            FROM readonly.mv_tournament_team_counts
+            ORDER BY team_count DESC
+            LIMIT 5
+        """)
+        
+        # Clubs with most teams
+        biggest_clubs = yield _all("""
+            SELECT org_name, team_count, tournament_count, org_logo_base64
+            FROM readonly.mv_club_team_counts
+            ORDER BY team_count DESC
+            LIMIT 5
+        """)
+        
+        # Top scorers across all tournaments
+        top_scorers_overall = yield _all("""
+            SELECT 
+                first_name,
+                last_name,
+                team_name,
+                scoring_points as points,
+                goals_scored,
+                assists,
+                tournament_name
+            FROM readonly.mv_player_leaderboard
+            WHERE NOT tournament_is_deleted
+            ORDER BY scoring_points DESC, goals_scored DESC
+            LIMIT 5
+        """)
+        
+        return {
+            "success": True,
+            "totals": totals or {},
+            "top_positions": top_positions,
+            "biggest_tournaments": biggest_tournaments,
+            "biggest_clubs": biggest_clubs,
+            "top_scorers": top_scorers_overall  # ADD this
+        }
 
 
     ######## tournament player statistics ########
     # src/services/hockey_analytics.py
+    @query_plan("getting player stats")
     def get_tournament_player_stats(self, tournament_id: int, 
                                 stat_type: str = "points",
-                                limit: int = 20) -> Dict[str, Any]:
-        """Get player statistics for a tournament"""
-        db = self._get_fresh_db()
-        try:
-            # Determine ordering based on stat_type
-            order_columns = {
-                "points": "ps.scoring_points DESC, ps.goals_scored DESC",
-                "goals": "ps.goals_scored DESC, ps.scoring_points DESC", 
-                "assists": "ps.assists DESC, ps.scoring_points DESC",
-                "plus_minus": "ps.plus_minus DESC",
-                "pim": "ps.pim DESC",
-                "shots": "ps.shots DESC",
-                "rank": "ps.rank ASC"
-            }
-
-            order_by = order_columns.get(stat_type, "ps.rank ASC")
-
+                                limit: int = 20,
+                                cursor: Optional[str] = None,
+                                snapshot: Optional["LeaderboardSnapshot"] = None) -> Dict[str, Any]:
+        """
+        Get player statistics for a tournament, one page at a time (pass next_cursor back for the next page).
+        Answered from snapshot, when given, instead of the database.
+        """
+        keyset = _leaderboard_keyset("tournament_players", stat_type, default="rank")
+        tournament_info = None
+        if snapshot is not None:
+            stats, next_cursor = snapshot.page(keyset, cursor, limit, TOURNAMENT_PLAYER_FIELDS,
+                                               tournament_id=tournament_id)
+            tournament_info = snapshot.tournaments.get(tournament_id)
+        else:
+            params = {"tournament_id": tournament_id, "limit": limit + 1}
+            after = keyset.after(cursor, params)
             query = f"""
-                SELECT 
-                    ps.id,
-                    ps.person_id,
-                    ps.first_name,
-                    ps.last_name,
-                    ps.team_name,
-                    ps.team_short_name,
-                    ps.position,
-                    ps.rank,
-                    ps.games_played,
-                    ps.goals_scored,
-                    ps.assists,
-                    ps.scoring_points,
-                    ps.plus_minus,
-                    ps.pim,
-                    ps.power_play_goals,
-                    ps.power_play_goal_assists,
-                    ps.short_handed_goals,
-                    ps.short_handed_goal_assists,
-                    ps.gwg,
-                    ps.shots,
-                    ps.shots_pct,
-                    ps.face_offs,
-                    ps.faceoffs_win_pct,
-                    ps.org_id,
-                    -- Player demographics
-                    tm.birth_date,
-                    tm.gender,
-                    tm.nationality,
-                    -- Images
-                    tcd.image_object_key,
-                    tcd.image2_object_key
-                FROM player_statistics ps
-                LEFT JOIN team_members tm ON ps.person_id = tm.person_id
-                LEFT JOIN team_member_custom_data tcd ON ps.person_id = tcd.person_id
-                WHERE ps.tournament_id = :tournament_id
-                ORDER BY {order_by}
+                SELECT {_leaderboard_columns(TOURNAMENT_PLAYER_FIELDS)}
+                    {keyset.select()}
+                FROM readonly.mv_player_leaderboard ps
+                WHERE ps.tournament_id = :tournament_id{after}
+                {keyset.order_by()}
                 LIMIT :limit
             """
-            
-            result = db.execute(text(query), {
-                "tournament_id": tournament_id,
-                "limit": limit
-            })
-            stats = [dict(row._mapping) for row in result.fetchall()]
-            
-            # Get tournament info
-            tournament_info = db.execute(text("""
+            stats, next_cursor = keyset.page((yield _all(query, params)), limit)
+        
+        # Get tournament info
+        if tournament_info is None:
+            tournament_info = yield _one("""
                 SELECT tournament_name, season_name, tournament_type
                 FROM tournaments 
                 WHERE tournament_id = :tournament_id
-            """), {"tournament_id": tournament_id}).fetchone()
-            
-            return {
-                "success": True,
-                "tournament": dict(tournament_info._mapping) if tournament_info else {},
-                "stat_type": stat_type,
-                "data": stats,
-                "count": len(stats)
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting player stats: {e}")
-            return {"success": False, "error": str(e)}
-        finally:
-            db.close()
+            """, {"tournament_id": tournament_id})
+        
+        return {
+            "success": True,
+            "tournament": tournament_info or {},
+            "stat_type": stat_type,
+            "data": stats,
+            "count": len(stats),
+            "next_cursor": next_cursor
+        }
 
+    @query_plan("getting top scorers")
     def get_top_scorers_overall(self, stat_type: str = "points", 
                             position: Optional[str] = None,
-                            limit: int = 50) -> Dict[str, Any]:
-        """Get top scorers across all tournaments"""
-        db = self._get_fresh_db()
-        try:
-            # Determine ordering based on stat_type
-            order_columns = {
-                "points": "ps.scoring_points DESC, ps.goals_scored DESC",
-                "goals": "ps.goals_scored DESC, ps.scoring_points DESC", 
-                "assists": "ps.assists DESC, ps.scoring_points DESC",
-                "pim": "ps.pim DESC",
-                "shots": "ps.shots DESC",
-                "saves": "ps.shots_pct DESC",
-                "faceoffs": "ps.faceoffs_win_pct DESC"
-            }
-            
-            order_by = order_columns.get(stat_type, "ps.scoring_points DESC, ps.goals_scored DESC")
-            
+                            limit: int = 50,
+                            cursor: Optional[str] = None,
+                            snapshot: Optional["LeaderboardSnapshot"] = None) -> Dict[str, Any]:
+        """
+        Get top scorers across all tournaments, one page at a time (pass next_cursor back for the next page).
+        Answered from snapshot, when given, instead of the database.
+        """
+        keyset = _leaderboard_keyset("top_scorers", stat_type, default="points")
+        if snapshot is not None:
+            stats, next_cursor = snapshot.page(keyset, cursor, limit, TOP_SCORER_FIELDS,
+                                               position=position, exclude_deleted=True)
+        else:
             query = f"""
-                SELECT 
-                    ps.id,
-                    ps.person_id,
-                    ps.first_name,
-                    ps.last_name,
-                    ps.team_name,
-                    ps.team_short_name,
-                    ps.position,
-                    ps.rank,
-                    ps.games_played,
-                    ps.goals_scored,
-                    ps.assists,
-                    ps.scoring_points,
-                    ps.plus_minus,
-                    ps.pim,
-                    ps.power_play_goals,
-                    ps.power_play_goal_assists,
-                    ps.short_handed_goals,
-                    ps.short_handed_goal_assists,
-                    ps.gwg,
-                    ps.shots,
-                    ps.shots_pct,
-                    ps.face_offs,
-                    ps.faceoffs_win_pct,
-                    ps.org_id,
-                    ps.tournament_id,
-                    -- Tournament info
-                    t.tournament_name,
-                    t.season_name,
-                    -- Player demographics
-                    tm.birth_date,
-                    tm.gender,
-                    tm.nationality,
-                    -- Images
-                    tcd.image_object_key,
-                    tcd.image2_object_key,
-                    tcd.original_image_url,
-                    tcd.original_image2_url
-                FROM player_statistics ps
-                LEFT JOIN tournaments t ON ps.tournament_id = t.tournament_id
-                LEFT JOIN team_members tm ON ps.person_id = tm.person_id
-                LEFT JOIN team_member_custom_data tcd ON ps.person_id = tcd.person_id
-                WHERE t.is_deleted IS NOT TRUE
+                SELECT {_leaderboard_columns(TOP_SCORER_FIELDS)}
+                    {keyset.select()}
+                FROM readonly.mv_player_leaderboard ps
+                WHERE NOT ps.tournament_is_deleted
             """
             
-            params = {"limit": limit}
+            params = {"limit": limit + 1}
             
             if position:
                 query += " AND ps.position = :position"
                 params["position"] = position
                 
-            query += f" ORDER BY {order_by} LIMIT :limit"
-            
-            result = db.execute(text(query), params)
-            stats = [dict(row._mapping) for row in result.fetchall()]
+            query += keyset.after(cursor, params)
+            query += f" {keyset.order_by()} LIMIT :limit"
             
-            return {
-                "success": True,
-                "stat_type": stat_type,
-                "position_filter": position,
-                "data": stats,
-                "count": len(stats)
+            stats, next_cursor = keyset.page((yield _all(query, params)), limit)
+        
+        return {
+            "success": True,
+            "stat_type": stat_type,
+            "position_filter": position,
+            "data": stats,
+            "count": len(stats),
+            "next_cursor": next_cursor
+        }
+
+    @query_plan("getting player percentiles")
+    def get_player_percentiles(self, person_id: int, tournament_id: Optional[int] = None,
+                               cohort: str = "tournament_position",
+                               stats: Sequence[str] = tuple(PERCENTILE_STATS)) -> Dict[str, Any]:
+        """
+        Rank and percentile of a player's stats within a cohort (see PERCENTILE_COHORTS),
+        per tournament they played, or only for tournament_id. Read from the precomputed
+        readonly.mv_player_percentiles, so this is one indexed lookup. cohort_size
+        counts the players of the cohort; a stat's cohort_size only those with a
+        value for it, which are the ones it is ranked among.
+        """
+        columns = ", ".join(f"p.{stat}, p.{stat}_rank_{cohort}, p.{stat}_pct_{cohort}, p.{stat}_size_{cohort}"
+                            for stat in stats)
+        query = f"""
+            SELECT
+                p.tournament_id, p.tournament_name, p.season_name, p.class_name,
+                p.team_name, p.position, p.{cohort}_size AS cohort_size,
+                {columns}
+            FROM readonly.mv_player_percentiles p
+            WHERE p.person_id = :person_id
+        """
+        params = {"person_id": person_id}
+        if tournament_id:
+            query += " AND p.tournament_id = :tournament_id"
+            params["tournament_id"] = tournament_id
+        query += " ORDER BY p.season_id DESC, p.tournament_id"
+
+        rows = yield _all(query, params)
+        tournaments = []
+        for row in rows:
+            entry = {key: row[key] for key in ("tournament_id", "tournament_name", "season_name", "class_name",
+                                               "team_name", "position", "cohort_size")}
+            entry["stats"] = {
+                stat: {"value": row[stat], "rank": row[f"{stat}_rank_{cohort}"],
+                       "percentile": row[f"{stat}_pct_{cohort}"], "cohort_size": row[f"{stat}_size_{cohort}"]}
+                for stat in stats
             }
-            
-        except Exception as e:
-            logger.error(f"Error getting top scorers: {e}")
-            return {"success": False, "error": str(e)}
-        finally:
-            db.close()
+            tournaments.append(entry)
 
+        return {
+            "success": True,
+            "person_id": person_id,
+            "cohort": cohort,
+            "data": tournaments,
+            "count": len(tournaments)
+        }
+
+    @query_plan("getting player career stats")
     def get_player_career_stats(self, person_id: int) -> Dict[str, Any]:
         """Get career statistics for a specific player across all tournaments"""
-        db = self._get_fresh_db()
-        try:
-            # Individual tournament stats
-            tournament_stats = db.execute(text("""
-                SELECT 
-                    ps.tournament_id,
-                    t.tournament_name,
-                    t.season_name,
-                    ps.team_name,
-                    ps.team_short_name,
-                    ps.position,
-                    ps.rank,
-                    ps.games_played,
-                    ps.goals_scored,
-                    ps.assists,
-                    ps.scoring_points,
-                    ps.plus_minus,
-                    ps.pim,
-                    ps.power_play_goals,
-                    ps.power_play_goal_assists,
-                    ps.short_handed_goals,
-                    ps.short_handed_goal_assists,
-                    ps.gwg,
-                    ps.shots,
-                    ps.shots_pct,
-                    ps.face_offs,
-                    ps.faceoffs_win_pct,
-                    -- Player demographics
-                    tm.birth_date,
-                    tm.gender,
-                    tm.nationality
-                FROM player_statistics ps
-                LEFT JOIN tournaments t ON ps.tournament_id = t.tournament_id
-                LEFT JOIN team_members tm ON ps.person_id = tm.person_id
-                WHERE ps.person_id = :person_id
-                ORDER BY t.season_name DESC, ps.scoring_points DESC
-            """), {"person_id": person_id}).fetchall()
-            
-            # Career totals
-            career_totals = db.execute(text("""
-                SELECT 
-                    ps.first_name,
-                    ps.last_name,
-                    COUNT(DISTINCT ps.tournament_id) as tournaments_played,
-                    SUM(ps.games_played) as total_games,
-                    SUM(ps.goals_scored) as total_goals,
-                    SUM(ps.assists) as total_assists,
-                    SUM(ps.scoring_points) as total_points,
-                    SUM(ps.pim) as total_pim,
-                    SUM(ps.power_play_goals) as total_pp_goals,
-                    SUM(ps.power_play_goal_assists) as total_pp_assists,
-                    SUM(ps.short_handed_goals) as total_sh_goals,
-                    SUM(ps.short_handed_goal_assists) as total_sh_assists,
-                    SUM(ps.gwg) as total_gwg,
-                    SUM(ps.shots) as total_shots,
-                    CASE 
-                        WHEN SUM(ps.shots) > 0 THEN ROUND((SUM(ps.goals_scored)::decimal / SUM(ps.shots)) * 100, 2)
-                        ELSE 0 
-                    END as career_shot_pct,
-                    SUM(ps.face_offs) as total_faceoffs,
-                    -- Player demographics (take first non-null values)
-                    MAX(tm.birth_date) as birth_date,
-                    MAX(tm.gender) as gender,
-                    MAX(tm.nationality) as nationality,
-                    -- Images
-                    tcd.image_object_key,
-                    tcd.image2_object_key,
-                    tcd.original_image_url,
-                    tcd.original_image2_url
-                FROM player_statistics ps
-                LEFT JOIN team_members tm ON ps.person_id = tm.person_id
-                LEFT JOIN team_member_custom_data tcd ON ps.person_id = tcd.person_id
-                WHERE ps.person_id = :person_id
-                GROUP BY ps.person_id, ps.first_name, ps.last_name, 
-                        tcd.image_object_key, tcd.image2_object_key, 
-                        tcd.original_image_url, tcd.original_image2_url
-            """), {"person_id": person_id}).fetchone()
-            
-            return {
-                "success": True,
-                "player_info": dict(career_totals._mapping) if career_totals else {},
-                "tournament_stats": [dict(row._mapping) for row in tournament_stats],
-                "tournaments_count": len(tournament_stats)
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting player career stats: {e}")
-            return {"success": False, "error": str(e)}
-        finally:
-            db.close()
+        # Career totals, precomputed per person when statistics are saved (see PlayerCareerService)
+        career_totals = yield _one("""
+            SELECT
+                pc.person_id,
+                pc.first_name,
+                pc.last_name,
+                pc.tournaments_played,
+                pc.seasons_played,
+                pc.total_games,
+                pc.total_goals,
+                pc.total_assists,
+                pc.total_points,
+                pc.total_pim,
+                pc.total_pp_goals,
+                pc.total_pp_assists,
+                pc.total_sh_goals,
+                pc.total_sh_assists,
+                pc.total_gwg,
+                pc.total_shots,
+                pc.career_shot_pct,
+                pc.total_faceoffs,
+                pc.points_per_game,
+                pc.goals_per_game,
+                pc.assists_per_game,
+                pc.pim_per_game,
+                pc.seasons,
+                -- Player demographics
+                p.birth_date,
+                p.gender,
+                p.nationality,
+                p.height,
+                -- Images
+                p.image_object_key,
+                p.image2_object_key,
+                tcd.original_image_url,
+                tcd.original_image2_url
+            FROM player_careers pc
+            LEFT JOIN persons p ON pc.person_id = p.person_id
+            LEFT JOIN team_member_custom_data tcd ON pc.person_id = tcd.person_id
+            WHERE pc.person_id = :person_id
+        """, {"person_id": person_id})
+
+        # Individual tournament stats
+        tournament_stats = yield _all("""
+            SELECT 
+                ps.tournament_id,
+                t.tournament_name,
+                t.season_name,
+                ps.team_name,
+                ps.team_short_name,
+                ps.position,
+                ps.rank,
+                ps.games_played,
+                ps.goals_scored,
+                ps.assists,
+                ps.scoring_points,
+                ps.plus_minus,
+                ps.pim,
+                ps.power_play_goals,
+                ps.power_play_goal_assists,
+                ps.short_handed_goals,
+                ps.short_handed_goal_assists,
+                ps.gwg,
+                ps.shots,
+                ps.shots_pct,
+                ps.face_offs,
+                ps.faceoffs_win_pct
+            FROM player_statistics ps
+            LEFT JOIN tournaments t ON ps.tournament_id = t.tournament_id
+            WHERE ps.person_id = :person_id
+            ORDER BY t.season_name DESC, ps.scoring_points DESC
+        """, {"person_id": person_id})
+        demographics = {key: (career_totals or {}).get(key) for key in ("birth_date", "gender", "nationality")}
+        for row in tournament_stats:
+            row.update(demographics)
+        
+        return {
+            "success": True,
+            "player_info": career_totals or {},
+            "tournament_stats": tournament_stats,
+            "tournaments_count": len(tournament_stats)
+        }
 
 
  # src/services/hockey_analytics.py
+    @query_plan("getting player stats summary")
     def get_player_stats_summary(self, tournament_id: Optional[int] = None) -> Dict[str, Any]:
         """Get summary statistics about player performance"""
-        db = self._get_fresh_db()
-        try:
-            base_where = "WHERE t.is_deleted IS NOT TRUE"
-            params = {}
-            
-            if tournament_id:
-                base_where += " AND ps.tournament_id = :tournament_id"
-                params["tournament_id"] = tournament_id
-            
-            # Top performers by category - FIXED: Use scoring_points
-            top_scorers = db.execute(text(f"""
-                SELECT ps.first_name
-                , ps.last_name
-                , ps.team_name
-                , ps.scoring_points
-                , ps.goals_scored
-                , ps.assists
-                , tm.birth_date
-                , tm.gender
-                , tm.nationality
-                FROM player_statistics ps
-                LEFT JOIN team_members tm ON ps.person_id = tm.person_id
-                LEFT JOIN tournaments t ON ps.tournament_id = t.tournament_id
-                {base_where}
-                ORDER BY ps.scoring_points DESC
-                LIMIT 5
-            """), params).fetchall()
-            
-            # Top goal scorers - FIXED: Use scoring_points
-            top_goal_scorers = db.execute(text(f"""
-                SELECT ps.first_name
-                , ps.last_name
-                , ps.team_name
-                , ps.goals_scored
-                , ps.scoring_points
-                , ps.assists
-                , tm.birth_date
-                , tm.gender
-                , tm.nationality
-                FROM player_statistics ps
-                LEFT JOIN team_members tm ON ps.person_id = tm.person_id
-                LEFT JOIN tournaments t ON ps.tournament_id = t.tournament_id
-                {base_where}
-                ORDER BY ps.goals_scored DESC
-                LIMIT 5
-            """), params).fetchall()
-            
-            # Position breakdown - FIXED: Use scoring_points
-            position_stats = db.execute(text(f"""
-                SELECT 
-                    ps.position,
-                    COUNT(*) as player_count,
-                    AVG(ps.scoring_points) as avg_points,
-                    AVG(ps.goals_scored) as avg_goals,
-                    AVG(ps.assists) as avg_assists
-                FROM player_statistics ps
-                LEFT JOIN tournaments t ON ps.tournament_id = t.tournament_id
-                {base_where} AND ps.position IS NOT NULL
-                GROUP BY ps.position
-                ORDER BY avg_points DESC
-            """), params).fetchall()
-            
-            # Overall stats - FIXED: Use scoring_points
-            overall_stats = db.execute(text(f"""
-                SELECT 
-                    COUNT(DISTINCT ps.person_id) as unique_players,
-                    COUNT(*) as total_player_records,
-                    AVG(ps.scoring_points) as avg_points_per_player,
-                    AVG(ps.goals_scored) as avg_goals_per_player,
-                    AVG(ps.games_played) as avg_games_per_player,
-                    MAX(ps.scoring_points) as highest_points,
-                    MAX(ps.goals_scored) as highest_goals
-                FROM player_statistics ps
-                LEFT JOIN tournaments t ON ps.tournament_id = t.tournament_id
-                {base_where}
-            """), params).fetchone()
-            
-            return {
-                "success": True,
-                "tournament_id": tournament_id,
-                "overall_stats": dict(overall_stats._mapping) if overall_stats else {},
-                "top_scorers": [dict(row._mapping) for row in top_scorers],
-                "top_goal_scorers": [dict(row._mapping) for row in top_goal_scorers],
-                "position_breakdown": [dict(row._mapping) for row in position_stats]
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting player stats summary: {e}")
-            return {"success": False, "error": str(e)}
-        finally:
-            db.close()
+        base_where = "WHERE NOT ps.tournament_is_deleted"
+        # Totals and breakdowns are precomputed per tournament; 0 holds all tournaments
+        params = {"scope": 0}
+        
+        if tournament_id:
+            base_where += " AND ps.tournament_id = :tournament_id"
+            params = {"tournament_id": tournament_id, "scope": tournament_id}
+        
+        # Top performers by category - FIXED: Use scoring_points
+        top_scorers = yield _all(f"""
+            SELECT ps.first_name
+            , ps.last_name
+            , ps.team_name
+            , ps.scoring_points
+            , ps.goals_scored
+            , ps.assists
+            , ps.birth_date
+            , ps.gender
+            , ps.nationality
+            FROM readonly.mv_player_leaderboard ps
+            {base_where}
+            ORDER BY ps.scoring_points DESC, ps.goals_scored DESC
+            LIMIT 5
+        """, params)
+        
+        # Top goal scorers - FIXED: Use scoring_points
+        top_goal_scorers = yield _all(f"""
+            SELECT ps.first_name
+            , ps.last_name
+            , ps.team_name
+            , ps.goals_scored
+            , ps.scoring_points
+            , ps.assists
+            , ps.birth_date
+            , ps.gender
+            , ps.nationality
+            FROM readonly.mv_player_leaderboard ps
+            {base_where}
+            ORDER BY ps.goals_scored DESC, ps.scoring_points DESC
+            LIMIT 5
+        """, params)
+        
+        # Position breakdown - FIXED: Use scoring_points
+        position_stats = yield _all("""
+            SELECT position, player_count, avg_points, avg_goals, avg_assists
+            FROM readonly.mv_position_breakdown
+            WHERE tournament_id = :scope
+            ORDER BY avg_points DESC
+        """, params)
+        
+        # Overall stats - FIXED: Use scoring_points
+        overall_stats = yield _one("""
+            SELECT 
+                unique_players,
+                total_player_records,
+                avg_points_per_player,
+                avg_goals_per_player,
+                avg_games_per_player,
+                highest_points,
+                highest_goals
+            FROM readonly.mv_player_totals
+            WHERE tournament_id = :scope
+        """, params)
+        
+        return {
+            "success": True,
+            "tournament_id": tournament_id,
+            "overall_stats": overall_stats or {},
+            "top_scorers": top_scorers,
+            "top_goal_scorers": top_goal_scorers,
+            "position_breakdown": position_stats
+        }
 
     # ADD: The ranking analysis method
+    @query_plan("analyzing rankings")
     def analyze_tournament_ranking_system(self, tournament_id: int) -> Dict[str, Any]:
         """Analyze how rankings are determined in a tournament"""
-        db = self._get_fresh_db()
-        try:
-            # Get top 15 by official ranking
-            ranked_players = db.execute(text("""
-                SELECT 
-                    ps.rank,
-                    ps.person_id,
-                    ps.first_name,
-                    ps.last_name,
-                    ps.team_name,
-                    ps.games_played,
-                    ps.goals_scored,
-                    ps.assists,
-                    ps.scoring_points,
-                    ps.plus_minus,
-                    ps.pts as api_pts,
-                    CASE 
-                        WHEN ps.games_played > 0 THEN ROUND(ps.scoring_points::decimal / ps.games_played, 3)
-                        ELSE 0 
-                    END as points_per_game,
-                    ps.shots,
-                    ps.shots_pct,
-                    -- Player demographics
-                    tm.birth_date,
-                    tm.gender,
-                    tm.nationality
-                FROM player_statistics ps
-                LEFT JOIN team_members tm ON ps.person_id = tm.person_id
-                WHERE ps.tournament_id = :tournament_id
-                ORDER BY ps.rank ASC NULLS LAST
-                LIMIT 15
-            """), {"tournament_id": tournament_id}).fetchall()
-            
-            # Get top 10 by pure scoring points
-            points_leaders = db.execute(text("""
-                SELECT 
-                    ps.rank,
-                    ps.person_id,
-                    ps.first_name,
-                    ps.last_name,
-                    ps.scoring_points,
-                    ps.goals_scored,
-                    ps.assists,
-                    ps.games_played,
-                    -- Player demographics
-                    tm.birth_date,
-                    tm.gender,
-                    tm.nationality
-                FROM player_statistics ps
-                LEFT JOIN team_members tm ON ps.person_id = tm.person_id
-                WHERE ps.tournament_id = :tournament_id
-                ORDER BY ps.scoring_points DESC, ps.goals_scored DESC
-                LIMIT 10
-            """), {"tournament_id": tournament_id}).fetchall()
-            
-            return {
-                "success": True,
-                "tournament_id": tournament_id,
-                "official_rankings": [dict(row._mapping) for row in ranked_players],
-                "pure_points_leaders": [dict(row._mapping) for row in points_leaders],
-                "analysis": {
-                    "rank_1_player": dict(ranked_players[0]._mapping) if ranked_players else None,
-                    "points_leader": dict(points_leaders[0]._mapping) if points_leaders else None
-                }
+        # Get top 15 by official ranking
+        ranked_players = yield _all("""
+            SELECT 
+                ps.rank,
+                ps.person_id,
+                ps.first_name,
+                ps.last_name,
+                ps.team_name,
+                ps.games_played,
+                ps.goals_scored,
+                ps.assists,
+                ps.scoring_points,
+                ps.plus_minus,
+                ps.pts as api_pts,
+                CASE 
+                    WHEN ps.games_played > 0 THEN ROUND(ps.scoring_points::decimal / ps.games_played, 3)
+                    ELSE 0 
+                END as points_per_game,
+                ps.shots,
+                ps.shots_pct,
+                -- Player demographics
+                p.birth_date,
+                p.gender,
+                p.nationality
+            FROM player_statistics ps
+            LEFT JOIN persons p ON ps.person_id = p.person_id
+            WHERE ps.tournament_id = :tournament_id
+            ORDER BY ps.rank ASC NULLS LAST
+            LIMIT 15
+        """, {"tournament_id": tournament_id})
+        
+        # Get top 10 by pure scoring points
+        points_leaders = yield _all("""
+            SELECT 
+                ps.rank,
+                ps.person_id,
+                ps.first_name,
+                ps.last_name,
+                ps.scoring_points,
+                ps.goals_scored,
+                ps.assists,
+                ps.games_played,
+                -- Player demographics
+                p.birth_date,
+                p.gender,
+                p.nationality
+            FROM player_statistics ps
+            LEFT JOIN persons p ON ps.person_id = p.person_id
+            WHERE ps.tournament_id = :tournament_id
+            ORDER BY ps.scoring_points DESC, ps.goals_scored DESC
+            LIMIT 10
+        """, {"tournament_id": tournament_id})
+        
+        return {
+            "success": True,
+            "tournament_id": tournament_id,
+            "official_rankings": ranked_players,
+            "pure_points_leaders": points_leaders,
+            "analysis": {
+                "rank_1_player": ranked_players[0] if ranked_players else None,
+                "points_leader": points_leaders[0] if points_leaders else None
             }
-            
+        }
+
+
+class AsyncHockeyAnalytics(HockeyAnalytics):
+    """
+    Same queries as HockeyAnalytics on an AsyncSession, so route handlers
+    do not block the event loop while PostgreSQL works. Every method returns
+    a coroutine; the session is owned by the caller (see get_async_db).
+    """
+    def __init__(self, db: "AsyncSession"):
+        self.db = db
+
+    async def _run(self, plan: Generator, action: str) -> Dict[str, Any]:
+        try:
+            rows = None
+            while True:
+                query = plan.send(rows)
+                rows = _rows(await self.db.execute(text(query.sql), query.params), query.one)
+        except StopIteration as done:
+            return done.value
+        except InvalidCursor:
+            raise
         except Exception as e:
-            logger.error(f"Error analyzing rankings: {e}")
+            await self.db.rollback()
+            logger.error(f"Error {action}: {e}")
             return {"success": False, "error": str(e)}
-        finally:
-            db.close()
-            """Analyze how rankings are determined in a tournament"""
-            db = self._get_fresh_db()
-            try:
-                # Get top 15 by official ranking
-                ranked_players = db.execute(text("""
-                    SELECT 
-                        ps.rank,
-                        ps.person_id,
-                        ps.first_name,
-                        ps.last_name,
-                        ps.team_name,
-                        ps.games_played,
-                        ps.goals_scored,
-                        ps.assists,
-                        ps.scoring_points,
-                        ps.plus_minus,
-                        ps.pts as api_pts,
-                        CASE 
-                            WHEN ps.games_played > 0 THEN ROUND(ps.scoring_points::decimal / ps.games_played, 3)
-                            ELSE 0 
-                        END as points_per_game,
-                        ps.shots,
-                        ps.shots_pct
-                    FROM player_statistics ps
-                    WHERE ps.tournament_id = :tournament_id
-                    ORDER BY ps.rank ASC NULLS LAST
-                    LIMIT 15
-                """), {"tournament_id": tournament_id}).fetchall()
-                
-                # Get top 10 by pure scoring points
-                points_leaders = db.execute(text("""
-                    SELECT 
-                        ps.rank,
-                        ps.person_id,
-                        ps.first_name,
-                        ps.last_name,
-                        ps.scoring_points,
-                        ps.goals_scored,
-                        ps.assists,
-                        ps.games_played
-                    FROM player_statistics ps
-                    WHERE ps.tournament_id = :tournament_id
-                    ORDER BY ps.scoring_points DESC, ps.goals_scored DESC
-                    LIMIT 10
-                """), {"tournament_id": tournament_id}).fetchall()
-                
-                return {
-                    "success": True,
-                    "tournament_id": tournament_id,
-                    "official_rankings": [dict(row._mapping) for row in ranked_players],
-                    "pure_points_leaders": [dict(row._mapping) for row in points_leaders],
-                    "analysis": {
-                        "rank_1_player": dict(ranked_players[0]._mapping) if ranked_players else None,
-                        "points_leader": dict(points_leaders[0]._mapping) if points_leaders else None
-                    }
-                }
-                
-            except Exception as e:
-                logger.error(f"Error analyzing rankings: {e}")
-                return {"success": False, "error": str(e)}
-            finally:
-                db.close()
\ No newline at end of file
@@ -0,0 +1,212 @@
+# src/services/leaderboard_snapshot.py
+"""
+In-memory, columnar copy of readonly.mv_player_leaderboard.
+
+The leaderboard routes sort by whichever stat the client asks for (see
+_STAT_SORTS in hockey_analytics), so each request was a sort in PostgreSQL.
+The snapshot keeps every column and sort key as a NumPy array and, per
+sort, the rows in order and the rank of each row; an unfiltered page is a
+slice of the order, a filtered one a boolean mask and an argpartition of
+the ranks, and the database is not involved. Response rows are built from
+the selected indexes of the requested columns only.
+
+A snapshot is tagged with the data version it was loaded under and only
+used while that version is current, so its pages and cursors are the ones
+the SQL path would return. When the version moves on, the next request
+starts a reload in the background and is answered by SQL until it is done.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from src.config.settings import get_settings
+from src.services.hockey_analytics import _STAT_SORTS
+from src.utils.database import get_read_session
+from src.utils.logging_config import setup_logging
+from src.utils.pagination import InvalidCursor, Keyset, decode_cursor, encode_cursor
+
+try:
+    import numpy as np
+except ImportError:  # optional: without numpy the leaderboards are answered by SQL
+    np = None
+
+logger = setup_logging("leaderboard_snapshot")
+
+# Every key expression of the leaderboard sorts, and the id that makes them unique
+SORT_KEYS = tuple(dict.fromkeys(key for keys, _ in _STAT_SORTS.values() for key in keys)) + ("ps.id",)
+
+
+def _object_array(values: Sequence[Any]):
+    """1-d object array of the values as they are, even when they are sequences themselves"""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+class LeaderboardSnapshot:
+    """
+    Columns of the leaderboard view as object arrays (the values stay the
+    Python ones the SQL path returns), plus NumPy arrays of the sort keys and
+    filter columns. Immutable once built, so requests on several threads can
+    share it.
+    """
+    def __init__(self, version: int, columns: Dict[str, Sequence[Any]], keys: Dict[str, Sequence[Any]]):
+        self.version = version
+        self.columns = {name: _object_array(values) for name, values in columns.items()}
+        self._size = len(next(iter(self.columns.values()))) if self.columns else 0
+        self.keys = {expression: np.asarray(values) for expression, values in keys.items()}
+
+        tournament_ids = self._column("tournament_id")
+        self.tournament_ids = np.asarray(tournament_ids, dtype=np.int64)
+        self.deleted = np.asarray(self._column("tournament_is_deleted"), dtype=bool)
+        positions = self._column("position")
+        self.position_codes = {position: code for code, position in enumerate(dict.fromkeys(positions))}
+        self.positions = np.asarray([self.position_codes[p] for p in positions], dtype=np.int32)
+
+        # Tournament info of get_tournament_player_stats, for tournaments with players
+        self.tournaments: Dict[int, Dict[str, Any]] = {}
+        info = [self._column(name) for name in ("tournament_name", "season_name", "tournament_type")]
+        for tournament_id, name, season, kind in zip(tournament_ids, *info):
+            if tournament_id not in self.tournaments and (name, season, kind) != (None, None, None):
+                self.tournaments[tournament_id] = {"tournament_name": name, "season_name": season,
+                                                   "tournament_type": kind}
+
+        # Per sort: the rows in order, and the position of every row in it
+        self._orders: Dict[Tuple[Tuple[str, ...], bool], Any] = {}
+        self._ranks: Dict[Tuple[Tuple[str, ...], bool], Any] = {}
+        for sort_keys, descending in _STAT_SORTS.values():
+            self._sort(sort_keys + ("ps.id",), descending)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _column(self, name: str) -> List[Any]:
+        return self.columns[name].tolist()
+
+    def _sort(self, keys: Tuple[str, ...], descending: bool):
+        """Order and ranks of the rows; the keys are unique together, so it is a total order"""
+        sort = (keys, descending)
+        if sort not in self._ranks:
+            order = np.lexsort([self.keys[key] for key in reversed(keys)])
+            if descending:
+                order = order[::-1]
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            self._orders[sort], self._ranks[sort] = order, rank
+        return self._orders[sort], self._ranks[sort]
+
+    def _after(self, keyset: Keyset, cursor: str):
+        """Mask of the rows after the cursor, i.e. the row comparison Keyset.after() puts in SQL"""
+        values = decode_cursor(cursor, keyset.tag, len(keyset.keys))
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            raise InvalidCursor("Invalid cursor")
+        after = np.zeros(len(self), dtype=bool)
+        equal = np.ones(len(self), dtype=bool)
+        for key, value in zip(keyset.keys, values):
+            column = self.keys[key]
+            after |= equal & ((column < value) if keyset.descending else (column > value))
+            equal &= column == value
+        return after
+
+    def page(self, keyset: Keyset, cursor: Optional[str], limit: int, fields: Sequence[str],
+             tournament_id: Optional[int] = None, position: Optional[str] = None,
+             exclude_deleted: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page in keyset order and the next cursor, as Keyset.page() returns them"""
+        filters = []
+        if tournament_id is not None:
+            filters.append(self.tournament_ids == tournament_id)
+        if position:
+            filters.append(self.positions == self.position_codes.get(position, -1))
+        if exclude_deleted:
+            filters.append(~self.deleted)
+        if cursor:
+            filters.append(self._after(keyset, cursor))
+
+        order, ranks = self._sort(keyset.keys, keyset.descending)
+        if not filters:
+            selected = order[:limit + 1]
+        else:
+            candidates = np.flatnonzero(np.logical_and.reduce(filters))
+            rank = ranks[candidates]
+            if len(candidates) > limit + 1:
+                # The limit + 1 best rows, unordered, in linear time; only those get sorted
+                best = np.argpartition(rank, limit)[:limit + 1]
+                candidates, rank = candidates[best], rank[best]
+            selected = candidates[np.argsort(rank)]
+
+        next_cursor = None
+        if len(selected) > limit:
+            selected = selected[:limit]
+            if limit:
+                last = selected[-1]
+                next_cursor = encode_cursor(keyset.tag, [self.keys[key][last].item() for key in keyset.keys])
+        values = [self.columns[name][selected].tolist() for name in fields]
+        return [dict(zip(fields, row)) for row in zip(*values)], next_cursor
+
+
+def load_snapshot() -> LeaderboardSnapshot:
+    """Read the leaderboard view into a new snapshot"""
+    started = time.monotonic()
+    db = get_read_session()
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            # One snapshot of the (replica) database for the version and the rows, so they match exactly
+            db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY"))
+        version = db.execute(text("SELECT version FROM data_version WHERE id = 1")).scalar() or 0
+        key_columns = ", ".join(f"{key} AS _key{i}" for i, key in enumerate(SORT_KEYS))
+        result = db.execute(text(f"SELECT ps.*, {key_columns} FROM readonly.mv_player_leaderboard ps"))
+        names = list(result.keys())[:-len(SORT_KEYS)]
+
+        strings: Dict[str, str] = {}
+        columns, keys = [[] for _ in names], [[] for _ in SORT_KEYS]
+        for row in result:
+            # Team, tournament and season names repeat on every row; keep one copy of each
+            for values, value in zip(columns, row[:len(names)]):
+                values.append(strings.setdefault(value, value) if isinstance(value, str) else value)
+            for values, value in zip(keys, row[len(names):]):
+                values.append(value)
+    finally:
+        db.close()
+
+    snapshot = LeaderboardSnapshot(version, dict(zip(names, columns)), dict(zip(SORT_KEYS, keys)))
+    logger.info("Leaderboard snapshot loaded", extra={
+        "version": version, "rows": len(snapshot), "seconds": round(time.monotonic() - started, 3)
+    })
+    return snapshot
+
+
+class LeaderboardSnapshots:
+    """This process's snapshot, reloaded in the background once the data version has moved on"""
+    def __init__(self):
+        self.snapshot: Optional[LeaderboardSnapshot] = None
+        self._lock = threading.Lock()
+        self._loading = False
+        self._last_load = float("-inf")
+
+    def get(self, version: int) -> Optional[LeaderboardSnapshot]:
+        """The snapshot if it was loaded under this version, else None (and a reload may start)"""
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        settings = get_settings()
+        if np is None or not settings.LEADERBOARD_SNAPSHOT:
+            return None
+        with self._lock:
+            # An ingest commits many times; reload at most once per interval while it runs
+            if self._loading or time.monotonic() - self._last_load < settings.LEADERBOARD_SNAPSHOT_RELOAD_SECONDS:
+                return None
+            self._loading = True
+            self._last_load = time.monotonic()
+        threading.Thread(target=self._load, name="leaderboard-snapshot", daemon=True).start()
+        return None
+
+    def _load(self) -> None:
+        try:
+            self.snapshot = load_snapshot()
+        except Exception as e:
+            logger.warning("Leaderboard snapshot not loaded, leaderboards use SQL", extra={"error": str(e)})
+        finally:
+            self._loading = False
+
+
+leaderboard_snapshots = LeaderboardSnapshots()
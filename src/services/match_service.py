@@ -1,65 +1,71 @@
-import httpx
 from datetime import datetime
 from sqlalchemy.orm import Session
-import asyncio
+from typing import AsyncIterator, Dict, List, Optional
 from src.config.settings import Settings
 from src.models.match import Match
+from src.services.head_to_head_service import HeadToHeadService
+from src.services.standings_engine import parse_point_rules
+from src.services.standings_history_service import StandingsHistoryService
+from src.services.team_form_service import TeamFormService
+from src.utils.staging import StagedRefresh
+from src.utils.resilience import fetch_json, stream_json_chunks
 from src.utils.logging_config import setup_logging
 
 # Set up logging
 logger = setup_logging("match_service")
 
+MATCH_REFRESH = StagedRefresh(Match, key_columns=("match_id",))
+
 class MatchService:
     def __init__(self):
         self.settings = Settings()
         self.base_url = self.settings.API_BASE_URL
+        self.point_rules = parse_point_rules(self.settings.STANDINGS_POINT_RULES)
+        self.history_service = StandingsHistoryService()
+        self.head_to_head_service = HeadToHeadService()
+        self.form_service = TeamFormService()
 
-    async def fetch_tournament_matches(self, tournament_id: int, max_retries: int = 3) -> dict:
+    async def fetch_tournament_matches(self, tournament_id: int, max_retries: Optional[int] = None) -> dict:
         """Fetch all matches for a given tournament"""
         if not isinstance(tournament_id, int) or tournament_id <= 0:
             raise ValueError(f"Invalid tournament_id: {tournament_id}")
             
-        retries = 0
-        logger.info("Fetching tournament matches", extra={
+        logger.info("Fetching tournament matches", extra={"tournament_id": tournament_id})
+        data = await fetch_json(
+            f"{self.base_url}/ta/TournamentMatches/?tournamentId={tournament_id}",
+            what=f"matches for tournament {tournament_id}", max_attempts=max_retries
+        )
+        logger.info("Successfully fetched matches", extra={
             "tournament_id": tournament_id,
-            "retry_count": retries,
-            "max_retries": max_retries
+            "match_count": len(data.get("matches", []))
         })
-        
-        while retries < max_retries:
-            try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(
-                        f"{self.base_url}/ta/TournamentMatches/?tournamentId={tournament_id}"
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                    match_count = len(data.get("matches", []))
-                    logger.info("Successfully fetched matches", extra={
-                        "tournament_id": tournament_id,
-                        "match_count": match_count
-                    })
-                    return data
+        return data
+
+    async def stream_tournament_matches(self, tournament_id: int, chunk_size: int = 500,
+                                        max_retries: Optional[int] = None) -> AsyncIterator[List[dict]]:
+        """
+        Stream matches for a tournament in chunks of at most chunk_size records.
+        The response body is parsed incrementally, so memory use depends on
+        chunk_size rather than on the size of the tournament.
+        """
+        if not isinstance(tournament_id, int) or tournament_id <= 0:
+            raise ValueError(f"Invalid tournament_id: {tournament_id}")
             
-            except (httpx.HTTPError, httpx.TimeoutException) as e:
-                retries += 1
-                logger.warning("API request failed, retrying", extra={
-                    "tournament_id": tournament_id,
-                    "retry_count": retries,
-                    "max_retries": max_retries,
-                    "error": str(e),
-                    "wait_seconds": 2 ** retries
-                })
-                
-                if retries == max_retries:
-                    logger.error("Failed to fetch matches after maximum retries", extra={
-                        "tournament_id": tournament_id,
-                        "retry_count": retries,
-                        "error": str(e)
-                    })
-                    raise Exception(f"Failed to fetch matches after {max_retries} attempts: {str(e)}")
-                    
-                await asyncio.sleep(2 ** retries)  # Exponential backoff
+        logger.info("Streaming tournament matches", extra={
+            "tournament_id": tournament_id,
+            "chunk_size": chunk_size
+        })
+        match_count = 0
+        async for chunk in stream_json_chunks(
+            f"{self.base_url}/ta/TournamentMatches/?tournamentId={tournament_id}", "matches.item", chunk_size,
+            what=f"matches for tournament {tournament_id}", max_attempts=max_retries
+        ):
+            match_count += len(chunk)
+            yield chunk
+        logger.info("Successfully streamed matches", extra={
+            "tournament_id": tournament_id,
+            "match_count": match_count
+        })
 
     def _parse_date(self, date_str: str | None) -> datetime | None:
         """Parse a date string to a datetime object"""
@@ -70,9 +76,76 @@ class MatchService:
         except (ValueError, AttributeError):
             return None
 
-    def save_tournament_matches(self, db: Session, data: dict):
-        """Save tournament matches to the database"""
+    def _build_match(self, tournament_id: int, match_data: dict) -> Match:
+        """Map one match record from the API to a Match row"""
+        # Extract match result data if available
+        match_result = match_data.get("matchResult") or {}
+        
+        return Match(
+            match_id=match_data["matchId"],
+            tournament_id=tournament_id,
+            match_no=match_data.get("matchNo"),
+            activity_area_id=match_data.get("activityAreaId"),
+            activity_area_latitude=match_data.get("activityAreaLatitude"),
+            activity_area_longitude=match_data.get("activityAreaLongitude"),
+            activity_area_name=match_data.get("activityAreaName"),
+            activity_area_no=match_data.get("activityAreaNo"),
+            adm_org_id=match_data.get("admOrgId"),
+            arr_org_id=match_data.get("arrOrgId"),
+            arr_org_no=match_data.get("arrOrgNo"),
+            arr_org_name=match_data.get("arrOrgName"),
+            awayteam_id=match_data.get("awayteamId"),
+            awayteam_org_no=match_data.get("awayteamOrgNo"),
+            awayteam=match_data.get("awayteam"),
+            awayteam_org_name=match_data.get("awayteamOrgName"),
+            awayteam_overridden_name=match_data.get("awayteamOverriddenName"),
+            awayteam_club_org_id=match_data.get("awayteamClubOrgId"),
+            hometeam_id=match_data.get("hometeamId"),
+            hometeam=match_data.get("hometeam"),
+            hometeam_org_name=match_data.get("hometeamOrgName"),
+            hometeam_overridden_name=match_data.get("hometeamOverriddenName"),
+            hometeam_org_no=match_data.get("hometeamOrgNo"),
+            hometeam_club_org_id=match_data.get("hometeamClubOrgId"),
+            round_id=match_data.get("roundId"),
+            round_name=match_data.get("roundName"),
+            season_id=match_data.get("seasonId"),
+            tournament_name=match_data.get("tournamentName"),
+            match_date=self._parse_date(match_data.get("matchDate")),
+            match_start_time=match_data.get("matchStartTime"),
+            match_end_time=match_data.get("matchEndTime"),
+            venue_unit_id=match_data.get("venueUnitId"),
+            venue_unit_no=match_data.get("venueUnitNo"),
+            venue_id=match_data.get("venueId"),
+            venue_no=match_data.get("venueNo"),
+            physical_area_id=match_data.get("physicalAreaId"),
+            home_goals=match_result.get("homeGoals"),
+            away_goals=match_result.get("awayGoals"),
+            match_end_result=match_result.get("matchEndResult"),
+            live_arena=match_data.get("liveArena"),
+            live_client_type=match_data.get("liveClientType"),
+            status_type_id=match_data.get("statusTypeId"),
+            status_type=match_data.get("statusType"),
+            last_change_date=self._parse_date(match_data.get("lastChangeDate")),
+            spectators=match_data.get("spectators"),
+            actual_match_date=self._parse_date(match_data.get("actualMatchDate")),
+            actual_match_start_time=match_data.get("actualMatchStartTime"),
+            actual_match_end_time=match_data.get("actualMatchEndTime"),
+            sport_id=match_data.get("sportId"),
+            created_at=datetime.now(),
+            updated_at=datetime.now()
+        )
+
+    def save_tournament_matches(self, db: Session, data: dict) -> int:
+        """Save tournament matches to the database; returns the matches saved, in either refresh mode"""
         tournament_id = data["tournamentId"]
+        # Team form is only recomputed for the teams whose matches this save changes
+        before = self.form_service.match_signatures(db, tournament_id)
+        
+        if self.settings.INGEST_REFRESH_MODE == "swap":
+            matches = [self._build_match(tournament_id, match_data) for match_data in data.get("matches", [])]
+            staged_rows = MATCH_REFRESH.refresh(db, {"tournament_id": tournament_id}, matches).staged_rows
+            self._refresh_match_summaries(db, tournament_id, before)
+            return staged_rows
         
         # First, delete existing matches for this tournament to avoid duplicates
         db.query(Match).filter(Match.tournament_id == tournament_id).delete()
@@ -80,71 +153,17 @@ class MatchService:
         # Commit the delete operation before adding new matches
         db.commit()
         
-        matches_to_add = []
-        for match_data in data.get("matches", []):
-            # Extract match result data if available
-            match_result = match_data.get("matchResult", {})
-            
-            match = Match(
-                match_id=match_data["matchId"],
-                tournament_id=tournament_id,
-                match_no=match_data.get("matchNo"),
-                activity_area_id=match_data.get("activityAreaId"),
-                activity_area_latitude=match_data.get("activityAreaLatitude"),
-                activity_area_longitude=match_data.get("activityAreaLongitude"),
-                activity_area_name=match_data.get("activityAreaName"),
-                activity_area_no=match_data.get("activityAreaNo"),
-                adm_org_id=match_data.get("admOrgId"),
-                arr_org_id=match_data.get("arrOrgId"),
-                arr_org_no=match_data.get("arrOrgNo"),
-                arr_org_name=match_data.get("arrOrgName"),
-                awayteam_id=match_data.get("awayteamId"),
-                awayteam_org_no=match_data.get("awayteamOrgNo"),
-                awayteam=match_data.get("awayteam"),
-                awayteam_org_name=match_data.get("awayteamOrgName"),
-                awayteam_overridden_name=match_data.get("awayteamOverriddenName"),
-                awayteam_club_org_id=match_data.get("awayteamClubOrgId"),
-                hometeam_id=match_data.get("hometeamId"),
-                hometeam=match_data.get("hometeam"),
-                hometeam_org_name=match_data.get("hometeamOrgName"),
-                hometeam_overridden_name=match_data.get("hometeamOverriddenName"),
-                hometeam_org_no=match_data.get("hometeamOrgNo"),
-                hometeam_club_org_id=match_data.get("hometeamClubOrgId"),
-                round_id=match_data.get("roundId"),
-                round_name=match_data.get("roundName"),
-                season_id=match_data.get("seasonId"),
-                tournament_name=match_data.get("tournamentName"),
-                match_date=self._parse_date(match_data.get("matchDate")),
-                match_start_time=match_data.get("matchStartTime"),
-                match_end_time=match_data.get("matchEndTime"),
-                venue_unit_id=match_data.get("venueUnitId"),
-                venue_unit_no=match_data.get("venueUnitNo"),
-                venue_id=match_data.get("venueId"),
-                venue_no=match_data.get("venueNo"),
-                physical_area_id=match_data.get("physicalAreaId"),
-                home_goals=match_result.get("homeGoals"),
-                away_goals=match_result.get("awayGoals"),
-                match_end_result=match_result.get("matchEndResult"),
-                live_arena=match_data.get("liveArena"),
-                live_client_type=match_data.get("liveClientType"),
-                status_type_id=match_data.get("statusTypeId"),
-                status_type=match_data.get("statusType"),
-                last_change_date=self._parse_date(match_data.get("lastChangeDate")),
-                spectators=match_data.get("spectators"),
-                actual_match_date=self._parse_date(match_data.get("actualMatchDate")),
-                actual_match_start_time=match_data.get("actualMatchStartTime"),
-                actual_match_end_time=match_data.get("actualMatchEndTime"),
-                sport_id=match_data.get("sportId"),
-                created_at=datetime.now(),
-                updated_at=datetime.now()
-            )
-            matches_to_add.append(match)
+        matches_to_add = [
+            self._build_match(tournament_id, match_data)
+            for match_data in data.get("matches", [])
+        ]
         
         # Add all matches to the session
         db.add_all(matches_to_add)
         
         try:
             db.commit()
+            self._refresh_match_summaries(db, tournament_id, before)
             logger.info("Successfully saved tournament matches", extra={
                 "tournament_id": tournament_id,
                 "match_count": len(matches_to_add)
@@ -155,4 +174,60 @@ class MatchService:
                 "tournament_id": tournament_id,
                 "error": str(e)
             })
-            raise
\ No newline at end of file
+            raise
+        return len(matches_to_add)
+
+    async def save_tournament_matches_stream(self, db: Session, tournament_id: int,
+                                             chunks: AsyncIterator[List[dict]]) -> int:
+        """
+        Save matches arriving as chunks (see stream_tournament_matches).
+        Each chunk is committed and expunged from the session before the next
+        one is parsed, so only one chunk of rows is held in memory.
+        In swap mode the chunks go to the staging table and are swapped in
+        once the whole stream has been read.
+        """
+        before = self.form_service.match_signatures(db, tournament_id)
+        if self.settings.INGEST_REFRESH_MODE == "swap":
+            staging = MATCH_REFRESH.begin(db, {"tournament_id": tournament_id})
+            try:
+                async for chunk in chunks:
+                    staging.load(self._build_match(tournament_id, match_data) for match_data in chunk)
+            except Exception:
+                staging.discard()
+                raise
+            staged_rows = staging.swap().staged_rows
+            self._refresh_match_summaries(db, tournament_id, before)
+            return staged_rows
+        
+        db.query(Match).filter(Match.tournament_id == tournament_id).delete()
+        db.commit()
+        
+        saved_count = 0
+        try:
+            async for chunk in chunks:
+                db.add_all([self._build_match(tournament_id, match_data) for match_data in chunk])
+                db.commit()
+                db.expunge_all()
+                saved_count += len(chunk)
+            self._refresh_match_summaries(db, tournament_id, before)
+        except Exception as e:
+            db.rollback()
+            logger.error("Error saving streamed tournament matches", extra={
+                "tournament_id": tournament_id,
+                "saved_count": saved_count,
+                "error": str(e)
+            })
+            raise
+        
+        logger.info("Successfully saved streamed tournament matches", extra={
+            "tournament_id": tournament_id,
+            "match_count": saved_count
+        })
+        return saved_count
+
+    def _refresh_match_summaries(self, db: Session, tournament_id: int, before: Dict[int, tuple]) -> None:
+        """Rebuild the tables derived from the tournament's matches and commit; before is from match_signatures"""
+        self.history_service.refresh_history(db, [tournament_id], self.point_rules)
+        self.head_to_head_service.refresh_head_to_head(db, [tournament_id])
+        self.form_service.refresh_form(db, tournament_id, self.point_rules, before)
+        db.commit()
@@ -1,5 +1,4 @@
 import asyncio
-import httpx
 from minio import Minio
 from minio.error import S3Error
 from datetime import datetime, timedelta
@@ -7,6 +6,7 @@ from typing import Optional, Tuple
 from io import BytesIO
 from src.config.settings import get_settings
 from src.utils.logging_config import setup_logging
+from src.utils.resilience import fetch_bytes
 
 logger = setup_logging("minio_service")
 
@@ -55,10 +55,8 @@ class MinioService:
         
         try:
             # Download image
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(image_url)
-                response.raise_for_status()
-                image_data = response.content
+            response = await fetch_bytes(image_url, what=f"image for person {person_id}")
+            image_data = response.content
             
             # Determine format from content-type
             content_type = response.headers.get('content-type', '')
@@ -1,11 +1,10 @@
-import httpx
-import asyncio
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from src.config.settings import Settings
 from src.models.organisation import Organisation
 from src.utils.logging_config import setup_logging
+from src.utils.resilience import fetch_json
 
 # Set up logging
 logger = setup_logging("organisation_service")
@@ -15,7 +14,7 @@ class OrganisationService:
         self.settings = Settings()
         self.base_url = self.settings.API_BASE_URL
     
-    async def fetch_organisations(self, org_ids: List[int], max_retries: int = 3) -> Dict[str, Any]:
+    async def fetch_organisations(self, org_ids: List[int], max_retries: Optional[int] = None) -> Dict[str, Any]:
         """
         Fetch organisation data for a list of organization IDs.
         The API expects repeated orgIds parameters like:
@@ -24,12 +23,7 @@ class OrganisationService:
         if not org_ids:
             raise ValueError("No organisation IDs provided")
             
-        retries = 0
-        logger.info("Fetching organisations", extra={
-            "org_count": len(org_ids),
-            "retry_count": retries,
-            "max_retries": max_retries
-        })
+        logger.info("Fetching organisations", extra={"org_count": len(org_ids)})
         
         # Build URL with repeated orgIds parameters
         base_url = f"{self.base_url}/org/Organisation"
@@ -38,43 +32,16 @@ class OrganisationService:
             params.append(f"orgIds={org_id}")
         
         url = f"{base_url}?{'&'.join(params)}"
+        data = await fetch_json(url, what=f"{len(org_ids)} organisations", max_attempts=max_retries)
         
-        while retries < max_retries:
-            try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    logger.info(f"Calling URL: {url}", extra={"org_count": len(org_ids)})
-                    response = await client.get(url)
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # Make sure we got a list back
-                    if not isinstance(data, list):
-                        data = [data] if data else []
-                        
-                    logger.info("Successfully fetched organisations", extra={
-                        "org_count": len(data)
-                    })
-                    return {"organisations": data}
+        # Make sure we got a list back
+        if not isinstance(data, list):
+            data = [data] if data else []
             
-            except (httpx.HTTPError, httpx.TimeoutException) as e:
-                retries += 1
-                logger.warning("API request failed, retrying", extra={
-                    "url": url[:100] + "..." if len(url) > 100 else url,
-                    "retry_count": retries,
-                    "max_retries": max_retries,
-                    "error": str(e),
-                    "wait_seconds": 2 ** retries
-                })
-                
-                if retries == max_retries:
-                    logger.error("Failed to fetch organisations after maximum retries", extra={
-                        "org_count": len(org_ids),
-                        "retry_count": retries,
-                        "error": str(e)
-                    })
-                    raise Exception(f"Failed to fetch organisations after {max_retries} attempts: {str(e)}")
-                    
-                await asyncio.sleep(2 ** retries)  # Exponential backoff
+        logger.info("Successfully fetched organisations", extra={
+            "org_count": len(data)
+        })
+        return {"organisations": data}
     
     def save_organisations(self, db: Session, data: Dict[str, Any]) -> None:
         """Save organisation data to the database"""
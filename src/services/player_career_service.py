@@ -0,0 +1,107 @@
+# src/services/player_career_service.py
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from src.models.player_career import PlayerCareer
+from src.models.player_statistic import PlayerStatistic
+from src.models.tournament import Tournament
+from src.utils.logging_config import setup_logging
+
+logger = setup_logging("player_career_service")
+
+# Career total -> player_statistics column it sums
+_TOTALS = {
+    "total_games": "games_played",
+    "total_goals": "goals_scored",
+    "total_assists": "assists",
+    "total_points": "scoring_points",
+    "total_pim": "pim",
+    "total_pp_goals": "power_play_goals",
+    "total_pp_assists": "power_play_goal_assists",
+    "total_sh_goals": "short_handed_goals",
+    "total_sh_assists": "short_handed_goal_assists",
+    "total_gwg": "gwg",
+    "total_shots": "shots",
+    "total_faceoffs": "face_offs",
+}
+
+# Per-season split -> player_statistics column it sums
+_SEASON_TOTALS = {"games": "games_played", "goals": "goals_scored", "assists": "assists",
+                  "points": "scoring_points", "pim": "pim"}
+
+
+def _per_game(total: int, games: int) -> float:
+    return round(total / games, 2) if games else 0.0
+
+
+def build_career(person_id: int, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Career row of one person from their player_statistics rows (with season_id
+    and season_name), newest season first. Each row is one tournament, so the
+    totals are plain sums.
+    """
+    career = {"person_id": person_id, "first_name": rows[0]["first_name"], "last_name": rows[0]["last_name"],
+              "tournaments_played": len({row["tournament_id"] for row in rows})}
+    for total, column in _TOTALS.items():
+        career[total] = sum(row[column] or 0 for row in rows)
+
+    games = career["total_games"]
+    career["career_shot_pct"] = round(career["total_goals"] / career["total_shots"] * 100, 2) if career["total_shots"] else 0.0
+    career["points_per_game"] = _per_game(career["total_points"], games)
+    career["goals_per_game"] = _per_game(career["total_goals"], games)
+    career["assists_per_game"] = _per_game(career["total_assists"], games)
+    career["pim_per_game"] = _per_game(career["total_pim"], games)
+
+    seasons: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        season = seasons.setdefault(row["season_id"], {
+            "season_id": row["season_id"], "season_name": row["season_name"], "tournaments": 0,
+            **{split: 0 for split in _SEASON_TOTALS}
+        })
+        season["tournaments"] += 1
+        for split, column in _SEASON_TOTALS.items():
+            season[split] += row[column] or 0
+    for season in seasons.values():
+        season["points_per_game"] = _per_game(season["points"], season["games"])
+    career["seasons"] = list(seasons.values())
+    career["seasons_played"] = len(seasons)
+    return career
+
+
+class PlayerCareerService:
+    """Keeps player_careers in step with player_statistics, one person at a time"""
+
+    def refresh_careers(self, db: Session, person_ids: Optional[Iterable[int]] = None,
+                        batch_size: int = 1000) -> int:
+        """
+        Recompute the careers of the given persons (everyone if None) from
+        player_statistics; persons without statistics lose their row. The
+        caller commits. Returns the number of careers written.
+        """
+        if person_ids is None:
+            person_ids = db.execute(select(PlayerStatistic.person_id).distinct()).scalars().all()
+        person_ids = sorted(set(person_ids))
+
+        written = 0
+        for i in range(0, len(person_ids), batch_size):
+            batch = person_ids[i:i + batch_size]
+            rows = db.execute(
+                select(PlayerStatistic.__table__, Tournament.season_id, Tournament.season_name)
+                .outerjoin(Tournament, PlayerStatistic.tournament_id == Tournament.tournament_id)
+                .where(PlayerStatistic.person_id.in_(batch))
+                .order_by(PlayerStatistic.person_id, Tournament.season_id.desc(), PlayerStatistic.tournament_id.desc())
+            ).mappings().all()
+
+            rows_by_person: Dict[int, List[Dict[str, Any]]] = {}
+            for row in rows:
+                rows_by_person.setdefault(row["person_id"], []).append(row)
+
+            now = datetime.now()
+            careers = [{**build_career(person_id, person_rows), "updated_at": now}
+                       for person_id, person_rows in rows_by_person.items()]
+            db.query(PlayerCareer).filter(PlayerCareer.person_id.in_(batch)).delete(synchronize_session=False)
+            if careers:
+                db.execute(insert(PlayerCareer), careers)
+            written += len(careers)
+        return written
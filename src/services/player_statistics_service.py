@@ -1,66 +1,99 @@
 # src/services/player_statistics_service.py
-import httpx
 from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-import asyncio
+from typing import AsyncIterator, List, Optional
 from src.config.settings import get_settings
 from src.models.player_statistic import PlayerStatistic
+from src.services.player_career_service import PlayerCareerService
+from src.utils.batch_insert import BatchInsertResult, insert_with_bisection
+from src.utils.resilience import fetch_json, stream_json_chunks
 from src.utils.logging_config import setup_logging
+from src.utils.staging import StagedRefresh
 
 logger = setup_logging("player_statistics_service")
 
+PLAYER_STATISTIC_REFRESH = StagedRefresh(PlayerStatistic, key_columns=("tournament_id", "person_id"))
+
 class PlayerStatisticsService:
     def __init__(self):
         self.settings = get_settings()
         self.base_url = self.settings.API_BASE_URL
+        self.career_service = PlayerCareerService()
 
-    async def fetch_tournament_players(self, tournament_id: int, max_retries: int = 3) -> list:
+    async def fetch_tournament_players(self, tournament_id: int, max_retries: Optional[int] = None) -> list:
         """Fetch player statistics for a tournament"""
         if not isinstance(tournament_id, int) or tournament_id <= 0:
             raise ValueError(f"Invalid tournament_id: {tournament_id}")
         
-        retries = 0
         logger.info(f"Fetching player statistics for tournament {tournament_id}")
+        return await fetch_json(
+            f"{self.base_url}/icehockey/TournamentPlayers/{tournament_id}",
+            what=f"player statistics for tournament {tournament_id}", max_attempts=max_retries
+        )
+
+    async def stream_tournament_players(self, tournament_id: int, chunk_size: int = 500,
+                                        max_retries: Optional[int] = None) -> AsyncIterator[List[dict]]:
+        """Stream player statistics for a tournament in chunks of at most chunk_size records"""
+        if not isinstance(tournament_id, int) or tournament_id <= 0:
+            raise ValueError(f"Invalid tournament_id: {tournament_id}")
         
-        while retries < max_retries:
-            try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(
-                        f"{self.base_url}/icehockey/TournamentPlayers/{tournament_id}"
-                    )
-                    response.raise_for_status()
-                    return response.json()
-            
-            except (httpx.HTTPError, httpx.TimeoutException) as e:
-                retries += 1
-                logger.warning("API request failed, retrying", extra={
-                    "tournament_id": tournament_id,
-                    "retry_count": retries,
-                    "max_retries": max_retries,
-                    "error": str(e),
-                    "wait_seconds": 2 ** retries
-                })
-                if retries == max_retries:
-                    logger.error("Failed to fetch data after maximum retries", extra={
-                        "tournament_id": tournament_id,
-                        "retry_count": retries,
-                        "error": str(e)
-                    })
-                    raise Exception(f"Failed to fetch player statistics after {max_retries} attempts: {str(e)}")
-                await asyncio.sleep(2 ** retries)  # Exponential backoff
+        logger.info(f"Streaming player statistics for tournament {tournament_id}")
+        # The endpoint returns a top-level array
+        async for chunk in stream_json_chunks(
+            f"{self.base_url}/icehockey/TournamentPlayers/{tournament_id}", "item", chunk_size,
+            what=f"player statistics for tournament {tournament_id}", max_attempts=max_retries
+        ):
+            yield chunk
+
+    def _build_player_statistic(self, tournament_id: int, player_data: dict) -> PlayerStatistic:
+        """Map one player record from the API to a PlayerStatistic row"""
+        return PlayerStatistic(
+            tournament_id=tournament_id,
+            person_id=player_data["personId"],
+            org_id=player_data.get("orgId", 0),
+            first_name=player_data.get("firstName", "Unknown"),
+            last_name=player_data.get("lastName", "Unknown"),
+            team_name=player_data.get("teamName", "Unknown"),
+            team_short_name=player_data.get("teamShortName"),
+            position=player_data.get("position") or None,
+            rank=player_data.get("rank"),
+            scoring_points=player_data.get("pts", 0),  # Goals + Assists (for ranking)
+            plus_minus=player_data.get("points", 0),   # +/- rating (defensive stat)
+            games_played=player_data.get("gamesPlayed", 0),
+            goals_scored=player_data.get("goalsScored", 0),
+            assists=player_data.get("assists", 0),
+            pim=player_data.get("pim", 0),
+            power_play_goals=player_data.get("powerPlayGoals", 0),
+            power_play_goal_assists=player_data.get("powerPlayGoalAssists", 0),
+            short_handed_goals=player_data.get("shortHandedGoals", 0),
+            short_handed_goal_assists=player_data.get("shortHandedGoalAssists", 0),
+            gwg=player_data.get("gwg", 0),
+            shots=player_data.get("shots", 0),
+            shots_pct=player_data.get("shotsPct"),
+            face_offs=player_data.get("faceOffs", 0),
+            faceoffs_win_pct=player_data.get("faceoffsWinPct"),
+        )
 
-    def save_tournament_player_statistics(self, db: Session, tournament_id: int, data: list):
-        """Save player statistics to database with duplicate handling"""
+    def save_tournament_player_statistics(self, db: Session, tournament_id: int, data: list) -> BatchInsertResult:
+        """
+        Save player statistics to database with duplicate handling. Both refresh
+        modes report a BatchInsertResult; a swap is all-or-nothing, so it never
+        has rejected rows.
+        """
+        swap_mode = self.settings.INGEST_REFRESH_MODE == "swap"
         try:
-            # Delete existing statistics for this tournament to avoid duplicates
-            deleted_count = db.query(PlayerStatistic).filter(
-                PlayerStatistic.tournament_id == tournament_id
-            ).delete()
-            db.commit()
-            
-            if deleted_count > 0:
-                logger.info(f"Deleted {deleted_count} existing player statistics for tournament {tournament_id}")
+            # Careers of everyone leaving or joining the tournament's statistics change
+            previous_person_ids = self._tournament_person_ids(db, tournament_id)
+            if not swap_mode:
+                # Delete existing statistics for this tournament to avoid duplicates
+                deleted_count = db.query(PlayerStatistic).filter(
+                    PlayerStatistic.tournament_id == tournament_id
+                ).delete()
+                db.commit()
+                
+                if deleted_count > 0:
+                    logger.info(f"Deleted {deleted_count} existing player statistics for tournament {tournament_id}")
             
             # Group data by person_id to handle duplicates from API
             player_data_by_person = {}
@@ -83,130 +116,145 @@ class PlayerStatisticsService:
             if duplicate_count > 0:
                 logger.info(f"Found {duplicate_count} duplicate person_ids in API data for tournament {tournament_id}")
             
-            saved_count = 0
+            player_stats = []
             error_count = 0
             
             for person_id, player_data in player_data_by_person.items():
                 try:
-                    player_stat = PlayerStatistic(
-                        tournament_id=tournament_id,
-                        person_id=player_data["personId"],
-                        org_id=player_data.get("orgId", 0),
-                        first_name=player_data.get("firstName", "Unknown"),
-                        last_name=player_data.get("lastName", "Unknown"),
-                        team_name=player_data.get("teamName", "Unknown"),
-                        team_short_name=player_data.get("teamShortName"),
-                        position=player_data.get("position") or None,
-                        rank=player_data.get("rank"),
-                        scoring_points=player_data.get("pts", 0),  # Goals + Assists (for ranking)
-                        plus_minus=player_data.get("points", 0),   # +/- rating (defensive stat)
-                        games_played=player_data.get("gamesPlayed", 0),
-                        goals_scored=player_data.get("goalsScored", 0),
-                        assists=player_data.get("assists", 0),
-                        pim=player_data.get("pim", 0),
-                        power_play_goals=player_data.get("powerPlayGoals", 0),
-                        power_play_goal_assists=player_data.get("powerPlayGoalAssists", 0),
-                        short_handed_goals=player_data.get("shortHandedGoals", 0),
-                        short_handed_goal_assists=player_data.get("shortHandedGoalAssists", 0),
-                        gwg=player_data.get("gwg", 0),
-                        shots=player_data.get("shots", 0),
-                        shots_pct=player_data.get("shotsPct"),
-                        face_offs=player_data.get("faceOffs", 0),
-                        faceoffs_win_pct=player_data.get("faceoffsWinPct"),
-                    )
-                    db.add(player_stat)
-                    saved_count += 1
-                    
+                    player_stats.append(self._build_player_statistic(tournament_id, player_data))
                 except Exception as e:
                     error_count += 1
                     logger.error(f"Error creating player statistic for person_id {person_id}: {e}")
                     continue
             
-            # Commit all at once
-            try:
-                db.commit()
-                logger.info(f"Successfully saved {saved_count} player statistics for tournament {tournament_id}")
-                if error_count > 0:
-                    logger.warning(f"{error_count} players had errors and were skipped")
-                    
-            except IntegrityError as e:
-                db.rollback()
-                logger.error(f"Database integrity error for tournament {tournament_id}: {e}")
-                # Try saving one by one to identify problematic records
-                return self._save_one_by_one(db, tournament_id, list(player_data_by_person.values()))
+            person_ids = previous_person_ids | set(player_data_by_person)
+            if swap_mode:
+                # All-or-nothing: a failed swap leaves the previous statistics in place
+                stats = PLAYER_STATISTIC_REFRESH.refresh(db, {"tournament_id": tournament_id}, player_stats)
+                result = BatchInsertResult(inserted=stats.staged_rows)
+            else:
+                # Insert everything under one savepoint; bad rows are isolated by bisection
+                result = self._insert_player_statistics(db, tournament_id, player_stats)
+            self._refresh_careers(db, tournament_id, person_ids)
+            db.commit()
+            logger.info(f"Successfully saved {result.inserted} player statistics for tournament {tournament_id}")
+            if error_count > 0:
+                logger.warning(f"{error_count} players had errors and were skipped")
+            return result
                 
         except Exception as e:
             db.rollback()
             logger.error(f"Error saving player statistics for tournament {tournament_id}: {e}")
             raise
 
-    def _save_one_by_one(self, db: Session, tournament_id: int, data: list):
-        """Fallback method to save records one by one"""
-        saved_count = 0
-        error_count = 0
+    async def save_tournament_player_statistics_stream(self, db: Session, tournament_id: int,
+                                                      chunks: AsyncIterator[List[dict]]) -> int:
+        """
+        Save player statistics arriving as chunks (see stream_tournament_players).
+        Duplicate person_ids are skipped across chunks; each chunk is committed
+        and expunged before the next one is parsed. In swap mode the chunks go to
+        the staging table and are swapped in once the whole stream has been read.
+        """
+        if self.settings.INGEST_REFRESH_MODE == "swap":
+            return await self._swap_tournament_player_statistics_stream(db, tournament_id, chunks)
         
-        logger.info(f"Attempting to save {len(data)} records one by one for tournament {tournament_id}")
+        previous_person_ids = self._tournament_person_ids(db, tournament_id)
+        deleted_count = db.query(PlayerStatistic).filter(
+            PlayerStatistic.tournament_id == tournament_id
+        ).delete()
+        db.commit()
         
-        for player_data in data:
-            try:
-                # Check if record already exists
-                existing = db.query(PlayerStatistic).filter(
-                    PlayerStatistic.tournament_id == tournament_id,
-                    PlayerStatistic.person_id == player_data["personId"]
-                ).first()
-                
-                if existing:
-                    logger.debug(f"Player {player_data['personId']} already exists for tournament {tournament_id}, skipping")
-                    continue
-                
-                player_stat = PlayerStatistic(
-                    tournament_id=tournament_id,
-                    person_id=player_data["personId"],
-                    org_id=player_data.get("orgId", 0),
-                    first_name=player_data.get("firstName", "Unknown"),
-                    last_name=player_data.get("lastName", "Unknown"),
-                    team_name=player_data.get("teamName", "Unknown"),
-                    team_short_name=player_data.get("teamShortName"),
-                    position=player_data.get("position") or None,
-                    rank=player_data.get("rank"),
-                    pts=player_data.get("pts"),
-                    games_played=player_data.get("gamesPlayed", 0),
-                    goals_scored=player_data.get("goalsScored", 0),
-                    assists=player_data.get("assists", 0),
-                    points=player_data.get("points", 0),
-                    pim=player_data.get("pim", 0),
-                    power_play_goals=player_data.get("powerPlayGoals", 0),
-                    power_play_goal_assists=player_data.get("powerPlayGoalAssists", 0),
-                    short_handed_goals=player_data.get("shortHandedGoals", 0),
-                    short_handed_goal_assists=player_data.get("shortHandedGoalAssists", 0),
-                    gwg=player_data.get("gwg", 0),
-                    shots=player_data.get("shots", 0),
-                    shots_pct=player_data.get("shotsPct"),
-                    face_offs=player_data.get("faceOffs", 0),
-                    faceoffs_win_pct=player_data.get("faceoffsWinPct")
-                )
+        if deleted_count > 0:
+            logger.info(f"Deleted {deleted_count} existing player statistics for tournament {tournament_id}")
+        
+        seen_person_ids = set()
+        saved_count = 0
+        duplicate_count = 0
+        
+        try:
+            async for chunk in chunks:
+                unique_rows = []
+                for player_data in chunk:
+                    person_id = player_data.get("personId")
+                    if not person_id:
+                        logger.warning(f"Skipping player data without personId: {player_data}")
+                        continue
+                    if person_id in seen_person_ids:
+                        duplicate_count += 1
+                        continue
+                    seen_person_ids.add(person_id)
+                    unique_rows.append(player_data)
                 
-                db.add(player_stat)
+                player_stats = [self._build_player_statistic(tournament_id, row) for row in unique_rows]
+                result = self._insert_player_statistics(db, tournament_id, player_stats)
                 db.commit()
-                saved_count += 1
-                
-            except IntegrityError as e:
-                db.rollback()
-                error_count += 1
-                logger.warning(f"Duplicate key for person_id {player_data.get('personId')} in tournament {tournament_id}")
-                
-            except Exception as e:
-                db.rollback()
-                error_count += 1
-                logger.error(f"Error saving player {player_data.get('personId')}: {e}")
+                db.expunge_all()
+                saved_count += result.inserted
+            self._refresh_careers(db, tournament_id, previous_person_ids | seen_person_ids)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving streamed player statistics for tournament {tournament_id}: {e}")
+            raise
+        
+        if duplicate_count > 0:
+            logger.info(f"Found {duplicate_count} duplicate person_ids in API data for tournament {tournament_id}")
+        logger.info(f"Successfully saved {saved_count} streamed player statistics for tournament {tournament_id}")
+        return saved_count
+
+    async def _swap_tournament_player_statistics_stream(self, db: Session, tournament_id: int,
+                                                        chunks: AsyncIterator[List[dict]]) -> int:
+        """Stage streamed chunks and swap them in at the end; duplicate person_ids are skipped by the staging area"""
+        person_ids = self._tournament_person_ids(db, tournament_id)
+        staging = PLAYER_STATISTIC_REFRESH.begin(db, {"tournament_id": tournament_id})
+        try:
+            async for chunk in chunks:
+                rows = [row for row in chunk if row.get("personId")]
+                person_ids.update(row["personId"] for row in rows)
+                staging.load(self._build_player_statistic(tournament_id, row) for row in rows)
+        except Exception:
+            staging.discard()
+            raise
+        staged_rows = staging.swap().staged_rows
+        self._refresh_careers(db, tournament_id, person_ids)
+        db.commit()
+        return staged_rows
+
+    def _tournament_person_ids(self, db: Session, tournament_id: int) -> set:
+        return set(db.execute(
+            select(PlayerStatistic.person_id).where(PlayerStatistic.tournament_id == tournament_id)
+        ).scalars())
+
+    def _refresh_careers(self, db: Session, tournament_id: int, person_ids: set) -> None:
+        """Recompute the careers of the persons whose statistics the tournament's save touched; the caller commits"""
+        written = self.career_service.refresh_careers(db, person_ids)
+        logger.info(f"Refreshed {written} player careers for tournament {tournament_id}")
+
+    def _insert_player_statistics(self, db: Session, tournament_id: int,
+                                  player_stats: List[PlayerStatistic]) -> BatchInsertResult:
+        """Insert a batch of player statistics, logging the rows the database rejected"""
+        result = insert_with_bisection(
+            db, player_stats,
+            describe=lambda stat: {"person_id": stat.person_id, "first_name": stat.first_name,
+                                   "last_name": stat.last_name, "team_name": stat.team_name}
+        )
         
-        logger.info(f"One-by-one save completed: {saved_count} saved, {error_count} errors for tournament {tournament_id}")
+        if result.rejected:
+            logger.warning(f"Rejected {result.rejected_count} of {len(player_stats)} player statistics "
+                           f"for tournament {tournament_id} after {result.attempts} savepoint attempts")
+            for rejected in result.rejected:
+                logger.warning("Rejected player statistic", extra={
+                    "tournament_id": tournament_id,
+                    "person_id": rejected.row["person_id"],
+                    "reason": rejected.reason
+                })
+        return result
 
     def get_tournament_player_statistics(self, db: Session, tournament_id: int) -> list[PlayerStatistic]:
         """Get player statistics for a tournament"""
         return db.query(PlayerStatistic).filter(
             PlayerStatistic.tournament_id == tournament_id
-        ).order_by(PlayerStatistic.rank.asc(), PlayerStatistic.points.desc()).all()
+        ).order_by(PlayerStatistic.rank.asc(), PlayerStatistic.scoring_points.desc()).all()
 
     def get_top_scorers(self, db: Session, tournament_id: int = None, limit: int = 10) -> list[PlayerStatistic]:
         """Get top scorers, optionally filtered by tournament"""
@@ -216,6 +264,6 @@ class PlayerStatisticsService:
             query = query.filter(PlayerStatistic.tournament_id == tournament_id)
             
         return query.order_by(
-            PlayerStatistic.points.desc(),
+            PlayerStatistic.scoring_points.desc(),
             PlayerStatistic.goals_scored.desc()
         ).limit(limit).all()
\ No newline at end of file
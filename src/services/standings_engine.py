@@ -0,0 +1,309 @@
+# src/services/standings_engine.py
+"""
+League tables computed from the matches of a tournament.
+
+standings is a copy of the upstream table and only changes when
+fetch_standings runs. compute_standings builds the same rows (the columns
+of the Standing model) from the matches rows instead, so a table follows
+every ingested result and can be checked against the upstream one. Each
+counter is a bincount of per-match outcome arrays, so a tournament costs
+a handful of NumPy passes however many matches it has.
+"""
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional: without numpy standings only come from the upstream table
+    np = None
+
+
+class PointRules(NamedTuple):
+    """Points for each outcome of a match"""
+    win: int = 3
+    overtime_win: int = 2
+    penalty_win: int = 2
+    draw: int = 1
+    overtime_loss: int = 1
+    penalty_loss: int = 1
+    loss: int = 0
+
+
+DEFAULT_POINT_RULES = PointRules()
+
+# How a match was decided, from match_end_result; anything else is a regulation result
+REGULATION, OVERTIME, PENALTIES = 0, 1, 2
+_DECIDED_IN = ((PENALTIES, ("penalt", "shootout", "straff")), (OVERTIME, ("overtime", "forleng", "ekstraomgang")))
+_DECIDED_IN_CODES = {"so": PENALTIES, "ps": PENALTIES, "ot": OVERTIME}
+
+# Series of a standings timeline, one value per team and round
+TIMELINE_SERIES = ("position", "points", "matches_played", "goals_scored", "goals_conceded")
+
+# Columns compared by standings_differences
+CHECK_COLUMNS = ("position", "matches_played", "victories", "draws", "losses",
+                 "goals_scored", "goals_conceded", "points")
+
+
+def parse_point_rules(spec: Optional[str]) -> PointRules:
+    """Point rules from 'win=3,overtime_win=2,...'; outcomes not named keep their default"""
+    if not spec:
+        return DEFAULT_POINT_RULES
+    rules = {}
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in PointRules._fields or not value.strip().lstrip("-").isdigit():
+            raise ValueError(f"Invalid point rule {part.strip()!r}, use name=points with names: "
+                             f"{', '.join(PointRules._fields)}")
+        rules[name] = int(value)
+    return DEFAULT_POINT_RULES._replace(**rules)
+
+
+def decided_in(match_end_result: Optional[str]) -> int:
+    """REGULATION, OVERTIME or PENALTIES for a match_end_result value"""
+    result = (match_end_result or "").strip().lower()
+    if result in _DECIDED_IN_CODES:
+        return _DECIDED_IN_CODES[result]
+    for decided, words in _DECIDED_IN:
+        if any(word in result for word in words):
+            return decided
+    return REGULATION
+
+
+def _split(home_values, away_values, home_index, away_index, teams: int) -> Dict[str, Any]:
+    """Per-team totals of a per-match value, at home, away and together"""
+    home = np.bincount(home_index, weights=home_values, minlength=teams).astype(np.int64)
+    away = np.bincount(away_index, weights=away_values, minlength=teams).astype(np.int64)
+    return {"home": home, "away": away, "total": home + away}
+
+
+def _teams_and_played(matches: Sequence[Mapping[str, Any]]):
+    """Names of every team in matches, by team_id, and the matches with both scores"""
+    names: Dict[int, Dict[str, Any]] = {}
+    played = []
+    for match in matches:
+        if match["hometeam_id"] is None or match["awayteam_id"] is None:
+            continue
+        for side in ("home", "away"):
+            names.setdefault(match[f"{side}team_id"], {"team_name": match[f"{side}team"],
+                                                        "overridden_name": match[f"{side}team_overridden_name"]})
+        if match["home_goals"] is not None and match["away_goals"] is not None:
+            played.append(match)
+    return names, played
+
+
+class _Outcomes(NamedTuple):
+    """Per played match: team indexes, goals, how it was decided and the points of each side"""
+    home_index: Any
+    away_index: Any
+    home_goals: Any
+    away_goals: Any
+    decided: Any
+    home_points: Any
+    away_points: Any
+
+
+def _outcomes(played: Sequence[Mapping[str, Any]], team_ids, rules: PointRules) -> _Outcomes:
+    home_goals = np.array([m["home_goals"] for m in played], dtype=np.int64)
+    away_goals = np.array([m["away_goals"] for m in played], dtype=np.int64)
+    decided = np.array([decided_in(m["match_end_result"]) for m in played], dtype=np.int64)
+    home_win, away_win = home_goals > away_goals, home_goals < away_goals
+    draw = ~(home_win | away_win)
+    win_points = np.array([rules.win, rules.overtime_win, rules.penalty_win])[decided]
+    loss_points = np.array([rules.loss, rules.overtime_loss, rules.penalty_loss])[decided]
+    return _Outcomes(
+        home_index=np.searchsorted(team_ids, np.array([m["hometeam_id"] for m in played], dtype=np.int64)),
+        away_index=np.searchsorted(team_ids, np.array([m["awayteam_id"] for m in played], dtype=np.int64)),
+        home_goals=home_goals, away_goals=away_goals, decided=decided,
+        home_points=np.where(home_win, win_points, np.where(draw, rules.draw, loss_points)),
+        away_points=np.where(away_win, win_points, np.where(draw, rules.draw, loss_points)),
+    )
+
+
+def compute_standings(matches: Sequence[Mapping[str, Any]], rules: PointRules = DEFAULT_POINT_RULES,
+                      tournament_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Table of the teams in matches (dicts with the hometeam_id, awayteam_id,
+    hometeam, awayteam, *_overridden_name, home_goals, away_goals and
+    match_end_result columns), ordered by position. Matches without both
+    scores are not played yet; their teams get a row all the same.
+    Ties on points are broken by goal difference, goals scored, then team_id.
+    """
+    if np is None:
+        raise RuntimeError("Computing standings needs numpy (pip install numpy)")
+
+    names, played = _teams_and_played(matches)
+    team_ids = np.array(sorted(names), dtype=np.int64)
+    teams = len(team_ids)
+    outcomes = _outcomes(played, team_ids, rules)
+    home_index, away_index, home_goals, away_goals, decided = outcomes[:5]
+    points = (outcomes.home_points, outcomes.away_points)
+    home_win, away_win = home_goals > away_goals, home_goals < away_goals
+    draw = ~(home_win | away_win)
+
+    def split(home_values, away_values):
+        return _split(np.asarray(home_values, dtype=np.int64), np.asarray(away_values, dtype=np.int64),
+                      home_index, away_index, teams)
+
+    ones = np.ones(len(played), dtype=np.int64)
+    totals = {
+        "matches": split(ones, ones),
+        "points": split(*points),
+        "victories": split(home_win, away_win),
+        "draws": split(draw, draw),
+        "losses": split(away_win, home_win),
+        "goals_scored": split(home_goals, away_goals),
+        "goals_conceded": split(away_goals, home_goals),
+    }
+    for outcome, home_outcome, away_outcome in (("victories", home_win, away_win), ("losses", away_win, home_win)):
+        for kind, code in (("fulltime", REGULATION), ("overtime", OVERTIME), ("penalties", PENALTIES)):
+            totals[f"{outcome}_{kind}"] = split(home_outcome & (decided == code), away_outcome & (decided == code))
+
+    goals_diff = totals["goals_scored"]["total"] - totals["goals_conceded"]["total"]
+    # lexsort sorts by its last key first
+    order = np.lexsort((team_ids, -totals["goals_scored"]["total"], -goals_diff, -totals["points"]["total"]))
+    position = np.empty(teams, dtype=np.int64)
+    position[order] = np.arange(1, teams + 1)
+
+    standings = []
+    for i in order:
+        team_id = int(team_ids[i])
+        row = {"tournament_id": tournament_id, "team_id": team_id, **names[team_id], "position": int(position[i])}
+        row["matches_played"] = int(totals["matches"]["total"][i])
+        row["matches_home"] = int(totals["matches"]["home"][i])
+        row["matches_away"] = int(totals["matches"]["away"][i])
+        for name in ("points", "victories", "draws", "losses"):
+            row[name] = int(totals[name]["total"][i])
+            row[f"{name}_home"] = int(totals[name]["home"][i])
+            row[f"{name}_away"] = int(totals[name]["away"][i])
+        for outcome in ("victories", "losses"):
+            for kind in ("fulltime", "overtime", "penalties"):
+                for side in ("total", "home", "away"):
+                    row[f"{outcome}_{kind}_{side}"] = int(totals[f"{outcome}_{kind}"][side][i])
+        for name in ("goals_scored", "goals_conceded"):
+            row[name] = int(totals[name]["total"][i])
+            row[f"{name}_home"] = int(totals[name]["home"][i])
+            row[f"{name}_away"] = int(totals[name]["away"][i])
+        row["points_start"] = 0
+        row["total_points"] = row["points"]
+        row["goals_diff"] = int(goals_diff[i])
+        row["goals_ratio"] = round(row["goals_scored"] / row["goals_conceded"], 2) if row["goals_conceded"] else None
+        row["home_record"] = f"{row['victories_home']}-{row['draws_home']}-{row['losses_home']}"
+        row["away_record"] = f"{row['victories_away']}-{row['draws_away']}-{row['losses_away']}"
+        row["goals_home_formatted"] = f"{row['goals_scored_home']}-{row['goals_conceded_home']}"
+        row["goals_away_formatted"] = f"{row['goals_scored_away']}-{row['goals_conceded_away']}"
+        row["total_goals_formatted"] = f"{row['goals_scored']}-{row['goals_conceded']}"
+        standings.append(row)
+    return standings
+
+
+def team_results(matches: Sequence[Mapping[str, Any]], rules: PointRules = DEFAULT_POINT_RULES):
+    """
+    The played matches, and one row per team and played match as arrays:
+    team_id, match (index into the played matches), home, goals_for,
+    goals_against and points.
+    """
+    if np is None:
+        raise RuntimeError("Computing standings needs numpy (pip install numpy)")
+
+    names, played = _teams_and_played(matches)
+    team_ids = np.array(sorted(names), dtype=np.int64)
+    outcomes = _outcomes(played, team_ids, rules)
+    index = np.arange(len(played), dtype=np.int64)
+    return played, {
+        "team_id": np.concatenate([team_ids[outcomes.home_index], team_ids[outcomes.away_index]]),
+        "match": np.concatenate([index, index]),
+        "home": np.concatenate([np.ones(len(played), dtype=bool), np.zeros(len(played), dtype=bool)]),
+        "goals_for": np.concatenate([outcomes.home_goals, outcomes.away_goals]),
+        "goals_against": np.concatenate([outcomes.away_goals, outcomes.home_goals]),
+        "points": np.concatenate([outcomes.home_points, outcomes.away_points]),
+    }
+
+
+def _rounds(played: Sequence[Mapping[str, Any]]):
+    """Index of every played match's round, and the rounds in order of their first match"""
+    rounds: Dict[Any, Dict[str, Any]] = {}
+    keys = []
+    for match in played:
+        date = match["match_date"]
+        # Matches without a round are grouped by day
+        key = ("round", match["round_id"]) if match["round_id"] is not None else ("day", date.date() if date else None)
+        keys.append(key)
+        round_ = rounds.setdefault(key, {"round_id": match["round_id"], "round_name": match["round_name"], "first": date})
+        if date is not None and (round_["first"] is None or date < round_["first"]):
+            round_["first"] = date
+
+    def order(key):
+        first, round_id = rounds[key]["first"], rounds[key]["round_id"] or 0
+        return (0, first, round_id) if first is not None else (1, round_id)
+
+    ordered = sorted(rounds, key=order)
+    index = {key: i for i, key in enumerate(ordered)}
+    info = [{"round_id": rounds[key]["round_id"], "round_name": rounds[key]["round_name"],
+             "date": rounds[key]["first"].date().isoformat() if rounds[key]["first"] else None} for key in ordered]
+    return np.array([index[key] for key in keys], dtype=np.int64), info
+
+
+def standings_timeline(matches: Sequence[Mapping[str, Any]],
+                       rules: PointRules = DEFAULT_POINT_RULES) -> Dict[str, Any]:
+    """
+    The table after every round of a tournament, from the same matches as
+    compute_standings plus their round_id, round_name and match_date. Rounds
+    are ordered by their first match. Returns the rounds, the teams and, per
+    TIMELINE_SERIES name, one list of per-round values for each team (in
+    the order of teams). Every counter is a cumulative sum over a rounds x
+    teams matrix, so the whole season is computed at once.
+    """
+    if np is None:
+        raise RuntimeError("Computing standings needs numpy (pip install numpy)")
+
+    names, played = _teams_and_played(matches)
+    team_ids = np.array(sorted(names), dtype=np.int64)
+    teams = len(team_ids)
+    outcomes = _outcomes(played, team_ids, rules)
+    round_index, rounds = _rounds(played)
+    cells = len(rounds) * teams
+
+    def cumulative(home_values, away_values):
+        per_round = (np.bincount(round_index * teams + outcomes.home_index, weights=home_values, minlength=cells)
+                     + np.bincount(round_index * teams + outcomes.away_index, weights=away_values, minlength=cells))
+        return per_round.reshape(len(rounds), teams).cumsum(axis=0).astype(np.int64)
+
+    ones = np.ones(len(played), dtype=np.int64)
+    series = {
+        "points": cumulative(outcomes.home_points, outcomes.away_points),
+        "matches_played": cumulative(ones, ones),
+        "goals_scored": cumulative(outcomes.home_goals, outcomes.away_goals),
+        "goals_conceded": cumulative(outcomes.away_goals, outcomes.home_goals),
+    }
+    # Rank within each round with the tie-breaks of compute_standings; rounds sort first
+    goals_diff = series["goals_scored"] - series["goals_conceded"]
+    order = np.lexsort((np.tile(team_ids, len(rounds)), -series["goals_scored"].ravel(), -goals_diff.ravel(),
+                        -series["points"].ravel(), np.repeat(np.arange(len(rounds)), teams)))
+    position = np.empty(cells, dtype=np.int64)
+    position[order] = np.arange(cells) % max(teams, 1) + 1
+    series["position"] = position.reshape(len(rounds), teams)
+
+    return {
+        "rounds": rounds,
+        "teams": [{"team_id": int(team_id), **names[int(team_id)]} for team_id in team_ids],
+        "series": {name: series[name].T.tolist() for name in TIMELINE_SERIES},
+    }
+
+
+def standings_differences(computed: Sequence[Mapping[str, Any]], stored: Sequence[Mapping[str, Any]],
+                          columns: Sequence[str] = CHECK_COLUMNS) -> List[Dict[str, Any]]:
+    """Where a computed table and a stored one disagree, per team and column; a missing team is one difference"""
+    stored_by_team = {row["team_id"]: row for row in stored}
+    computed_by_team = {row["team_id"]: row for row in computed}
+    differences = []
+    for team_id in sorted(computed_by_team.keys() | stored_by_team.keys()):
+        ours, theirs = computed_by_team.get(team_id), stored_by_team.get(team_id)
+        if ours is None or theirs is None:
+            differences.append({"team_id": team_id, "column": None, "computed": ours is not None,
+                                "stored": theirs is not None})
+            continue
+        for column in columns:
+            if theirs.get(column) is not None and ours[column] != theirs[column]:
+                differences.append({"team_id": team_id, "column": column, "computed": ours[column],
+                                    "stored": theirs[column]})
+    return differences
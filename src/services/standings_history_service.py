@@ -0,0 +1,51 @@
+# src/services/standings_history_service.py
+from datetime import datetime
+from typing import Iterable, Optional
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from src.models.match import Match
+from src.models.standings_history import StandingsHistory
+from src.services import standings_engine
+from src.services.standings_engine import DEFAULT_POINT_RULES, PointRules, standings_timeline
+from src.utils.logging_config import setup_logging
+
+logger = setup_logging("standings_history_service")
+
+# matches columns standings_timeline reads
+_TIMELINE_COLUMNS = (Match.hometeam_id, Match.awayteam_id, Match.hometeam, Match.awayteam,
+                     Match.hometeam_overridden_name, Match.awayteam_overridden_name,
+                     Match.home_goals, Match.away_goals, Match.match_end_result,
+                     Match.round_id, Match.round_name, Match.match_date)
+
+
+class StandingsHistoryService:
+    """Keeps standings_history in step with matches, one tournament at a time"""
+
+    def refresh_history(self, db: Session, tournament_ids: Optional[Iterable[int]] = None,
+                        rules: PointRules = DEFAULT_POINT_RULES) -> int:
+        """
+        Recompute the timelines of the given tournaments (every tournament with
+        matches if None); tournaments without a played match lose their row.
+        The caller commits. Returns the number of timelines written.
+        """
+        if standings_engine.np is None:
+            logger.warning("numpy is not installed, standings history not refreshed")
+            return 0
+        if tournament_ids is None:
+            tournament_ids = db.execute(select(Match.tournament_id).distinct()).scalars().all()
+
+        written = 0
+        now = datetime.now()
+        for tournament_id in sorted(set(tournament_ids)):
+            matches = db.execute(
+                select(*_TIMELINE_COLUMNS).where(Match.tournament_id == tournament_id)
+            ).mappings().all()
+            timeline = standings_timeline(matches, rules)
+            db.query(StandingsHistory).filter(
+                StandingsHistory.tournament_id == tournament_id
+            ).delete(synchronize_session=False)
+            if timeline["rounds"]:
+                db.execute(insert(StandingsHistory), [{"tournament_id": tournament_id, **timeline,
+                                                       "point_rules": rules._asdict(), "updated_at": now}])
+                written += 1
+        return written
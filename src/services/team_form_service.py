@@ -0,0 +1,169 @@
+# src/services/team_form_service.py
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from src.models.match import Match
+from src.models.team_form import TeamForm
+from src.services.standings_engine import DEFAULT_POINT_RULES, PointRules, team_results
+from src.utils.logging_config import setup_logging
+
+try:
+    import numpy as np
+except ImportError:  # optional: without numpy there is no team form
+    np = None
+
+logger = setup_logging("team_form_service")
+
+# Games of the rolling averages in TeamForm.trend
+FORM_TREND_WINDOW = 5
+
+_FORM_COLUMNS = (Match.match_id, Match.hometeam_id, Match.awayteam_id, Match.hometeam, Match.awayteam,
+                 Match.hometeam_overridden_name, Match.awayteam_overridden_name,
+                 Match.home_goals, Match.away_goals, Match.match_end_result, Match.match_date)
+
+# What a match contributes to form; a team's form changes when one of its matches' changes
+_SIGNATURE = ("hometeam_id", "awayteam_id", "home_goals", "away_goals", "match_end_result", "match_date")
+
+
+def _signatures(matches: Iterable[Mapping[str, Any]]) -> Dict[int, Tuple]:
+    return {match["match_id"]: tuple(match[column] for column in _SIGNATURE) for match in matches}
+
+
+def changed_teams(before: Mapping[int, Tuple], after: Mapping[int, Tuple]) -> set:
+    """Teams of the matches added, removed or changed between two sets of signatures"""
+    teams = set()
+    for match_id in before.keys() | after.keys():
+        old, new = before.get(match_id), after.get(match_id)
+        if old != new:
+            for signature in (old, new):
+                if signature is not None:
+                    teams.update(team for team in signature[:2] if team is not None)
+    return teams
+
+
+def _letters(goals_for, goals_against) -> List[str]:
+    return np.where(goals_for > goals_against, "W", np.where(goals_for < goals_against, "L", "D")).tolist()
+
+
+def _rolling_mean(values, window: int) -> List[float]:
+    """Mean of each game and the window - 1 before it (fewer at the start), from one cumulative sum"""
+    totals = np.concatenate([[0], np.cumsum(values)])
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    return np.round((totals[end] - totals[start]) / (end - start), 2).tolist()
+
+
+def build_form(tournament_id: int, team_id: int, team_name: Optional[str], games: Sequence[Mapping[str, Any]],
+               results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    team_form row of a team from its played matches (oldest first) and its
+    rows of team_results, in the same order.
+    """
+    goals_for, goals_against, points, home = (results[name] for name in ("goals_for", "goals_against", "points", "home"))
+    letters = _letters(goals_for, goals_against)
+
+    def form(mask, window):
+        return "".join(np.array(letters, dtype=object)[mask][-window:][::-1]) if mask.any() else None
+
+    everything = np.ones(len(letters), dtype=bool)
+    # Length of the run of results equal to the latest one, and of games since the last loss
+    different = np.flatnonzero(np.array(letters) != letters[-1])
+    losses = np.flatnonzero(np.array(letters) == "L")
+    return {
+        "tournament_id": tournament_id, "team_id": team_id, "team_name": team_name,
+        "games_played": len(letters),
+        "form_last5": form(everything, 5), "form_last10": form(everything, 10),
+        "points_last5": int(points[-5:].sum()), "points_last10": int(points[-10:].sum()),
+        "goals_for_last5": int(goals_for[-5:].sum()), "goals_against_last5": int(goals_against[-5:].sum()),
+        "goals_for_last10": int(goals_for[-10:].sum()), "goals_against_last10": int(goals_against[-10:].sum()),
+        "home_form_last5": form(home, 5), "away_form_last5": form(~home, 5),
+        "home_points_last5": int(points[home][-5:].sum()), "away_points_last5": int(points[~home][-5:].sum()),
+        "streak_type": letters[-1],
+        "streak_length": len(letters) - (int(different[-1]) + 1 if len(different) else 0),
+        "unbeaten_streak": len(letters) - (int(losses[-1]) + 1 if len(losses) else 0),
+        "trend": {
+            "match_ids": [game["match_id"] for game in games],
+            "goals_for_avg": _rolling_mean(goals_for, FORM_TREND_WINDOW),
+            "goals_against_avg": _rolling_mean(goals_against, FORM_TREND_WINDOW),
+            "points_avg": _rolling_mean(points, FORM_TREND_WINDOW),
+        },
+        "last_match_date": games[-1]["match_date"],
+    }
+
+
+def compute_form(tournament_id: int, matches: Sequence[Mapping[str, Any]], team_ids: Iterable[int],
+                 rules: PointRules = DEFAULT_POINT_RULES) -> List[Dict[str, Any]]:
+    """team_form rows of the given teams of a tournament; teams without a played match get none"""
+    played, results = team_results(matches, rules)
+    # Chronological position of each played match
+    chronological = sorted(range(len(played)), key=lambda i: (0, played[i]["match_date"], played[i]["match_id"])
+                           if played[i]["match_date"] is not None else (1, played[i]["match_id"]))
+    rank = np.empty(len(played), dtype=np.int64)
+    rank[chronological] = np.arange(len(played))
+
+    rows = []
+    for team_id in sorted(set(team_ids)):
+        rows_of_team = np.flatnonzero(results["team_id"] == team_id)
+        if not len(rows_of_team):
+            continue
+        rows_of_team = rows_of_team[np.argsort(rank[results["match"][rows_of_team]])]
+        games = [played[i] for i in results["match"][rows_of_team]]
+        last = games[-1]
+        side = "home" if last["hometeam_id"] == team_id else "away"
+        team_name = last[f"{side}team_overridden_name"] or last[f"{side}team"]
+        rows.append(build_form(tournament_id, team_id, team_name, games,
+                               {name: values[rows_of_team] for name, values in results.items()}))
+    return rows
+
+
+class TeamFormService:
+    """Keeps team_form in step with matches, for the teams whose matches changed"""
+
+    def match_signatures(self, db: Session, tournament_id: int) -> Dict[int, Tuple]:
+        """The tournament's matches as refresh_form compares them; take them before the matches are saved"""
+        return _signatures(db.execute(
+            select(Match.match_id, *(getattr(Match, column) for column in _SIGNATURE))
+            .where(Match.tournament_id == tournament_id)
+        ).mappings())
+
+    def refresh_form(self, db: Session, tournament_id: int, rules: PointRules = DEFAULT_POINT_RULES,
+                     before: Optional[Mapping[int, Tuple]] = None) -> int:
+        """
+        Recompute the form of the tournament's teams whose matches differ from
+        before (match_signatures taken ahead of the save), or of all its teams
+        if None or if any stored form was computed under other point rules.
+        The caller commits. Returns the number of teams recomputed.
+        """
+        if np is None:
+            logger.warning("numpy is not installed, team form not refreshed")
+            return 0
+        matches = db.execute(select(*_FORM_COLUMNS).where(Match.tournament_id == tournament_id)).mappings().all()
+        if before is not None and any(stored != rules._asdict() for stored in db.execute(
+                select(TeamForm.point_rules).where(TeamForm.tournament_id == tournament_id)).scalars()):
+            # The points of every team change with the rules, not only of those whose matches did
+            before = None
+        if before is None:
+            teams = db.execute(
+                select(TeamForm.team_id).where(TeamForm.tournament_id == tournament_id)
+            ).scalars().all()
+            teams = (set(teams) | {m[f"{side}team_id"] for m in matches for side in ("home", "away")}) - {None}
+        else:
+            teams = changed_teams(before, _signatures(matches))
+        if not teams:
+            return 0
+
+        rows = compute_form(tournament_id, matches, teams, rules)
+        db.query(TeamForm).filter(
+            TeamForm.tournament_id == tournament_id, TeamForm.team_id.in_(teams)
+        ).delete(synchronize_session=False)
+        if rows:
+            now = datetime.now()
+            db.execute(insert(TeamForm), [{**row, "point_rules": rules._asdict(), "updated_at": now} for row in rows])
+        logger.info("Refreshed team form", extra={"tournament_id": tournament_id, "team_count": len(teams)})
+        return len(teams)
+
+    def refresh_all(self, db: Session, rules: PointRules = DEFAULT_POINT_RULES) -> int:
+        """Recompute the form of every team of every tournament with matches; the caller commits"""
+        tournament_ids = db.execute(select(Match.tournament_id).distinct()).scalars().all()
+        return sum(self.refresh_form(db, tournament_id, rules) for tournament_id in sorted(tournament_ids))
@@ -5,6 +5,7 @@ from datetime import datetime
 from typing import Optional, Tuple
 from sqlalchemy.orm import Session
 from src.config.settings import Settings
+from src.models.person import Person
 from src.models.team_member_custom_data import TeamMemberCustomData
 from src.utils.logging_config import setup_logging
 from src.services.minio_service import MinioService
@@ -18,11 +19,9 @@ class PersonImageService:
     def __init__(self):
         self.minio_service = MinioService()
     
-    async def save_person_images(self, db: Session, person_id: int, image_url: Optional[str], image2_url: Optional[str]) -> None:
-        """Download and save person images to MinIO"""
-
-        existing_image = db.query(TeamMemberCustomData).filter(TeamMemberCustomData.person_id == person_id).first()
-
+    async def _download_person_images(self, person_id: int, image_url: Optional[str],
+                                      image2_url: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """Download both images of a person into MinIO, returning their object keys"""
         image_object_key = None
         image2_object_key = None
         
@@ -34,7 +33,20 @@ class PersonImageService:
         if image2_url:
             image2_object_key = await self.minio_service.download_and_store_image(person_id, image2_url, False)
         
-        # Update database - much simpler now!
+        return image_object_key, image2_object_key
+
+    def _store_image_keys(self, db: Session, existing_image: Optional[TeamMemberCustomData], person_id: int,
+                          image_url: Optional[str], image2_url: Optional[str],
+                          image_object_key: Optional[str], image2_object_key: Optional[str]) -> TeamMemberCustomData:
+        """Record the object keys on the person's custom data row, creating it if needed, and on their persons row"""
+        keys = {}
+        if image_object_key:
+            keys["image_object_key"] = image_object_key
+        if image2_object_key:
+            keys["image2_object_key"] = image2_object_key
+        if keys:
+            db.query(Person).filter(Person.person_id == person_id).update(keys, synchronize_session=False)
+
         if existing_image:
             if image_object_key:
                 existing_image.image_object_key = image_object_key
@@ -46,18 +58,31 @@ class PersonImageService:
             
             existing_image.updated_at = datetime.now()
             existing_image.last_fetched_at = datetime.now()
-        else:
-            new_image = TeamMemberCustomData(
-                person_id=person_id,
-                image_object_key=image_object_key,
-                image2_object_key=image2_object_key,
-                original_image_url=image_url,
-                original_image2_url=image2_url,
-                created_at=datetime.now(),
-                updated_at=datetime.now(),
-                last_fetched_at=datetime.now()
-            )
-            db.add(new_image)
+            return existing_image
+        
+        new_image = TeamMemberCustomData(
+            person_id=person_id,
+            image_object_key=image_object_key,
+            image2_object_key=image2_object_key,
+            original_image_url=image_url,
+            original_image2_url=image2_url,
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+            last_fetched_at=datetime.now()
+        )
+        db.add(new_image)
+        return new_image
+
+    async def save_person_images(self, db: Session, person_id: int, image_url: Optional[str], image2_url: Optional[str]) -> None:
+        """Download and save person images to MinIO"""
+
+        existing_image = db.query(TeamMemberCustomData).filter(TeamMemberCustomData.person_id == person_id).first()
+
+        image_object_key, image2_object_key = await self._download_person_images(person_id, image_url, image2_url)
+        
+        # Update database - much simpler now!
+        self._store_image_keys(db, existing_image, person_id, image_url, image2_url,
+                               image_object_key, image2_object_key)
         
         try:
             db.commit()
@@ -74,15 +99,62 @@ class PersonImageService:
             })
             raise
 
+    async def save_person_images_bulk(self, db: Session, images: Dict[int, Tuple[Optional[str], Optional[str]]],
+                                      delay: float = 0.0, commit_every: int = 50) -> int:
+        """
+        Download and save images for many persons, each person once.
+        Existing custom data rows are loaded up front in a few IN queries and
+        references are committed in batches rather than per person.
+        """
+        person_ids = list(images)
+        existing_by_person = {}
+        for i in range(0, len(person_ids), 1000):
+            rows = db.query(TeamMemberCustomData).filter(
+                TeamMemberCustomData.person_id.in_(person_ids[i:i + 1000])
+            ).all()
+            existing_by_person.update((row.person_id, row) for row in rows)
+        
+        processed = 0
+        pending = 0
+        for person_id, (image_url, image2_url) in images.items():
+            try:
+                image_object_key, image2_object_key = await self._download_person_images(person_id, image_url, image2_url)
+                # A savepoint per person, so one bad row does not undo the rest of the batch
+                with db.begin_nested():
+                    existing_by_person[person_id] = self._store_image_keys(
+                        db, existing_by_person.get(person_id), person_id, image_url, image2_url,
+                        image_object_key, image2_object_key
+                    )
+                processed += 1
+                pending += 1
+                if pending >= commit_every:
+                    db.commit()
+                    pending = 0
+            except Exception as e:
+                logger.error("Error processing images for person", extra={
+                    "person_id": person_id,
+                    "error": str(e)
+                })
+            if delay:
+                # Small delay between image downloads to be nice to the server
+                await asyncio.sleep(delay)
+        
+        db.commit()
+        logger.info("Saved person image references", extra={
+            "person_count": len(images),
+            "processed": processed
+        })
+        return processed
+
 # get the urls for the images of a person
 def get_person_image_urls(self, person_id: int, expires: timedelta = timedelta(hours=1)) -> Dict[str, Optional[str]]:
     """
     Get presigned URLs for a person's images by looking up the database first.
     This is more reliable than guessing the object key format.
     """
-    from src.utils.database import get_db
+    from src.utils.database import get_read_session
     
-    db = next(get_db())
+    db = get_read_session()
     try:
         person_image = db.query(TeamMemberCustomData).filter(
             TeamMemberCustomData.person_id == person_id
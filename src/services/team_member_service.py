@@ -1,19 +1,73 @@
-import httpx
 import asyncio
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, insert, select, update
 from src.config.settings import Settings
+from src.models.person import Person
 from src.models.team_member import TeamMember
+from src.models.team_roster_count import TeamRosterCount
 from src.utils.logging_config import setup_logging
+from src.utils.resilience import fetch_json
 from datetime import datetime, date
 from src.services.team_member_image_service import PersonImageService
+from src.utils.staging import StagedRefresh
 
 
 # Set up logging
 logger = setup_logging("team_member_service")
 
+# Image URLs carry a fresh JWT on every fetch, so they alone never count as a change
+TEAM_MEMBER_REFRESH = StagedRefresh(TeamMember, key_columns=("person_id", "team_id"),
+                                    volatile_columns=("image_url", "image2_url"))
+
+# team_members columns copied to the person's persons row
+PERSON_FIELDS = ("first_name", "last_name", "birth_date", "gender", "nationality", "height")
+
+@dataclass
+class RosterPlan:
+    """
+    Person-level work collected over one roster run. Membership rows are keyed
+    by team and person, images by person, so a person on several teams (the
+    same club team in several tournaments, or several age groups) is written
+    and downloaded once.
+    """
+    members_by_team: Dict[int, Dict[int, Dict[str, Any]]] = field(default_factory=dict)
+    images_by_person: Dict[int, Tuple[Optional[str], Optional[str]]] = field(default_factory=dict)
+    duplicate_image_jobs: int = 0
+
+    @property
+    def member_count(self) -> int:
+        return sum(len(rows) for rows in self.members_by_team.values())
+
+    def person_rows(self) -> Dict[int, Dict[str, Any]]:
+        """persons rows of everyone planned; per column, the first value any of their rosters has"""
+        persons: Dict[int, Dict[str, Any]] = {}
+        for rows in self.members_by_team.values():
+            for person_id, row in rows.items():
+                person = persons.setdefault(person_id, {column: None for column in PERSON_FIELDS})
+                for column in PERSON_FIELDS:
+                    if person[column] is None:
+                        person[column] = row[column]
+        return persons
+
+    def roster_counts(self, team_id: int) -> Dict[str, Any]:
+        """team_roster_counts row for a planned team"""
+        rows = self.members_by_team[team_id].values()
+        players = [row for row in rows if row["member_type"] == "Player"]
+        positions: Dict[str, int] = {}
+        for row in players:
+            if row["position"]:
+                positions[row["position"]] = positions.get(row["position"], 0) + 1
+        return {
+            "team_id": team_id,
+            "member_count": len(rows),
+            "player_count": len(players),
+            "staff_count": len(rows) - len(players),
+            "position_counts": positions,
+        }
+
 class TeamMemberService:
     def __init__(self):
         self.settings = Settings()
@@ -21,56 +75,26 @@ class TeamMemberService:
         self.person_image_service = PersonImageService() # for getting the images, due to jwt in urls
 
     
-    async def fetch_team_members(self, team_id: int, max_retries: int = 3) -> Dict[str, Any]:
+    async def fetch_team_members(self, team_id: int, max_retries: Optional[int] = None) -> Dict[str, Any]:
         """Fetch members (players, coaches) for a specific team"""
         if not isinstance(team_id, int) or team_id <= 0:
             raise ValueError(f"Invalid team_id: {team_id}")
             
-        retries = 0
-        logger.info("Fetching team members", extra={
-            "team_id": team_id,
-            "retry_count": retries,
-            "max_retries": max_retries
-        })
+        logger.info("Fetching team members", extra={"team_id": team_id})
+        data = await fetch_json(
+            f"{self.base_url}/ta/TeamMembers/{team_id}",
+            what=f"team members for team {team_id}", max_attempts=max_retries
+        )
         
-        while retries < max_retries:
-            try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(
-                        f"{self.base_url}/ta/TeamMembers/{team_id}"
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # Make sure we got a list back
-                    if not isinstance(data, list):
-                        data = [data] if data else []
-                        
-                    logger.info("Successfully fetched team members", extra={
-                        "team_id": team_id,
-                        "member_count": len(data)
-                    })
-                    return {"team_id": team_id, "members": data}
+        # Make sure we got a list back
+        if not isinstance(data, list):
+            data = [data] if data else []
             
-            except (httpx.HTTPError, httpx.TimeoutException) as e:
-                retries += 1
-                logger.warning("API request failed, retrying", extra={
-                    "team_id": team_id,
-                    "retry_count": retries,
-                    "max_retries": max_retries,
-                    "error": str(e),
-                    "wait_seconds": 2 ** retries
-                })
-                
-                if retries == max_retries:
-                    logger.error("Failed to fetch team members after maximum retries", extra={
-                        "team_id": team_id,
-                        "retry_count": retries,
-                        "error": str(e)
-                    })
-                    raise Exception(f"Failed to fetch team members after {max_retries} attempts: {str(e)}")
-                    
-                await asyncio.sleep(2 ** retries)  # Exponential backoff
+        logger.info("Successfully fetched team members", extra={
+            "team_id": team_id,
+            "member_count": len(data)
+        })
+        return {"team_id": team_id, "members": data}
     
     def _parse_date(self, date_str: str | None) -> date | None:
         """Parse a date string to a date object"""
@@ -82,17 +106,35 @@ class TeamMemberService:
         except (ValueError, AttributeError):
             return None
     
-    def save_team_members(self, db: Session, data: Dict[str, Any]) -> None:
-        """Save team members to the database"""
+    def _member_row(self, team_id: int, member_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map one roster entry from the API to a team_members row"""
+        return {
+            "person_id": member_data["personId"],
+            "team_id": team_id,
+            "first_name": member_data.get("firstName"),
+            "last_name": member_data.get("lastName"),
+            "nationality": member_data.get("nationality"),
+            "birth_date": self._parse_date(member_data.get("birthDate")),
+            "gender": member_data.get("gender"),
+            "height": member_data.get("height"),
+            "number": member_data.get("number"),
+            "position": member_data.get("position"),
+            "owning_org_id": member_data.get("owningOrgId"),
+            "member_type": member_data.get("memberType"),
+            # dont need these, since they wont work due to jwt
+            "image_url": member_data.get("imageUrl"),
+            "image2_url": member_data.get("image2Url"),
+        }
+
+    def plan_roster(self, plan: "RosterPlan", data: Dict[str, Any]) -> int:
+        """
+        Add a fetched roster (see fetch_team_members) to the plan; returns the
+        members added. A roster without members is planned too, so saving the
+        plan deletes the team's old rows.
+        """
         team_id = data["team_id"]
+        rows = plan.members_by_team.setdefault(team_id, {})
         
-        # Delete existing team members for this team to avoid duplicates
-        db.query(TeamMember).filter(TeamMember.team_id == team_id).delete()
-        db.commit()
-        
-        members_to_add = []
-        image_tasks = [] # store image download tasks
-
         for member_data in data.get("members", []):
             person_id = member_data.get("personId")
             if not person_id:
@@ -101,62 +143,130 @@ class TeamMemberService:
                     "member_data": str(member_data)[:100] + "..."
                 })
                 continue
-                
-            member = TeamMember(
-                person_id=person_id,
-                team_id=team_id,
-                first_name=member_data.get("firstName"),
-                last_name=member_data.get("lastName"),
-                nationality=member_data.get("nationality"),
-                birth_date=self._parse_date(member_data.get("birthDate")),
-                gender=member_data.get("gender"),
-                height=member_data.get("height"),
-                number=member_data.get("number"),
-                position=member_data.get("position"),
-                owning_org_id=member_data.get("owningOrgId"),
-                member_type=member_data.get("memberType"),
-                # dont need these, since they wont work due to jwt
-                image_url=member_data.get("imageUrl"),
-                image2_url=member_data.get("image2Url"),
-                created_at=datetime.now(),
-                updated_at=datetime.now()
-            )
-            members_to_add.append(member)
-
-            # Collect image URLs for later processing
+            rows.setdefault(person_id, self._member_row(team_id, member_data))
+            
+            # A person on several teams gets one image job, from the first roster seen
             image_url = member_data.get("imageUrl")
             image2_url = member_data.get("image2Url")
             if image_url or image2_url:
-                image_tasks.append((person_id, image_url, image2_url))
+                if person_id in plan.images_by_person:
+                    plan.duplicate_image_jobs += 1
+                else:
+                    plan.images_by_person[person_id] = (image_url, image2_url)
         
+        return len(rows)
+
+    def save_roster_plan(self, db: Session, plan: "RosterPlan", teams_per_batch: int = 200) -> int:
+        """
+        Write the membership rows of every planned team, and their
+        team_roster_counts in the same transaction. In replace mode the old
+        rows of a batch of teams go in one DELETE and the new rows in one
+        executemany INSERT, instead of a delete, insert and commit per team.
+        """
+        if self.settings.INGEST_REFRESH_MODE == "swap":
+            for team_id, rows in plan.members_by_team.items():
+                # Committed by the swap, together with the members
+                self._save_roster_counts(db, plan, [team_id])
+                TEAM_MEMBER_REFRESH.refresh(db, {"team_id": team_id}, list(rows.values()))
+            self._save_persons(db, plan)
+            return plan.member_count
         
-        # Add all new members to the database
-        if members_to_add:
-            db.add_all(members_to_add)
-            
+        team_ids = list(plan.members_by_team)
+        written = 0
+        for i in range(0, len(team_ids), teams_per_batch):
+            batch = team_ids[i:i + teams_per_batch]
+            now = datetime.now()
+            rows = [
+                {**row, "created_at": now, "updated_at": now}
+                for team_id in batch for row in plan.members_by_team[team_id].values()
+            ]
             try:
+                db.query(TeamMember).filter(TeamMember.team_id.in_(batch)).delete(synchronize_session=False)
+                if rows:
+                    db.execute(insert(TeamMember), rows)
+                self._save_roster_counts(db, plan, batch)
                 db.commit()
-                logger.info("Successfully saved team members", extra={
-                    "team_id": team_id,
-                    "member_count": len(members_to_add)
-                })
             except Exception as e:
                 db.rollback()
                 logger.error("Error saving team members", extra={
-                    "team_id": team_id,
+                    "team_ids": batch,
                     "error": str(e)
                 })
                 raise
-        else:
-            logger.info("No team members to save", extra={"team_id": team_id})
+            written += len(rows)
+        self._save_persons(db, plan)
+        
+        logger.info("Successfully saved team members", extra={
+            "team_count": len(team_ids),
+            "member_count": written
+        })
+        return written
+
+    def _save_roster_counts(self, db: Session, plan: "RosterPlan", team_ids: List[int]) -> None:
+        """Replace the roster counts of the teams; the caller commits"""
+        now = datetime.now()
+        db.query(TeamRosterCount).filter(TeamRosterCount.team_id.in_(team_ids)).delete(synchronize_session=False)
+        db.execute(insert(TeamRosterCount), [{**plan.roster_counts(team_id), "updated_at": now} for team_id in team_ids])
+
+    def _save_persons(self, db: Session, plan: "RosterPlan", batch_size: int = 1000) -> None:
+        """Insert the planned persons, or update those whose demographics changed, and commit"""
+        persons = plan.person_rows()
+        person_ids = list(persons)
+        now = datetime.now()
+        changed = 0
+        for i in range(0, len(person_ids), batch_size):
+            batch = person_ids[i:i + batch_size]
+            existing = {
+                row["person_id"]: row
+                for row in db.execute(select(Person.__table__).where(Person.person_id.in_(batch))).mappings()
+            }
+            inserts, updates = [], []
+            for person_id in batch:
+                row = persons[person_id]
+                old = existing.get(person_id)
+                if old is None:
+                    inserts.append({"person_id": person_id, **row, "updated_at": now})
+                    continue
+                # A roster without a value keeps the one an earlier roster gave
+                new = {column: old[column] if row[column] is None else row[column] for column in PERSON_FIELDS}
+                if any(new[column] != old[column] for column in PERSON_FIELDS):
+                    updates.append({"person_id": person_id, **new, "updated_at": now})
+            try:
+                if inserts:
+                    db.execute(insert(Person), inserts)
+                if updates:
+                    db.execute(update(Person), updates)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error("Error saving persons", extra={"person_count": len(batch), "error": str(e)})
+                raise
+            changed += len(inserts) + len(updates)
+        logger.info("Saved persons", extra={"person_count": len(person_ids), "changed": changed})
+
+    async def process_roster_images(self, db: Session, plan: "RosterPlan") -> int:
+        """Download and store the images of every planned person, once per person"""
+        if plan.duplicate_image_jobs:
+            logger.info("Skipped duplicate image jobs for persons on several teams", extra={
+                "skipped": plan.duplicate_image_jobs,
+                "persons": len(plan.images_by_person)
+            })
+        return await self.person_image_service.save_person_images_bulk(
+            db, plan.images_by_person, delay=0.2 * self.settings.INGEST_THROTTLE_SCALE
+        )
 
+    def save_team_members(self, db: Session, data: Dict[str, Any]) -> None:
+        """Save the members of a single team; use a RosterPlan when saving many teams"""
+        plan = RosterPlan()
+        if not self.plan_roster(plan, data):
+            # Still saved: an empty roster deletes the team's old members
+            logger.info("No team members", extra={"team_id": data["team_id"]})
+        self.save_roster_plan(db, plan)
 
         # Process images asynchronously after saving team members
-        if image_tasks:
+        if plan.images_by_person:
+            image_tasks = [(person_id, urls[0], urls[1]) for person_id, urls in plan.images_by_person.items()]
             asyncio.create_task(self._process_member_images(db, image_tasks))
-        
-        if not members_to_add:
-            logger.info("No team members to save", extra={"team_id": team_id})
     
     async def _process_member_images(self, db: Session, image_tasks: list):
         """Process member images asynchronously"""
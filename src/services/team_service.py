@@ -1,57 +1,59 @@
-import httpx
 from datetime import datetime
 from sqlalchemy.orm import Session
-import asyncio
+from typing import Optional
 from src.config.settings import Settings
 from src.models.team import Team
+from src.utils.staging import StagedRefresh
+from src.utils.resilience import fetch_json
+
+TEAM_REFRESH = StagedRefresh(Team, key_columns=("team_id", "tournament_id"))
 
 class TeamService:
     def __init__(self):
         self.settings = Settings()
         self.base_url = self.settings.API_BASE_URL
 
-    async def fetch_tournament_teams(self, tournament_id: int,  max_retries: int = 3) -> dict:
+    async def fetch_tournament_teams(self, tournament_id: int, max_retries: Optional[int] = None) -> dict:
         if not isinstance(tournament_id, int) or tournament_id <= 0:
             raise ValueError(f"Invalid tournament_id: {tournament_id}")
-        retries = 0
-        while retries < max_retries:
-            try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(
-                        f"{self.base_url}/ta/TournamentTeams/?tournamentId={tournament_id}"
-                    )
-                    response.raise_for_status()
-                    return response.json()
-            except (httpx.HTTPError, httpx.TimeoutException) as e:
-                retries += 1
-                if retries == max_retries:
-                    raise Exception(f"Failed to fetch data after {max_retries} attempts: {str(e)}")
-                await asyncio.sleep(2 ** retries)  # Exponential backoff
+        return await fetch_json(
+            f"{self.base_url}/ta/TournamentTeams/?tournamentId={tournament_id}",
+            what=f"teams for tournament {tournament_id}", max_attempts=max_retries
+        )
+
+    def _build_team(self, tournament_id: int, team_data: dict) -> Team:
+        return Team(
+            team_id=team_data["teamId"],
+            tournament_id=tournament_id,
+            club_org_id=team_data["clubOrgId"],
+            team_no=team_data["teamNo"],
+            team_name=team_data["team"],
+            overridden_name=team_data["overriddenName"],
+            describing_name=team_data["describingName"]
+        )
 
-    def save_tournament_teams(self, db: Session, data: dict):
+    def save_tournament_teams(self, db: Session, data: dict) -> int:
+        """Save a tournament's teams; returns the teams saved, in either refresh mode"""
         tournament_id = data["tournamentId"]
         
+        if self.settings.INGEST_REFRESH_MODE == "swap":
+            teams = [self._build_team(tournament_id, team_data) for team_data in data.get("teams", [])]
+            return TEAM_REFRESH.refresh(db, {"tournament_id": tournament_id}, teams).staged_rows
+        
         # First, delete existing teams for this tournament to avoid duplicates
         db.query(Team).filter(Team.tournament_id == tournament_id).delete()
         
         # Rollback needed after delete to ensure a clean session
         db.commit()
         
+        teams = data.get("teams", [])
         try:
-            for team_data in data.get("teams", []):
-                team = Team(
-                    team_id=team_data["teamId"],
-                    tournament_id=tournament_id,
-                    club_org_id=team_data["clubOrgId"],
-                    team_no=team_data["teamNo"],
-                    team_name=team_data["team"],
-                    overridden_name=team_data["overriddenName"],
-                    describing_name=team_data["describingName"]
-                )
-                db.add(team)
+            for team_data in teams:
+                db.add(self._build_team(tournament_id, team_data))
             
             db.commit()
         except Exception as e:
             db.rollback()
             print(f"Error saving teams for tournament {tournament_id}: {e}")
-            raise
\ No newline at end of file
+            raise
+        return len(teams)
\ No newline at end of file
@@ -1,9 +1,9 @@
-import httpx
 from datetime import datetime
 from sqlalchemy.orm import Session
-import asyncio
+from typing import AsyncIterator, List, Optional
 from src.config.settings import Settings
 from src.models.tournament import Tournament, TournamentClass
+from src.utils.resilience import fetch_json, stream_json_chunks
 from src.utils.logging_config import setup_logging
 from datetime import datetime
 
@@ -16,37 +16,26 @@ class TournamentService:
         self.settings = Settings()
         self.base_url = self.settings.API_BASE_URL
 
-    async def fetch_season_tournaments(self, season_id: int, max_retries: int = 3) -> dict:
+    async def fetch_season_tournaments(self, season_id: int, max_retries: Optional[int] = None) -> dict:
         if not isinstance(season_id, int) or season_id <= 0:
             raise ValueError(f"Invalid season_id: {season_id}")
-        retries = 0
         logger.info(f"Fetching tournaments for season {season_id}")
-        while retries < max_retries:
-            try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(
-                        f"{self.base_url}/ta/Tournament/Season/{season_id}"
-                    )
-                    response.raise_for_status()
-                    return response.json()
-            
-            except (httpx.HTTPError, httpx.TimeoutException) as e:
-                retries += 1
-                logger.warning("API request failed, retrying", extra={
-                    "season_id": season_id,
-                    "retry_count": retries,
-                    "max_retries": max_retries,
-                    "error": str(e),
-                    "wait_seconds": 2 ** retries
-                })
-                if retries == max_retries:
-                    logger.error("Failed to fetch data after maximum retries", extra={
-                        "season_id": season_id,
-                        "retry_count": retries,
-                        "error": str(e)
-                    })
-                    raise Exception(f"Failed to fetch data after {max_retries} attempts: {str(e)}")
-                await asyncio.sleep(2 ** retries)  # Exponential backoff
+        return await fetch_json(
+            f"{self.base_url}/ta/Tournament/Season/{season_id}",
+            what=f"tournaments for season {season_id}", max_attempts=max_retries
+        )
+
+    async def stream_season_tournaments(self, season_id: int, chunk_size: int = 500,
+                                        max_retries: Optional[int] = None) -> AsyncIterator[List[dict]]:
+        """Stream the tournaments of a season in chunks of at most chunk_size records"""
+        if not isinstance(season_id, int) or season_id <= 0:
+            raise ValueError(f"Invalid season_id: {season_id}")
+        logger.info(f"Streaming tournaments for season {season_id}")
+        async for chunk in stream_json_chunks(
+            f"{self.base_url}/ta/Tournament/Season/{season_id}", "tournamentsInSeason.item", chunk_size,
+            what=f"tournaments for season {season_id}", max_attempts=max_retries
+        ):
+            yield chunk
 
     def _parse_date(self, date_str: str | None) -> datetime | None:
         if not date_str:
@@ -114,4 +103,13 @@ class TournamentService:
                 db.add(tournament_class)  # Use add() instead of merge()
         
         db.commit()
-        logger.info(f"Saved {len(data.get('tournamentsInSeason', []))} tournaments")
\ No newline at end of file
+        logger.info(f"Saved {len(data.get('tournamentsInSeason', []))} tournaments")
+
+    async def save_tournaments_stream(self, db: Session, chunks: AsyncIterator[List[dict]]) -> int:
+        """Save tournaments arriving as chunks (see stream_season_tournaments)"""
+        saved_count = 0
+        async for chunk in chunks:
+            self.save_tournaments(db, {"tournamentsInSeason": chunk})
+            db.expunge_all()
+            saved_count += len(chunk)
+        return saved_count
@@ -0,0 +1,185 @@
+# src/utils/data_version.py
+"""
+A global version number for the ingested data.
+
+Every commit on the primary that inserted, updated or deleted rows bumps
+data_version.version in the same transaction and sends NOTIFY data_version.
+The API keeps the current version in memory through LISTEN, so response
+caches can check freshness without a query. With a read replica the
+primary's version can be ahead of the data the replica serves, so the
+version is then read from the replica session that also runs the query.
+"""
+import re
+import select
+import threading
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from src.config.settings import get_settings
+from src.utils.logging_config import setup_logging
+
+logger = setup_logging("data_version")
+
+CHANNEL = "data_version"
+
+_DML = re.compile(r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+"?(\w+)', re.IGNORECASE)
+
+# Tables whose writes are not a change of the ingested data
+_IGNORED_TABLES = ("data_version",)
+_IGNORED_PREFIXES = ("stage_",)  # temporary staging tables, see src/utils/staging.py
+
+
+def _changes_data(statement: str) -> bool:
+    match = _DML.match(statement)
+    if not match:
+        return False
+    table = match.group(1).lower()
+    return table not in _IGNORED_TABLES and not table.startswith(_IGNORED_PREFIXES)
+
+
+_STATE_COLUMNS = "version, extract(epoch FROM updated_at::timestamptz)"
+
+
+def _bump(dbapi_connection) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("UPDATE data_version SET version = version + 1, updated_at = now() "
+                       f"WHERE id = 1 RETURNING {_STATE_COLUMNS}")
+        row = cursor.fetchone()
+        if row:
+            # Payload "<version> <updated_at epoch>", see DataVersionTracker
+            cursor.execute("SELECT pg_notify(%s, %s)", (CHANNEL, f"{row[0]} {row[1]}"))
+    finally:
+        cursor.close()
+
+
+def bump_data_version(engine: Engine) -> None:
+    """Bump the version for changes the DML hook cannot see, e.g. a materialized view refresh"""
+    with engine.begin() as conn:
+        _bump(conn.connection)
+
+
+def install_version_bump(engine: Engine) -> None:
+    """Bump the data version on every commit of this engine that wrote ingested data"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _track_writes(conn, cursor, statement, parameters, context, executemany):
+        if _changes_data(statement):
+            conn.info["data_changed"] = True
+
+    @event.listens_for(engine, "commit")
+    def _bump_on_commit(conn):
+        if not conn.info.pop("data_changed", False):
+            return
+        # Raw cursor: runs inside the transaction being committed, without re-entering the events
+        _bump(conn.connection)
+
+    @event.listens_for(engine, "rollback")
+    def _forget_writes(conn):
+        conn.info.pop("data_changed", None)
+
+
+def ensure_data_version_row(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING"))
+
+
+def _from_epoch(epoch) -> Optional[datetime]:
+    return datetime.fromtimestamp(float(epoch), tz=timezone.utc) if epoch is not None else None
+
+
+class DataVersionTracker:
+    """
+    Follows the data version and when it last changed from a background
+    thread that LISTENs on the primary. While the listener is not connected,
+    current() and state() fall back to reading the row, so a stale version
+    is never assumed. Reads that go to a replica never use the listener:
+    the replica's own row is the version of the data it serves.
+    """
+    def __init__(self, poll_seconds: float = 5.0, retry_seconds: float = 5.0):
+        self.poll_seconds = poll_seconds
+        self.retry_seconds = retry_seconds
+        self.version: Optional[int] = None
+        self.updated_at: Optional[datetime] = None
+        self.listening = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        if get_settings().DATABASE_REPLICA_URL:
+            logger.info("Reads go to a replica, data version read per request")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="data-version-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.listening = False
+
+    async def current(self, db) -> int:
+        """
+        Current data version; db is an AsyncSession used only when not
+        listening. Read it on the session of the query it versions, before it.
+        """
+        if self.listening and self.version is not None:
+            return self.version
+        result = await db.execute(text("SELECT version FROM data_version WHERE id = 1"))
+        return result.scalar() or 0
+
+    async def state(self, db) -> Tuple[int, Optional[datetime]]:
+        """Current version and the time it was bumped (UTC); db is only used when not listening"""
+        if self.listening and self.version is not None:
+            return self.version, self.updated_at
+        result = await db.execute(text(f"SELECT {_STATE_COLUMNS} FROM data_version WHERE id = 1"))
+        row = result.fetchone()
+        return (row[0], _from_epoch(row[1])) if row else (0, None)
+
+    def _set(self, version: int, epoch) -> None:
+        if self.version is None or version >= self.version:
+            self.updated_at = _from_epoch(epoch)
+            self.version = version
+
+    def _run(self) -> None:
+        from src.utils.database import get_engine
+
+        while not self._stop.is_set():
+            raw = None
+            try:
+                # Detached, so the listener does not hold a slot of the pool
+                raw = get_engine().raw_connection()
+                raw.detach()
+                dbapi = raw.dbapi_connection
+                dbapi.autocommit = True
+                cursor = dbapi.cursor()
+                cursor.execute(f"LISTEN {CHANNEL}")
+                cursor.execute(f"SELECT {_STATE_COLUMNS} FROM data_version WHERE id = 1")
+                row = cursor.fetchone()
+                self.version = None
+                self._set(*(row or (0, None)))
+                self.listening = True
+                logger.info("Listening for data version changes", extra={"version": self.version})
+
+                while not self._stop.is_set():
+                    if select.select([dbapi], [], [], self.poll_seconds) == ([], [], []):
+                        continue
+                    dbapi.poll()
+                    while dbapi.notifies:
+                        notify = dbapi.notifies.pop(0)
+                        version, _, epoch = notify.payload.partition(" ")
+                        self._set(int(version), epoch or None)
+            except Exception as e:
+                logger.warning("Data version listener disconnected", extra={"error": str(e)})
+            finally:
+                self.listening = False
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+            self._stop.wait(self.retry_seconds)
+
+
+data_version_tracker = DataVersionTracker()
@@ -1,16 +1,132 @@
+# src/utils/database.py
+"""
+The one place engines are created.
+
+Engines are built on first use, not at import, so importing a service or a
+model never opens a connection. Writes (ingestion) go to the primary; the
+read-only analytics traffic goes to DATABASE_REPLICA_URL when it is set, so
+heavy ingest does not compete with the public API for the same pool.
+"""
+from functools import lru_cache
+from typing import Any, Dict
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
 from src.config.settings import get_settings
-from src.models.tournament import Base
+from src.models.base import Base
+# import all models to ensure they are registered with SQLAlchemy
+from src.models.tournament import Tournament, TournamentClass
+from src.models.team import Team
+from src.models.match import Match
+from src.models.standing import Standing
+from src.models.organisation import Organisation
+from src.models.team_member import TeamMember
+from src.models.team_member_custom_data import TeamMemberCustomData
+from src.models.person import Person
+from src.models.team_roster_count import TeamRosterCount
+from src.models.player_statistic import PlayerStatistic
+from src.models.player_career import PlayerCareer
+from src.models.standings_history import StandingsHistory
+from src.models.head_to_head import HeadToHead
+from src.models.team_form import TeamForm
+from src.models.data_version import DataVersion
+from src.utils.data_version import ensure_data_version_row, install_version_bump
+from src.utils.materialized_views import create_materialized_views
+from src.utils.name_search import create_search_indexes
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def _pool_options(settings) -> Dict[str, Any]:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+@lru_cache()
+def get_engine() -> Engine:
+    """Engine for the primary; creates missing tables the first time it is used and bumps the data version on writes"""
+    settings = get_settings()
+    engine = create_engine(
+        settings.DATABASE_URL,
+        connect_args={"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"},
+        **_pool_options(settings)
+    )
+    Base.metadata.create_all(bind=engine)  # Create tables
+    ensure_data_version_row(engine)
+    create_search_indexes(engine)
+    create_materialized_views(engine)
+    install_version_bump(engine)
+    return engine
+
+
+@lru_cache()
+def get_read_engine() -> Engine:
+    """Engine for read-only queries: the replica if configured, else the primary"""
+    settings = get_settings()
+    if not settings.DATABASE_REPLICA_URL:
+        return get_engine()
+    return create_engine(
+        settings.READ_DATABASE_URL,
+        connect_args={"options": f"-c statement_timeout={settings.DB_READ_STATEMENT_TIMEOUT_MS}"},
+        **_pool_options(settings)
+    )
 
-settings = get_settings()
-engine = create_engine(settings.DATABASE_URL)
-Base.metadata.create_all(bind=engine)  # Create tables
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
-    db = SessionLocal()
+    """Session on the primary, for writes; closed when the generator is closed"""
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_session() -> Session:
+    """Session for read-only queries; the caller closes it"""
+    return SessionLocal(bind=get_read_engine())
+
+
+@lru_cache()
+def get_async_sessionmaker():
+    """Async engine and session factory for the API's read-only analytics, created on first use"""
+    # Imported here so the ingest scripts do not need the asyncio extras
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    settings = get_settings()
+    async_engine = create_async_engine(
+        settings.ASYNC_READ_DATABASE_URL,
+        connect_args={"server_settings": {"statement_timeout": str(settings.DB_READ_STATEMENT_TIMEOUT_MS)}},
+        **_pool_options(settings)
+    )
+    return async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+async def get_async_db():
+    """FastAPI dependency yielding an AsyncSession"""
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+def _pool_status(pool) -> Dict[str, Any]:
+    status = {"status": pool.status()}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    return status
+
+
+def pool_metrics() -> Dict[str, Any]:
+    """Connection pool usage of the engines created so far in this process"""
+    metrics = {}
+    if get_engine.cache_info().currsize:
+        metrics["primary"] = _pool_status(get_engine().pool)
+    if get_read_engine.cache_info().currsize and get_read_engine() is not get_engine():
+        metrics["replica"] = _pool_status(get_read_engine().pool)
+    if get_async_sessionmaker.cache_info().currsize:
+        async_engine = get_async_sessionmaker().kw["bind"]
+        metrics["async_read"] = _pool_status(async_engine.sync_engine.pool)
+    return metrics
@@ -0,0 +1,45 @@
+# src/utils/json_stream.py
+from typing import Any, AsyncIterator, List
+import ijson
+
+
+class _AsyncByteReader:
+    """
+    Adapts an async byte iterator (e.g. httpx ``response.aiter_bytes()``)
+    to the async ``read()`` file interface ijson expects.
+    """
+    def __init__(self, byte_iterator: AsyncIterator[bytes]):
+        self._iterator = byte_iterator.__aiter__()
+
+    async def read(self, size: int = -1) -> bytes:
+        # ijson probes the stream with read(0) to detect bytes vs str
+        if size == 0:
+            return b""
+        try:
+            return await self._iterator.__anext__()
+        except StopAsyncIteration:
+            return b""
+
+
+async def iter_json_chunks(byte_iterator: AsyncIterator[bytes], prefix: str,
+                           chunk_size: int = 500) -> AsyncIterator[List[Any]]:
+    """
+    Incrementally parse a JSON body and yield the items found under ``prefix``
+    in lists of at most ``chunk_size``.
+
+    Prefixes use ijson syntax, e.g. ``"matches.item"`` for the elements of a
+    top-level ``matches`` array or ``"item"`` for a top-level array.
+    Only one chunk is held in memory at a time, regardless of payload size.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"Invalid chunk_size: {chunk_size}")
+
+    chunk = []
+    async for item in ijson.items(_AsyncByteReader(byte_iterator), prefix, use_float=True):
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
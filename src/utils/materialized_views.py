@@ -0,0 +1,271 @@
+# src/utils/materialized_views.py
+"""
+Materialized views for the hot analytics aggregates, in the readonly schema.
+
+Leaderboards, league totals and position breakdowns used to re-join
+player_statistics with persons and team_member_custom_data on every
+request, and player percentiles need every player of a cohort. They are precomputed here once per ingest run instead: fetch_all
+refreshes them CONCURRENTLY when it is done, so the API keeps reading the
+previous contents while a refresh runs.
+"""
+import hashlib
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from src.utils.logging_config import setup_logging
+
+logger = setup_logging("materialized_views")
+
+
+class MaterializedView(NamedTuple):
+    name: str
+    query: str
+    unique_key: str  # REFRESH ... CONCURRENTLY needs a unique index covering every row
+    indexes: Tuple[str, ...] = ()
+
+
+# Stats with percentiles, by API name, and the player_statistics column behind each
+PERCENTILE_STATS = {
+    "points": "scoring_points",
+    "goals": "goals_scored",
+    "assists": "assists",
+    "plus_minus": "plus_minus",
+    "pim": "pim",
+    "shots": "shots",
+    "shots_pct": "shots_pct",
+    "faceoffs_win_pct": "faceoffs_win_pct",
+    "games_played": "games_played",
+}
+
+# Cohorts a player is ranked in, as window partitions. A class cohort is every
+# tournament of the season with the same age class (tournament_classes); a
+# tournament without a class is a cohort of its own.
+PERCENTILE_COHORTS = {
+    "tournament": "tournament_id",
+    "tournament_position": "tournament_id, position",
+    "class": "season_id, COALESCE(class_id, -tournament_id)",
+    "class_position": "season_id, COALESCE(class_id, -tournament_id), position",
+}
+
+
+def _percentile_columns() -> str:
+    """
+    Rank (1 = highest) and percentile (share of the cohort below, 0-100) of
+    every stat in every cohort, and how many players of the cohort have a
+    value for the stat, i.e. the size the rank is out of.
+    """
+    columns = [f"COUNT(*) OVER (PARTITION BY {partition}) AS {cohort}_size"
+               for cohort, partition in PERCENTILE_COHORTS.items()]
+    for stat in PERCENTILE_STATS:
+        for cohort, partition in PERCENTILE_COHORTS.items():
+            # Players without a value are ranked apart and get no rank
+            window = f"PARTITION BY {partition}, {stat} IS NULL ORDER BY {stat}"
+            columns.append(f"COUNT({stat}) OVER (PARTITION BY {partition}) AS {stat}_size_{cohort}")
+            columns.append(f"CASE WHEN {stat} IS NOT NULL THEN RANK() OVER ({window} DESC) END AS {stat}_rank_{cohort}")
+            columns.append(f"CASE WHEN {stat} IS NOT NULL THEN round((100 * PERCENT_RANK() OVER ({window}))::numeric, 1)::float8 "
+                           f"END AS {stat}_pct_{cohort}")
+    return ",\n                ".join(columns)
+
+
+MATERIALIZED_VIEWS = (
+    MaterializedView(
+        name="readonly.mv_player_leaderboard",
+        query="""
+            SELECT
+                ps.id, ps.tournament_id, ps.person_id, ps.org_id,
+                ps.first_name, ps.last_name, ps.team_name, ps.team_short_name, ps.position,
+                ps.rank, ps.games_played, ps.goals_scored, ps.assists,
+                COALESCE(ps.scoring_points, 0) AS scoring_points,
+                COALESCE(ps.plus_minus, 0) AS plus_minus,
+                ps.pim, ps.power_play_goals, ps.power_play_goal_assists,
+                ps.short_handed_goals, ps.short_handed_goal_assists, ps.gwg,
+                ps.shots, ps.shots_pct, ps.face_offs, ps.faceoffs_win_pct,
+                t.tournament_name, t.season_name, t.tournament_type,
+                COALESCE(t.is_deleted, FALSE) AS tournament_is_deleted,
+                p.birth_date, p.gender, p.nationality,
+                p.image_object_key, p.image2_object_key,
+                tcd.original_image_url, tcd.original_image2_url
+            FROM player_statistics ps
+            LEFT JOIN tournaments t ON ps.tournament_id = t.tournament_id
+            LEFT JOIN persons p ON ps.person_id = p.person_id
+            LEFT JOIN team_member_custom_data tcd ON ps.person_id = tcd.person_id
+        """,
+        unique_key="id",
+        # Match the keyset sorts of the leaderboard endpoints (see _STAT_SORTS in hockey_analytics)
+        indexes=(
+            "(tournament_id, scoring_points DESC, goals_scored DESC, id DESC)",
+            "(tournament_id, goals_scored DESC, scoring_points DESC, id DESC)",
+            "(scoring_points DESC, goals_scored DESC, id DESC) WHERE NOT tournament_is_deleted",
+            "(goals_scored DESC, scoring_points DESC, id DESC) WHERE NOT tournament_is_deleted",
+        ),
+    ),
+    # tournament_id 0 holds the totals over all tournaments
+    MaterializedView(
+        name="readonly.mv_player_totals",
+        query="""
+            SELECT
+                COALESCE(ps.tournament_id, 0) AS tournament_id,
+                COUNT(DISTINCT ps.person_id) AS unique_players,
+                COUNT(*) AS total_player_records,
+                AVG(ps.scoring_points) AS avg_points_per_player,
+                AVG(ps.goals_scored) AS avg_goals_per_player,
+                AVG(ps.games_played) AS avg_games_per_player,
+                MAX(ps.scoring_points) AS highest_points,
+                MAX(ps.goals_scored) AS highest_goals
+            FROM player_statistics ps
+            LEFT JOIN tournaments t ON ps.tournament_id = t.tournament_id
+            WHERE t.is_deleted IS NOT TRUE
+            GROUP BY GROUPING SETS ((ps.tournament_id), ())
+        """,
+        unique_key="tournament_id",
+    ),
+    MaterializedView(
+        name="readonly.mv_position_breakdown",
+        query="""
+            SELECT
+                COALESCE(ps.tournament_id, 0) AS tournament_id,
+                ps.position,
+                COUNT(*) AS player_count,
+                AVG(ps.scoring_points) AS avg_points,
+                AVG(ps.goals_scored) AS avg_goals,
+                AVG(ps.assists) AS avg_assists
+            FROM player_statistics ps
+            LEFT JOIN tournaments t ON ps.tournament_id = t.tournament_id
+            WHERE t.is_deleted IS NOT TRUE AND ps.position IS NOT NULL
+            GROUP BY GROUPING SETS ((ps.tournament_id, ps.position), (ps.position))
+        """,
+        unique_key="tournament_id, position",
+    ),
+    MaterializedView(
+        name="readonly.mv_player_percentiles",
+        query=f"""
+            WITH players AS (
+                SELECT
+                    ps.id, ps.person_id, ps.tournament_id, ps.team_name, ps.position,
+                    t.tournament_name, t.season_id, t.season_name, tc.class_id, tc.class_name,
+                    {", ".join(f"ps.{column} AS {stat}" for stat, column in PERCENTILE_STATS.items())}
+                FROM player_statistics ps
+                JOIN tournaments t ON ps.tournament_id = t.tournament_id
+                LEFT JOIN (
+                    SELECT DISTINCT ON (tournament_id) tournament_id, class_id, class_name
+                    FROM tournament_classes
+                    ORDER BY tournament_id, class_id
+                ) tc ON ps.tournament_id = tc.tournament_id
+                WHERE t.is_deleted IS NOT TRUE
+            )
+            SELECT
+                players.*,
+                {_percentile_columns()}
+            FROM players
+        """,
+        unique_key="id",
+        indexes=("(person_id)",),
+    ),
+    MaterializedView(
+        name="readonly.mv_league_totals",
+        query="""
+            SELECT
+                1 AS id,
+                (SELECT COUNT(*) FROM teams t JOIN tournaments tour ON t.tournament_id = tour.tournament_id WHERE tour.is_deleted = FALSE) AS teams,
+                (SELECT COUNT(DISTINCT person_id) FROM team_members WHERE member_type = 'Player') AS players,
+                (SELECT COUNT(*) FROM tournaments WHERE is_deleted = FALSE) AS tournaments,
+                (SELECT COUNT(*) FROM organisations) AS clubs
+        """,
+        unique_key="id",
+    ),
+    MaterializedView(
+        name="readonly.mv_roster_positions",
+        query="""
+            SELECT position, COUNT(*) AS count
+            FROM team_members
+            WHERE position IS NOT NULL AND member_type = 'Player'
+            GROUP BY position
+        """,
+        unique_key="position",
+    ),
+    MaterializedView(
+        name="readonly.mv_tournament_team_counts",
+        query="""
+            SELECT tour.tournament_id, tour.tournament_name, tour.season_name, COUNT(t.team_id) AS team_count
+            FROM tournaments tour
+            JOIN teams t ON tour.tournament_id = t.tournament_id
+            WHERE tour.is_deleted = FALSE
+            GROUP BY tour.tournament_id, tour.tournament_name, tour.season_name
+        """,
+        unique_key="tournament_id",
+        indexes=("(team_count DESC)",),
+    ),
+    MaterializedView(
+        name="readonly.mv_club_team_counts",
+        query="""
+            SELECT
+                o.org_id,
+                o.org_name,
+                COUNT(DISTINCT t.team_id) AS team_count,
+                COUNT(DISTINCT t.tournament_id) AS tournament_count,
+                o.org_logo_base64
+            FROM organisations o
+            JOIN teams t ON o.org_id = t.club_org_id
+            JOIN tournaments tour ON t.tournament_id = tour.tournament_id
+            WHERE tour.is_deleted = FALSE
+            GROUP BY o.org_id, o.org_name
+        """,
+        unique_key="org_id",
+        indexes=("(team_count DESC)",),
+    ),
+)
+
+
+def _index_name(view: MaterializedView, suffix: str) -> str:
+    return f"idx_{view.name.split('.', 1)[1]}_{suffix}"
+
+
+def _definition_hash(view: MaterializedView) -> str:
+    return hashlib.sha1(repr((view.query, view.unique_key, view.indexes)).encode()).hexdigest()
+
+
+def create_materialized_views(engine: Engine) -> None:
+    """
+    Create missing views with their indexes. A view whose definition changed
+    since it was created (tracked in its comment) is dropped and rebuilt.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS readonly"))
+        for view in MATERIALIZED_VIEWS:
+            definition = _definition_hash(view)
+            current = conn.execute(
+                text("SELECT obj_description(to_regclass(:name), 'pg_class')"), {"name": view.name}
+            ).scalar()
+            if current == definition:
+                continue
+            conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {view.name}"))
+            logger.info(f"Building materialized view {view.name}")
+            conn.execute(text(f"CREATE MATERIALIZED VIEW {view.name} AS {view.query}"))
+            conn.execute(text(f"COMMENT ON MATERIALIZED VIEW {view.name} IS '{definition}'"))
+            conn.execute(text(f"CREATE UNIQUE INDEX {_index_name(view, 'key')} ON {view.name} ({view.unique_key})"))
+            for i, columns in enumerate(view.indexes, 1):
+                conn.execute(text(f"CREATE INDEX {_index_name(view, i)} ON {view.name} {columns}"))
+            conn.execute(text(f"GRANT SELECT ON {view.name} TO PUBLIC"))
+
+
+def refresh_materialized_views(engine: Optional[Engine] = None) -> Dict[str, float]:
+    """
+    Refresh every view without blocking readers, then bump the data version
+    so cached API responses built from the old contents are dropped.
+    Returns the seconds each refresh took.
+    """
+    from src.utils.data_version import bump_data_version
+    from src.utils.database import get_engine
+
+    engine = engine or get_engine()
+    timings = {}
+    for view in MATERIALIZED_VIEWS:
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view.name}"))
+        timings[view.name] = round(time.perf_counter() - started, 3)
+        logger.info(f"Refreshed {view.name}", extra={"seconds": timings[view.name]})
+
+    bump_data_version(engine)
+    return timings
@@ -0,0 +1,66 @@
+# src/utils/name_search.py
+"""
+Accent-insensitive, trigram-indexed name search.
+
+Names are compared through normalize_name(), which lower-cases and strips
+diacritics (ø -> o, å -> a, æ -> ae), so "Bjorn Sondre" finds "Bjørn
+Søndre". GIN pg_trgm indexes over the normalized names serve both
+substring filters (LIKE '%term%') and similarity search (<%), which no
+B-tree index can.
+
+The expressions below are shared by the indexes and the queries: a query
+only uses an index when it repeats the indexed expression exactly.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+
+def _column(alias: str, column: str) -> str:
+    return f"{alias}.{column}" if alias else column
+
+
+def player_name(alias: str = "tm") -> str:
+    first, last = _column(alias, "first_name"), _column(alias, "last_name")
+    return f"normalize_name(COALESCE({first}, '') || ' ' || COALESCE({last}, ''))"
+
+
+def team_name(alias: str = "t") -> str:
+    name, overridden = _column(alias, "team_name"), _column(alias, "overridden_name")
+    return f"normalize_name(COALESCE({name}, '') || ' ' || COALESCE({overridden}, ''))"
+
+
+def club_name(alias: str = "o") -> str:
+    return f"normalize_name(COALESCE({_column(alias, 'org_name')}, ''))"
+
+
+def contains(expression: str, param: str = "search") -> str:
+    """Substring filter on a normalized name, served by its trigram index"""
+    return f"{expression} LIKE '%' || normalize_name(:{param}) || '%'"
+
+
+_SETUP = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() is only STABLE (its dictionary could change); pinning the
+    # dictionary makes the wrapper safe to declare IMMUTABLE for indexing
+    """
+    CREATE OR REPLACE FUNCTION normalize_name(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$
+    """,
+)
+
+_INDEXES = {
+    "idx_team_members_name_trgm": ("team_members", player_name("")),
+    "idx_teams_name_trgm": ("teams", team_name("")),
+    "idx_organisations_name_trgm": ("organisations", club_name("")),
+}
+
+
+def create_search_indexes(engine: Engine) -> None:
+    """Install the extensions, normalize_name() and the trigram indexes if missing"""
+    with engine.begin() as conn:
+        for statement in _SETUP:
+            conn.execute(text(statement))
+        for name, (table, expression) in _INDEXES.items():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (({expression}) gin_trgm_ops)"))
@@ -0,0 +1,89 @@
+# src/utils/pagination.py
+"""
+Keyset (cursor) pagination for the analytics queries.
+
+A page is fetched with WHERE (sort keys) > (keys of the last row seen)
+instead of OFFSET, so page 1000 costs the same as page 1 when an index
+covers the sort keys. The cursor handed to clients is the last row's keys,
+base64-encoded JSON, tagged with the sort it belongs to.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed or belongs to another endpoint or sort order"""
+
+
+def encode_cursor(tag: str, values: Sequence[Any]) -> str:
+    payload = json.dumps({"s": tag, "k": list(values)}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, tag: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["k"]
+        matches = payload["s"] == tag and isinstance(values, list) and len(values) == size
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+        raise InvalidCursor("Invalid cursor")
+    if not matches:
+        raise InvalidCursor("Cursor does not belong to this query; start again without a cursor")
+    return values
+
+
+class Keyset(NamedTuple):
+    """
+    Sort keys of a paginated query. The keys must be unique together and
+    never NULL (wrap nullable columns in COALESCE), and all run in the
+    same direction so a row comparison can resume after the cursor.
+
+    When only the first index_prefix keys are covered by an index (the rest
+    being a tiebreaker from a joined table), those are also bounded on their
+    own, so the index scan starts at the cursor instead of filtering.
+    """
+    tag: str
+    keys: Tuple[str, ...]
+    descending: bool = False
+    index_prefix: int = 0
+
+    def select(self) -> str:
+        """Extra select-list entries carrying the keys, stripped again by page()"""
+        return "".join(f", {key} AS _key{i}" for i, key in enumerate(self.keys))
+
+    def after(self, cursor: Optional[str], params: Dict[str, Any]) -> str:
+        """WHERE condition (with leading AND) resuming after the cursor, or '' for the first page"""
+        if not cursor:
+            return ""
+        values = decode_cursor(cursor, self.tag, len(self.keys))
+        names = []
+        for i, value in enumerate(values):
+            params[f"_after{i}"] = value
+            names.append(f":_after{i}")
+        op = "<" if self.descending else ">"
+        condition = f" AND ({', '.join(self.keys)}) {op} ({', '.join(names)})"
+        if 0 < self.index_prefix < len(self.keys):
+            prefix = slice(0, self.index_prefix)
+            condition = (f" AND ({', '.join(self.keys[prefix])}) {op}= ({', '.join(names[prefix])})"
+                         + condition)
+        return condition
+
+    def order_by(self) -> str:
+        direction = " DESC" if self.descending else ""
+        return "ORDER BY " + ", ".join(key + direction for key in self.keys)
+
+    def page(self, rows: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Trim rows fetched with LIMIT limit + 1 to the page and build the next cursor"""
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = encode_cursor(self.tag, [last[f"_key{i}"] for i in range(len(self.keys))])
+        for row in rows:
+            for i in range(len(self.keys)):
+                row.pop(f"_key{i}", None)
+        return rows, next_cursor
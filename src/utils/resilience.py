@@ -0,0 +1,332 @@
+# src/utils/resilience.py
+"""
+Shared retry policy for calls to the upstream API.
+
+Every service fetch goes through fetch_json() or stream_json_chunks(), which add:
+- decorrelated-jitter backoff, so concurrent fetches do not retry in lockstep
+- Retry-After on 429/503 responses
+- a circuit breaker per host: after repeated failures calls fail fast until
+  a single half-open probe succeeds
+- a retry budget per host: retries are limited to a share of the requests,
+  so a degraded upstream cannot multiply our own load
+Counters for all of this are available from upstream_metrics().
+"""
+import asyncio
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+import httpx
+import ijson
+from src.config.settings import get_settings
+from src.utils.json_stream import iter_json_chunks
+from src.utils.logging_config import setup_logging
+
+logger = setup_logging("resilience")
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """A request to the upstream API failed for good"""
+
+
+class CircuitOpenError(UpstreamError):
+    """The circuit for the host is open, the request was not sent"""
+
+
+class _RetryableError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    timeout: float = 30.0
+    backoff_base: float = 1.0
+    backoff_cap: float = 30.0
+    retry_after_cap: float = 120.0
+
+    @classmethod
+    def from_settings(cls, max_attempts: Optional[int] = None) -> "RetryPolicy":
+        settings = get_settings()
+        return cls(
+            max_attempts=max_attempts or settings.UPSTREAM_MAX_ATTEMPTS,
+            timeout=settings.UPSTREAM_TIMEOUT,
+            backoff_base=settings.UPSTREAM_BACKOFF_BASE,
+            backoff_cap=settings.UPSTREAM_BACKOFF_CAP,
+            retry_after_cap=settings.UPSTREAM_RETRY_AFTER_CAP,
+        )
+
+
+def decorrelated_jitter(previous: float, base: float, cap: float, rng: random.Random = random) -> float:
+    """Next backoff delay: uniform between base and three times the previous delay, capped"""
+    return min(cap, rng.uniform(base, max(base, previous * 3)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class CircuitBreaker:
+    """
+    closed -> open after failure_threshold consecutive failures,
+    open -> half_open once reset_timeout has passed,
+    half_open lets one probe through: success closes, failure opens again.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self.clock() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self.probe_in_flight = False
+        if self.state == "half_open" and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """The admitted request ended without an outcome; let the next caller probe"""
+        self.probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Returns True if this failure opened the circuit"""
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failure_threshold):
+            self.state = "open"
+            self.opened_at = self.clock()
+            return True
+        return False
+
+
+class RetryBudget:
+    """
+    Token bucket for retries: every request deposits `ratio` tokens, every
+    retry spends one. The bucket starts full with `reserve` tokens, so short
+    runs can retry freely while a sustained outage settles at about `ratio`
+    retries per request.
+    """
+    def __init__(self, ratio: float = 0.2, reserve: float = 10.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = reserve
+
+    def record_request(self) -> None:
+        self.balance = min(self.reserve, self.balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.balance >= 1.0:
+            self.balance -= 1.0
+            return True
+        return False
+
+
+class _HostState:
+    def __init__(self):
+        settings = get_settings()
+        self.breaker = CircuitBreaker(settings.UPSTREAM_BREAKER_THRESHOLD, settings.UPSTREAM_BREAKER_RESET_SECONDS)
+        self.budget = RetryBudget(settings.UPSTREAM_RETRY_BUDGET_RATIO, settings.UPSTREAM_RETRY_BUDGET_RESERVE)
+        self.counters = Counter()
+
+
+_hosts: Dict[str, _HostState] = {}
+
+
+def _host_state(url: str) -> tuple:
+    host = urlsplit(url).netloc
+    if host not in _hosts:
+        _hosts[host] = _HostState()
+    return host, _hosts[host]
+
+
+def upstream_metrics() -> Dict[str, Dict[str, Any]]:
+    """Per-host counters and breaker state for this process"""
+    return {
+        host: {**state.counters, "circuit_state": state.breaker.state,
+               "retry_budget_balance": round(state.budget.balance, 2)}
+        for host, state in _hosts.items()
+    }
+
+
+def reset_upstream_state() -> None:
+    """Forget breakers, budgets and counters (tests and benchmarks)"""
+    _hosts.clear()
+
+
+def _check_response(response: httpx.Response) -> None:
+    if response.status_code in RETRYABLE_STATUS_CODES:
+        raise _RetryableError(
+            f"HTTP {response.status_code} from {response.request.url}",
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+        )
+    # Other 4xx will not get better by asking again
+    response.raise_for_status()
+
+
+async def _with_retries(url: str, what: str, policy: RetryPolicy, attempt_once):
+    host, state = _host_state(url)
+    state.counters["requests"] += 1
+    state.budget.record_request()
+    delay = policy.backoff_base
+    last_error = None
+
+    for attempt in range(1, policy.max_attempts + 1):
+        if not state.breaker.allow_request():
+            state.counters["short_circuited"] += 1
+            raise CircuitOpenError(f"Failed to fetch {what}: circuit open for {host}")
+
+        state.counters["attempts"] += 1
+        try:
+            result = await attempt_once()
+            state.breaker.record_success()
+            state.counters["successes"] += 1
+            return result
+        except httpx.HTTPStatusError as e:
+            # Non-retryable status; the host itself is fine
+            state.breaker.record_success()
+            state.counters["failures"] += 1
+            raise UpstreamError(f"Failed to fetch {what}: {e}") from e
+        except (httpx.TransportError, _RetryableError, ValueError, ijson.JSONError) as e:
+            # ValueError covers malformed bodies decoded by httpx, ijson.JSONError
+            # malformed or truncated streamed ones
+            last_error = e
+            state.counters["failed_attempts"] += 1
+            if state.breaker.record_failure():
+                state.counters["circuit_opened"] += 1
+                logger.warning("Circuit opened", extra={"host": host, "error": str(e)})
+        except BaseException:
+            # Cancellation or an unexpected error is no verdict on the host,
+            # but a half-open probe must not stay in flight forever
+            state.breaker.release_probe()
+            raise
+
+        if attempt == policy.max_attempts:
+            break
+        if not state.budget.try_spend():
+            state.counters["retry_budget_exhausted"] += 1
+            logger.warning("Retry budget exhausted, not retrying", extra={"host": host, "what": what})
+            break
+
+        delay = decorrelated_jitter(delay, policy.backoff_base, policy.backoff_cap)
+        wait = delay
+        retry_after = getattr(last_error, "retry_after", None)
+        if retry_after is not None:
+            state.counters["retry_after_honoured"] += 1
+            wait = min(policy.retry_after_cap, max(wait, retry_after))
+        state.counters["retries"] += 1
+        logger.warning("API request failed, retrying", extra={
+            "what": what,
+            "retry_count": attempt,
+            "max_retries": policy.max_attempts,
+            "error": str(last_error),
+            "wait_seconds": round(wait, 2)
+        })
+        await asyncio.sleep(wait)
+
+    state.counters["failures"] += 1
+    logger.error("Failed to fetch data after retries", extra={"what": what, "error": str(last_error)})
+    raise UpstreamError(f"Failed to fetch {what} after {attempt} attempts: {last_error}")
+
+
+async def fetch_json(url: str, what: str, max_attempts: Optional[int] = None,
+                     params: Optional[Any] = None) -> Any:
+    """GET url and return the decoded JSON body, retrying per the shared policy"""
+    policy = RetryPolicy.from_settings(max_attempts)
+
+    async def attempt_once():
+        async with httpx.AsyncClient(timeout=policy.timeout) as client:
+            response = await client.get(url, params=params)
+            _check_response(response)
+            return response.json()
+
+    return await _with_retries(url, what, policy, attempt_once)
+
+
+async def fetch_bytes(url: str, what: str, max_attempts: Optional[int] = None) -> httpx.Response:
+    """GET url and return the fully read response (e.g. images), retrying per the shared policy"""
+    policy = RetryPolicy.from_settings(max_attempts)
+
+    async def attempt_once():
+        async with httpx.AsyncClient(timeout=policy.timeout) as client:
+            response = await client.get(url)
+            _check_response(response)
+            return response
+
+    return await _with_retries(url, what, policy, attempt_once)
+
+
+async def stream_json_chunks(url: str, prefix: str, chunk_size: int, what: str,
+                             max_attempts: Optional[int] = None) -> AsyncIterator[List[dict]]:
+    """
+    GET url and yield the items at `prefix` in chunks (see iter_json_chunks).
+    Records already handed to the caller cannot be taken back, so a failure is
+    only retried before the first chunk has been yielded.
+    """
+    policy = RetryPolicy.from_settings(max_attempts)
+
+    # The retry loop only covers opening the stream and parsing the first chunk
+    async def open_stream():
+        client = httpx.AsyncClient(timeout=policy.timeout)
+        try:
+            response = await client.send(client.build_request("GET", url), stream=True)
+            try:
+                _check_response(response)
+                chunks = iter_json_chunks(response.aiter_bytes(), prefix, chunk_size)
+                try:
+                    first = await chunks.__anext__()
+                except StopAsyncIteration:
+                    first = None
+                return client, response, chunks, first
+            except BaseException:
+                await response.aclose()
+                raise
+        except BaseException:
+            await client.aclose()
+            raise
+
+    client, response, chunks, first = await _with_retries(url, what, policy, open_stream)
+    yielded = 0
+    try:
+        if first is None:
+            return
+        yielded += len(first)
+        yield first
+        try:
+            async for chunk in chunks:
+                yielded += len(chunk)
+                yield chunk
+        except (httpx.HTTPError, ValueError, ijson.JSONError) as e:
+            raise UpstreamError(f"Stream of {what} failed after {yielded} records: {e}") from e
+    finally:
+        await response.aclose()
+        await client.aclose()
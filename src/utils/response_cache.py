@@ -0,0 +1,54 @@
+# src/utils/response_cache.py
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from src.config.settings import get_settings
+
+
+class VersionedResponseCache:
+    """
+    LRU cache of API responses, keyed by endpoint and parameters and tagged
+    with the data version they were computed under. An entry is only served
+    while its version is the current one, so a refresh invalidates all of
+    them at once; stale entries are replaced on their next use or evicted.
+    """
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple, Tuple[int, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(endpoint: str, params: Dict[str, Hashable]) -> Tuple:
+        return (endpoint, tuple(sorted(params.items())))
+
+    async def get_or_compute(self, endpoint: str, params: Dict[str, Hashable], version: int,
+                             compute: Callable[[], Awaitable[Any]]) -> Any:
+        key = self.key(endpoint, params)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = await compute()
+        # Error responses are not cached
+        if not (isinstance(value, dict) and value.get("success") is False):
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+@lru_cache()
+def get_response_cache() -> VersionedResponseCache:
+    """The API's response cache, sized from the settings on first use"""
+    return VersionedResponseCache(get_settings().RESPONSE_CACHE_SIZE)
@@ -0,0 +1,181 @@
+# src/utils/staging.py
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, List, Sequence
+from sqlalchemy import Column, MetaData, Table, and_, exists, func, inspect, or_, select
+from sqlalchemy.orm import Session
+from src.utils.logging_config import setup_logging
+
+logger = setup_logging("staging")
+
+# Columns that are never compared or copied from the staging table
+_MANAGED_COLUMNS = ("id", "created_at", "updated_at")
+
+# Most recent swaps, newest last, for benchmarks and diagnostics
+_recent_swaps = deque(maxlen=200)
+
+
+@dataclass
+class SwapStats:
+    table: str
+    scope: Dict[str, Any]
+    staged_rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    load_seconds: float = 0.0  # filling the staging table, target untouched
+    swap_seconds: float = 0.0  # delete/update/insert + commit on the target
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def recent_swap_stats() -> List[SwapStats]:
+    """Timings of the most recent staged swaps in this process"""
+    return list(_recent_swaps)
+
+
+class StagedRefresh:
+    """
+    Refresh the rows of one scope (e.g. one tournament) of a table without
+    readers ever seeing a half-written state.
+
+    New rows are loaded into a temporary staging table first. The swap then
+    runs in one short transaction: rows missing from the new data are deleted,
+    rows that changed are updated and new rows are inserted. Unchanged rows are
+    not touched at all, so a refresh only creates dead tuples for real changes.
+    """
+    def __init__(self, model, key_columns: Sequence[str], volatile_columns: Sequence[str] = ()):
+        self.model = model
+        self.table = model.__table__
+        self.key_columns = tuple(key_columns)
+        self.data_columns = [c for c in self.table.columns if c.name not in _MANAGED_COLUMNS]
+        # Columns written on update...
+        self.update_columns = [c.name for c in self.data_columns if c.name not in self.key_columns]
+        # ...but only rows whose non-volatile columns differ are updated
+        self.compare_columns = [c for c in self.update_columns if c not in volatile_columns]
+        # ORM attribute name -> column name, they differ for some models
+        self._attribute_columns = {
+            attr.key: attr.columns[0].name for attr in inspect(model).column_attrs
+        }
+
+    def begin(self, db: Session, scope: Dict[str, Any]) -> "StagingArea":
+        """Create an empty staging area; load() it one or more times, then swap()"""
+        return StagingArea(self, db, scope)
+
+    def refresh(self, db: Session, scope: Dict[str, Any], objects: Iterable[Any]) -> SwapStats:
+        """Stage and swap in a complete set of rows for the scope"""
+        area = self.begin(db, scope)
+        area.load(objects)
+        return area.swap()
+
+    def row_from_object(self, obj) -> Dict[str, Any]:
+        row = {}
+        for attr_key, column_name in self._attribute_columns.items():
+            if column_name not in _MANAGED_COLUMNS:
+                row[column_name] = getattr(obj, attr_key)
+        return row
+
+
+class StagingArea:
+    def __init__(self, refresh: StagedRefresh, db: Session, scope: Dict[str, Any]):
+        self.refresh = refresh
+        self.db = db
+        self.scope = dict(scope)
+        self.stats = SwapStats(table=refresh.table.name, scope=self.scope)
+        self._seen_keys = set()
+
+        self.stage = Table(
+            f"stage_{refresh.table.name}_{uuid.uuid4().hex[:8]}",
+            MetaData(),
+            *[Column(c.name, c.type) for c in refresh.data_columns],
+            prefixes=["TEMPORARY"],
+        )
+        self.stage.create(self.db.connection())
+
+    def load(self, objects: Iterable[Any]) -> int:
+        """Add ORM objects (or row dicts) to the staging table, skipping duplicate keys"""
+        started = time.perf_counter()
+        rows = []
+        for obj in objects:
+            row = obj if isinstance(obj, dict) else self.refresh.row_from_object(obj)
+            for column, value in self.scope.items():
+                row[column] = value
+            key = tuple(row.get(k) for k in self.refresh.key_columns)
+            if key in self._seen_keys:
+                continue
+            self._seen_keys.add(key)
+            rows.append(row)
+
+        if rows:
+            self.db.connection().execute(self.stage.insert(), rows)
+        self.stats.staged_rows += len(rows)
+        self.stats.load_seconds += time.perf_counter() - started
+        return len(rows)
+
+    def swap(self) -> SwapStats:
+        """Apply the staged rows to the target table and commit"""
+        target = self.refresh.table
+        stage = self.stage
+        conn = self.db.connection()
+
+        key_match = and_(*[target.c[k] == stage.c[k] for k in self.refresh.key_columns])
+        in_scope = and_(*[target.c[k] == v for k, v in self.scope.items()])
+        timestamps = {}
+        if "updated_at" in target.c:
+            timestamps["updated_at"] = func.now()
+
+        started = time.perf_counter()
+        try:
+            deleted = conn.execute(
+                target.delete().where(in_scope).where(~exists().where(key_match))
+            )
+
+            updated = None
+            if self.refresh.compare_columns:
+                changed = or_(*[target.c[c].is_distinct_from(stage.c[c]) for c in self.refresh.compare_columns])
+                updated = conn.execute(
+                    target.update()
+                    .where(key_match)
+                    .where(changed)
+                    .values({**{c: stage.c[c] for c in self.refresh.update_columns}, **timestamps})
+                )
+
+            insert_columns = [c.name for c in self.refresh.data_columns]
+            insert_values = [stage.c[c] for c in insert_columns]
+            for column in ("created_at", "updated_at"):
+                if column in target.c:
+                    insert_columns.append(column)
+                    insert_values.append(func.now())
+            inserted = conn.execute(
+                target.insert().from_select(
+                    insert_columns,
+                    select(*insert_values).where(~exists().where(key_match))
+                )
+            )
+
+            self.stage.drop(conn)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error("Staged swap failed, target left unchanged", extra={
+                "table": target.name,
+                "scope": self.scope,
+                "error": str(e)
+            })
+            raise
+
+        self.stats.swap_seconds = time.perf_counter() - started
+        self.stats.deleted = deleted.rowcount
+        self.stats.updated = updated.rowcount if updated is not None else 0
+        self.stats.inserted = inserted.rowcount
+        _recent_swaps.append(self.stats)
+
+        logger.info("Staged swap completed", extra=self.stats.as_dict())
+        return self.stats
+
+    def discard(self) -> None:
+        """Throw away the staged rows without touching the target table"""
+        self.db.rollback()
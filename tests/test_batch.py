@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.api import hockey_routes
+from src.api.hockey_routes import BatchRequest, run_batch
+from src.models.base import Base
+from src.models.standing import Standing
+from src.models.tournament import Tournament
+from src.utils.response_cache import get_response_cache
+from tests.test_hockey_analytics import FakeAsyncSession
+
+
+class FakeSessionContext:
+    def __init__(self, Session):
+        self.session = Session()
+
+    async def __aenter__(self):
+        return FakeAsyncSession(self.session)
+
+    async def __aexit__(self, *exc):
+        self.session.close()
+
+
+class TestBatchEndpoint(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        session = Session()
+        session.add_all([
+            Tournament(tournament_id=1, season_id=100, tournament_name="Test Tournament", season_name="2024/2025"),
+            Standing(tournament_id=1, team_id=200, team_name="Test Team", position=1, points=12),
+        ])
+        session.commit()
+        session.close()
+        get_response_cache().clear()
+        patcher = mock.patch.object(hockey_routes, "get_async_sessionmaker",
+                                    return_value=lambda: FakeSessionContext(Session))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _batch(self, queries):
+        return asyncio.run(run_batch(BatchRequest(queries=queries)))
+
+    def test_each_query_reports_its_own_status(self):
+        response = self._batch([
+            {"id": "table", "query": "standings", "params": {"tournament_id": 1, "view": "compact"}},
+            {"query": "standings", "params": {"tournament_id": 1, "view": "tiny"}},
+            {"query": "standings", "params": {"tournament_id": "one"}},
+            {"query": "standings", "params": {"tournament_id": 1, "colour": "red"}},
+            {"query": "drop_tables"},
+        ])
+
+        self.assertFalse(response["success"])
+        results = response["results"]
+        self.assertEqual([r["id"] for r in results], ["table", "1", "2", "3", "4"])
+        self.assertEqual([r["status"] for r in results], [200, 400, 422, 422, 400])
+        self.assertEqual(results[0]["data"]["standings"][0]["display_name"], "Test Team")
+        self.assertIn("elapsed_ms", results[0])
+
+    def test_too_many_queries_are_rejected(self):
+        with self.assertRaises(hockey_routes.HTTPException):
+            self._batch([{"query": "filters"}] * 21)
+
+
+if __name__ == "__main__":
+    unittest.main()
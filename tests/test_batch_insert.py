@@ -0,0 +1,73 @@
+import unittest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from src.models.base import Base
+from src.models.player_statistic import PlayerStatistic
+from src.models.tournament import Tournament
+from src.utils.batch_insert import insert_with_bisection
+
+
+def _player(person_id, first_name="Ola"):
+    return PlayerStatistic(tournament_id=1, person_id=person_id, org_id=10,
+                           first_name=first_name, last_name="Nordmann", team_name="Test Team")
+
+
+class TestInsertWithBisection(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+
+        # pysqlite needs explicit BEGIN for SAVEPOINTs to behave
+        @event.listens_for(self.engine, "connect")
+        def _connect(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(self.engine, "begin")
+        def _begin(connection):
+            connection.exec_driver_sql("BEGIN")
+
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.session.add(Tournament(tournament_id=1, season_id=100))
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_clean_batch_uses_single_attempt(self):
+        result = insert_with_bisection(self.session, [_player(i) for i in range(1, 65)])
+        self.session.commit()
+
+        self.assertEqual(result.inserted, 64)
+        self.assertEqual(result.rejected, [])
+        self.assertEqual(result.attempts, 1)
+        self.assertEqual(self.session.query(PlayerStatistic).count(), 64)
+
+    def test_isolates_bad_rows(self):
+        players = [_player(i) for i in range(1, 65)]
+        players[40] = _player(41, first_name=None)  # violates NOT NULL
+
+        result = insert_with_bisection(self.session, players, describe=lambda p: p.person_id)
+        self.session.commit()
+
+        self.assertEqual(result.inserted, 63)
+        self.assertEqual([r.row for r in result.rejected], [41])
+        self.assertIn("NOT NULL", result.rejected[0].reason)
+        # One bad row in 64 costs a root attempt plus two per level, not 64 commits
+        self.assertLessEqual(result.attempts, 1 + 2 * 6)
+        self.assertEqual(self.session.query(PlayerStatistic).count(), 63)
+
+    def test_duplicate_keys_are_rejected(self):
+        self.session.add(_player(7))
+        self.session.commit()
+
+        result = insert_with_bisection(self.session, [_player(6), _player(7), _player(8)],
+                                       describe=lambda p: p.person_id)
+        self.session.commit()
+
+        self.assertEqual(result.inserted, 2)
+        self.assertEqual([r.row for r in result.rejected], [7])
+        self.assertEqual(self.session.query(PlayerStatistic).count(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
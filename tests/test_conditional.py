@@ -0,0 +1,95 @@
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from src.api import conditional
+from src.api.conditional import ConditionalRoute, cache_control, read_session
+
+UPDATED_AT = datetime(2025, 1, 15, 12, 30, 0, tzinfo=timezone.utc)
+
+
+def _client():
+    router = APIRouter(route_class=ConditionalRoute)
+    calls = []
+
+    @router.get("/standings")
+    @cache_control("public, max-age=60")
+    async def standings(view: str = "full"):
+        calls.append(view)
+        return {"success": True, "view": view}
+
+    @router.get("/session")
+    async def session(db=Depends(read_session)):
+        calls.append(db)
+        return {"success": True}
+
+    @router.get("/broken")
+    async def broken():
+        return {"success": False, "error": "boom"}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/hockey")
+    return TestClient(app), calls
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class TestConditionalRoute(unittest.TestCase):
+    def setUp(self):
+        self.client, self.calls = _client()
+        sessions = mock.patch("src.utils.database.get_async_sessionmaker", return_value=FakeSession)
+        sessions.start()
+        self.addCleanup(sessions.stop)
+        patcher = mock.patch.object(conditional, "_data_state", mock.AsyncMock(return_value=(7, UPDATED_AT)))
+        self.data_state = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_matching_etag_is_answered_without_running_the_route(self):
+        first = self.client.get("/hockey/standings")
+        self.assertEqual(first.headers["cache-control"], "public, max-age=60")
+        self.assertEqual(first.headers["last-modified"], "Wed, 15 Jan 2025 12:30:00 GMT")
+
+        again = self.client.get("/hockey/standings", headers={"If-None-Match": first.headers["etag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+        self.assertEqual(self.calls, ["full"])
+
+    def test_etag_differs_per_query_and_version(self):
+        full = self.client.get("/hockey/standings").headers["etag"]
+        compact = self.client.get("/hockey/standings?view=compact").headers["etag"]
+        self.data_state.return_value = (8, UPDATED_AT)
+        newer = self.client.get("/hockey/standings").headers["etag"]
+        self.assertEqual(len({full, compact, newer}), 3)
+
+    def test_if_modified_since(self):
+        fresh = self.client.get("/hockey/standings", headers={"If-Modified-Since": "Wed, 15 Jan 2025 12:30:00 GMT"})
+        stale = self.client.get("/hockey/standings", headers={"If-Modified-Since": "Wed, 15 Jan 2025 12:29:59 GMT"})
+        self.assertEqual((fresh.status_code, stale.status_code), (304, 200))
+
+    def test_body_hash_when_version_is_unavailable(self):
+        self.data_state.return_value = None
+        first = self.client.get("/hockey/standings")
+        self.assertTrue(first.headers["etag"].startswith('"b'))
+        again = self.client.get("/hockey/standings", headers={"If-None-Match": first.headers["etag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_route_queries_on_the_session_the_version_was_read_from(self):
+        self.client.get("/hockey/session")
+        (db,), _ = self.data_state.call_args
+        self.assertIsInstance(db, FakeSession)
+        self.assertIs(self.calls[-1], db)
+
+    def test_failures_get_no_validators(self):
+        response = self.client.get("/hockey/broken")
+        self.assertNotIn("etag", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+import unittest
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.models.base import Base
+from src.models.standing import Standing
+from src.models.team import Team
+from src.models.team_member import TeamMember
+from src.models.tournament import Tournament
+from src.services.export_service import ExportError, check_export, export_filename, stream_export
+
+
+class TestExportService(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        session = sessionmaker(bind=self.engine)()
+        session.add_all([
+            Tournament(tournament_id=1, season_id=100, tournament_name="A", season_name="2024/2025"),
+            Tournament(tournament_id=2, season_id=100, tournament_name="B", season_name="2024/2025"),
+            Tournament(tournament_id=3, season_id=101, tournament_name="C", season_name="2025/2026"),
+            Team(team_id=10, tournament_id=1, team_name="Team A"),
+            Team(team_id=30, tournament_id=3, team_name="Team C"),
+            TeamMember(person_id=1, team_id=10, first_name="Bjørn", birth_date=date(2001, 2, 3)),
+            TeamMember(person_id=2, team_id=30, first_name="Ola"),
+        ] + [Standing(tournament_id=t, team_id=100 + i, team_name=f"Team {i}", position=i, points=30 - i)
+             for t in (1, 2, 3) for i in range(1, 6)])
+        session.commit()
+        session.close()
+
+    def _export(self, *args, **kwargs):
+        return b"".join(stream_export(self.engine, *args, **kwargs))
+
+    def test_csv_is_streamed_in_chunks_with_one_header(self):
+        parts = list(stream_export(self.engine, "standings", "csv", season_id=100, chunk_size=4))
+        self.assertEqual(len(parts), 3)
+        rows = list(csv.DictReader(io.StringIO(b"".join(parts).decode("utf-8"))))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual({row["tournament_id"] for row in rows}, {"1", "2"})
+
+    def test_ndjson_team_members_by_tournament(self):
+        lines = self._export("team_members", "ndjson", tournament_id=1).decode("utf-8").splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([(r["first_name"], r["birth_date"]) for r in rows], [("Bjørn", "2001-02-03")])
+
+    def test_empty_csv_export_still_has_a_header(self):
+        header = self._export("matches", "csv").decode("utf-8").splitlines()
+        self.assertEqual(len(header), 1)
+        self.assertIn("match_id", header[0])
+
+    def test_bad_requests_are_rejected_before_streaming(self):
+        for dataset, fmt in (("users", "csv"), ("matches", "xlsx")):
+            with self.assertRaises(ExportError):
+                check_export(dataset, fmt)
+        self.assertEqual(export_filename("matches", "ndjson", season_id=100), "matches-season-100.ndjson")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.models.base import Base
+from src.models.match import Match
+from src.services.head_to_head_service import HeadToHeadService
+from src.services.hockey_analytics import HockeyAnalytics
+
+
+def _match(match_id, tournament_id, home, away, home_goals, away_goals, day):
+    return Match(match_id=match_id, tournament_id=tournament_id, tournament_name=f"Tournament {tournament_id}",
+                 hometeam_id=home, awayteam_id=away, hometeam=f"Team {home}", awayteam=f"Team {away}",
+                 home_goals=home_goals, away_goals=away_goals, match_date=datetime(2024, 1, day))
+
+
+class TestHeadToHead(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        session = self.Session()
+        session.add_all([
+            _match(1, 1, 10, 20, 3, 1, day=1),
+            _match(2, 1, 20, 10, 2, 2, day=8),
+            _match(3, 2, 20, 10, 5, 0, day=15),
+            _match(4, 2, 10, 30, 1, 0, day=16),  # another opponent
+            _match(5, 2, 10, 20, None, None, day=22),  # not played yet
+        ])
+        session.commit()
+        self.assertEqual(HeadToHeadService().refresh_head_to_head(session), 3)
+        session.commit()
+        session.close()
+        self.analytics = HockeyAnalytics()
+        self.analytics._get_fresh_db = self.Session
+
+    def test_record_from_either_side(self):
+        result = self.analytics.get_head_to_head(20, 10, recent=2)
+        self.assertTrue(result["success"], result)
+        self.assertEqual(result["record"], {"games": 3, "wins": 1, "draws": 1, "losses": 1,
+                                            "goals_for": 8, "goals_against": 5})
+        self.assertEqual([t["tournament_id"] for t in result["tournaments"]], [2, 1])
+        self.assertEqual([m["match_id"] for m in result["recent_meetings"]], [3, 2])
+        self.assertEqual((result["team"]["team_name"], result["opponent"]["team_name"]), ("Team 20", "Team 10"))
+
+        reverse = self.analytics.get_head_to_head(10, 20)
+        self.assertEqual((reverse["record"]["wins"], reverse["record"]["losses"], reverse["record"]["goals_for"]),
+                         (1, 1, 5))
+        self.assertEqual(self.analytics.get_head_to_head(20, 30)["record"]["games"], 0)
+
+    def test_refresh_replaces_only_the_tournament(self):
+        session = self.Session()
+        session.query(Match).filter(Match.match_id == 3).delete()
+        session.commit()
+        HeadToHeadService().refresh_head_to_head(session, [2])
+        session.commit()
+        session.close()
+        result = self.analytics.get_head_to_head(10, 20)
+        self.assertEqual((result["record"]["games"], [t["tournament_id"] for t in result["tournaments"]]), (2, [1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import asyncio
+import unittest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from src.models.base import Base
+from src.models.organisation import Organisation
+from src.models.standing import Standing
+from src.models.team import Team
+from src.models.tournament import Tournament
+from src.services.hockey_analytics import (AsyncHockeyAnalytics, HockeyAnalytics, STANDING_VIEWS, percentile_options,
+                                          standing_fields)
+from src.utils.materialized_views import PERCENTILE_STATS, _percentile_columns
+
+
+class FakeAsyncSession:
+    """Runs statements on a sync session; enough to drive AsyncHockeyAnalytics"""
+    def __init__(self, session):
+        self.session = session
+        self.rolled_back = False
+
+    async def execute(self, statement, params=None):
+        return self.session.execute(statement, params)
+
+    async def rollback(self):
+        self.rolled_back = True
+        self.session.rollback()
+
+
+class TestHockeyAnalyticsPlans(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        session = self.Session()
+        session.add_all([
+            Tournament(tournament_id=1, season_id=100, tournament_name="Test Tournament", season_name="2024/2025"),
+            Organisation(org_id=10, org_name="Test Club"),
+            Team(team_id=200, tournament_id=1, team_name="Test Team", club_org_id=10),
+            Standing(tournament_id=1, team_id=200, team_name="Test Team", position=1, points=12),
+        ])
+        session.commit()
+        session.close()
+
+    def test_sync_and_async_runners_return_the_same_result(self):
+        analytics = HockeyAnalytics()
+        analytics._get_fresh_db = self.Session
+        sync_result = analytics.get_tournament_standings(1)
+
+        session = self.Session()
+        async_result = asyncio.run(AsyncHockeyAnalytics(FakeAsyncSession(session)).get_tournament_standings(1))
+        session.close()
+
+        self.assertTrue(sync_result["success"])
+        self.assertEqual(sync_result["tournament"]["tournament_name"], "Test Tournament")
+        self.assertEqual([s["team_id"] for s in sync_result["standings"]], [200])
+        self.assertEqual(async_result, sync_result)
+
+    def test_compact_standings_return_only_the_table_columns(self):
+        analytics = HockeyAnalytics()
+        analytics._get_fresh_db = self.Session
+        result = analytics.get_tournament_standings(1, standing_fields("compact"))
+
+        self.assertEqual(tuple(result["standings"][0]), STANDING_VIEWS["compact"])
+        self.assertEqual(result["standings"][0]["display_name"], "Test Team")
+
+    def test_unknown_standing_fields_are_rejected(self):
+        self.assertEqual(standing_fields("full", " points,position,points"), ("points", "position"))
+        with self.assertRaises(ValueError):
+            standing_fields("full", "points,org_logo")
+        with self.assertRaises(ValueError):
+            standing_fields("tiny")
+
+    def test_percentile_options(self):
+        self.assertEqual(percentile_options("class", "pim, points,pim"), ("class", ("pim", "points")))
+        self.assertIn("shots_pct", percentile_options()[1])
+        with self.assertRaises(ValueError):
+            percentile_options("league")
+        with self.assertRaises(ValueError):
+            percentile_options("tournament", "points,height")
+
+    def test_async_errors_roll_back_and_are_reported(self):
+        fake = FakeAsyncSession(self.Session())
+        result = asyncio.run(AsyncHockeyAnalytics(fake).get_player_stats_summary())
+        # The readonly.mv_* views only exist in PostgreSQL
+        self.assertFalse(result["success"])
+        self.assertTrue(fake.rolled_back)
+
+
+# (id, tournament_id, season_id, class_id, position, points); tournaments 1 and 2 share a class, 3 has none
+PERCENTILE_PLAYERS = [
+    (1, 1, 100, 7, "F", 10),
+    (2, 1, 100, 7, "D", 10),
+    (3, 1, 100, 7, "F", 5),
+    (4, 1, 100, 7, "F", None),
+    (5, 2, 100, 7, "F", 3),
+    (6, 2, 100, 7, "F", 1),
+    (7, 3, 100, None, "F", 100),
+]
+
+
+class TestPercentileView(unittest.TestCase):
+    """The rank and percentile columns of readonly.mv_player_percentiles, run on SQLite"""
+    def setUp(self):
+        engine = create_engine('sqlite:///:memory:')
+        self.conn = engine.connect()
+        self.addCleanup(self.conn.close)
+        stats = ", ".join(f"{stat} REAL" for stat in PERCENTILE_STATS)
+        self.conn.execute(text(f"CREATE TABLE players (id INTEGER, tournament_id INTEGER, season_id INTEGER, "
+                               f"class_id INTEGER, position TEXT, {stats})"))
+        for row in PERCENTILE_PLAYERS:
+            self.conn.execute(text("INSERT INTO players (id, tournament_id, season_id, class_id, position, points) "
+                                   "VALUES (:id, :tournament_id, :season_id, :class_id, :position, :points)"),
+                              dict(zip(("id", "tournament_id", "season_id", "class_id", "position", "points"), row)))
+        # Only the PostgreSQL casts differ
+        columns = _percentile_columns().replace("::numeric", "").replace("::float8", "")
+        rows = self.conn.execute(text(f"SELECT players.id, {columns} FROM players ORDER BY id")).mappings()
+        self.view = {row["id"]: row for row in rows}
+
+    def column(self, name):
+        return [self.view[player[0]][name] for player in PERCENTILE_PLAYERS]
+
+    def test_ties_share_a_rank_and_nulls_get_none(self):
+        self.assertEqual(self.column("points_rank_tournament"), [1, 1, 3, None, 1, 2, 1])
+        # Share of the ranked cohort below the player; the NULL stat is not part of it
+        self.assertEqual(self.column("points_pct_tournament"), [50.0, 50.0, 0.0, None, 100.0, 0.0, 0.0])
+        # The cohort counts every player of the tournament, the stat's size only those ranked
+        self.assertEqual(self.column("tournament_size"), [4, 4, 4, 4, 2, 2, 1])
+        self.assertEqual(self.column("points_size_tournament"), [3, 3, 3, 3, 2, 2, 1])
+        self.assertEqual(self.column("goals_size_tournament"), [0] * len(PERCENTILE_PLAYERS))
+        self.assertEqual(self.column("goals_rank_tournament"), [None] * len(PERCENTILE_PLAYERS))
+
+    def test_cohorts_partition_the_ranking(self):
+        self.assertEqual(self.column("points_rank_tournament_position"), [1, 1, 2, None, 1, 2, 1])
+        self.assertEqual(self.column("points_pct_tournament_position"), [100.0, 0.0, 0.0, None, 100.0, 0.0, 0.0])
+        # Tournaments 1 and 2 are ranked together by class; tournament 3 has no class and stays alone
+        self.assertEqual(self.column("points_rank_class"), [1, 1, 3, None, 4, 5, 1])
+        self.assertEqual(self.column("points_pct_class"), [75.0, 75.0, 50.0, None, 25.0, 0.0, 0.0])
+        self.assertEqual(self.column("class_size"), [6, 6, 6, 6, 6, 6, 1])
+        self.assertEqual(self.column("points_size_class_position"), [4, 1, 4, 4, 4, 4, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
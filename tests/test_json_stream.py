@@ -0,0 +1,45 @@
+import asyncio
+import json
+import unittest
+from src.utils.json_stream import iter_json_chunks
+
+
+async def _byte_chunks(payload: bytes, size: int):
+    for i in range(0, len(payload), size):
+        yield payload[i:i + size]
+
+
+async def _collect(payload: bytes, prefix: str, chunk_size: int, read_size: int = 7):
+    return [chunk async for chunk in iter_json_chunks(_byte_chunks(payload, read_size), prefix, chunk_size)]
+
+
+class TestJsonStream(unittest.TestCase):
+    def test_chunks_nested_array(self):
+        matches = [{"matchId": i, "matchResult": {"homeGoals": i % 4}} for i in range(11)]
+        payload = json.dumps({"tournamentId": 1, "matches": matches}).encode()
+
+        chunks = asyncio.run(_collect(payload, "matches.item", 4))
+
+        self.assertEqual([len(c) for c in chunks], [4, 4, 3])
+        self.assertEqual([m for c in chunks for m in c], matches)
+
+    def test_top_level_array_with_floats(self):
+        players = [{"personId": 1, "shotsPct": 12.5}, {"personId": 2, "shotsPct": None}]
+        payload = json.dumps(players).encode()
+
+        chunks = asyncio.run(_collect(payload, "item", 10))
+
+        self.assertEqual(chunks, [players])
+        self.assertIsInstance(chunks[0][0]["shotsPct"], float)
+
+    def test_empty_array_yields_nothing(self):
+        chunks = asyncio.run(_collect(b'{"matches": []}', "matches.item", 5))
+        self.assertEqual(chunks, [])
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(_collect(b"[]", "item", 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import random
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.services import leaderboard_snapshot
+from src.services.hockey_analytics import _STAT_SORTS, TOP_SCORER_FIELDS, HockeyAnalytics
+from src.services.leaderboard_snapshot import load_snapshot
+from src.utils.pagination import InvalidCursor
+
+VIEW_COLUMNS = TOP_SCORER_FIELDS + ("tournament_type", "tournament_is_deleted")
+
+
+def _player(i, rng):
+    row = {name: None for name in VIEW_COLUMNS}
+    # Narrow ranges, so every sort has ties that the later keys must break
+    row.update(
+        id=i, person_id=1000 + i, first_name=f"First{i}", last_name=f"Last{i}", team_name=f"Team {i % 7}",
+        position=rng.choice(["F", "D", "G", None]), rank=rng.choice([None, 1, 2, 3]),
+        games_played=rng.randint(0, 5), goals_scored=rng.randint(0, 3), assists=rng.randint(0, 3),
+        scoring_points=rng.randint(0, 4), plus_minus=rng.randint(-2, 2), pim=rng.randint(0, 2),
+        shots=rng.randint(0, 3), shots_pct=rng.choice([None, 0.0, 12.5, 50.0]),
+        faceoffs_win_pct=rng.choice([None, 40.0, 55.5]), org_id=i % 5,
+        tournament_id=1 + i % 3, tournament_name=f"Tournament {1 + i % 3}", season_name="2024/2025",
+        tournament_type="league", tournament_is_deleted=int(i % 3 == 2),
+    )
+    return row
+
+
+class TestLeaderboardSnapshot(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ATTACH DATABASE ':memory:' AS readonly")
+            conn.exec_driver_sql("CREATE TABLE data_version (id INTEGER PRIMARY KEY, version INTEGER)")
+            conn.exec_driver_sql("INSERT INTO data_version VALUES (1, 7)")
+            conn.exec_driver_sql("CREATE TABLE tournaments (tournament_id, tournament_name, season_name, tournament_type)")
+            conn.exec_driver_sql("INSERT INTO tournaments VALUES (2, 'Tournament 2', '2024/2025', 'league')")
+            conn.exec_driver_sql(f"CREATE TABLE readonly.mv_player_leaderboard ({', '.join(VIEW_COLUMNS)})")
+            rng = random.Random(3)
+            conn.execute(
+                text(f"INSERT INTO readonly.mv_player_leaderboard VALUES ({', '.join(':' + c for c in VIEW_COLUMNS)})"),
+                [_player(i, rng) for i in range(1, 301)]
+            )
+        self.Session = sessionmaker(bind=engine)
+        self.analytics = HockeyAnalytics()
+        self.analytics._get_fresh_db = self.Session
+        with mock.patch.object(leaderboard_snapshot, "get_read_session", self.Session):
+            self.snapshot = load_snapshot()
+
+    def _pages(self, method, limit, **kwargs):
+        """Every page of a leaderboard, following next_cursor"""
+        pages, cursor = [], None
+        while True:
+            result = method(limit=limit, cursor=cursor, **kwargs)
+            self.assertTrue(result["success"], result)
+            pages.append(result["data"])
+            cursor = result["next_cursor"]
+            if cursor is None:
+                return pages
+
+    def test_pages_match_the_sql_path_for_every_sort(self):
+        self.assertEqual((self.snapshot.version, len(self.snapshot)), (7, 300))
+        self.assertEqual(self.snapshot.columns["last_name"].shape, (300,))
+        for stat_type in _STAT_SORTS:
+            for kwargs in ({}, {"position": "D"}):
+                sql = self._pages(self.analytics.get_top_scorers_overall, 40, stat_type=stat_type, **kwargs)
+                memory = self._pages(self.analytics.get_top_scorers_overall, 40, stat_type=stat_type,
+                                     snapshot=self.snapshot, **kwargs)
+                self.assertEqual(memory, sql, (stat_type, kwargs))
+            sql = self._pages(self.analytics.get_tournament_player_stats, 25, tournament_id=2, stat_type=stat_type)
+            memory = self._pages(self.analytics.get_tournament_player_stats, 25, tournament_id=2,
+                                 stat_type=stat_type, snapshot=self.snapshot)
+            self.assertEqual(memory, sql, stat_type)
+
+    def test_deleted_tournaments_and_unknown_positions(self):
+        result = self.analytics.get_top_scorers_overall(limit=200, snapshot=self.snapshot)
+        self.assertEqual(result["count"], 200)
+        self.assertNotIn(3, {row["tournament_id"] for row in result["data"]})
+        self.assertEqual(self.analytics.get_top_scorers_overall(position="X", snapshot=self.snapshot)["data"], [])
+
+    def test_cursors_are_interchangeable_with_sql(self):
+        first = self.analytics.get_top_scorers_overall(stat_type="saves", limit=10)
+        from_sql = self.analytics.get_top_scorers_overall(stat_type="saves", limit=10, cursor=first["next_cursor"])
+        from_memory = self.analytics.get_top_scorers_overall(stat_type="saves", limit=10,
+                                                             cursor=first["next_cursor"], snapshot=self.snapshot)
+        self.assertEqual(from_memory, from_sql)
+        with self.assertRaises(InvalidCursor):
+            self.analytics.get_top_scorers_overall(stat_type="goals", cursor=first["next_cursor"],
+                                                   snapshot=self.snapshot)
+
+    def test_only_the_loaded_version_is_served(self):
+        snapshots = leaderboard_snapshot.LeaderboardSnapshots()
+        snapshots.snapshot = self.snapshot
+        with mock.patch.object(leaderboard_snapshot.threading, "Thread") as thread:
+            self.assertIs(snapshots.get(7), self.snapshot)
+            self.assertIsNone(snapshots.get(8))
+            self.assertIsNone(snapshots.get(8))
+        # One background reload, however many requests saw the new version
+        self.assertEqual(thread.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
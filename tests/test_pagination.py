@@ -0,0 +1,60 @@
+import unittest
+from sqlalchemy import create_engine, text
+from src.utils.pagination import InvalidCursor, Keyset, encode_cursor
+
+
+class TestKeyset(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE scores (id INTEGER PRIMARY KEY, points INTEGER NOT NULL)"))
+            # Ties on points, so only (points, id) is unique
+            conn.execute(text("INSERT INTO scores (id, points) VALUES (:id, :points)"),
+                         [{"id": i, "points": i % 3} for i in range(1, 11)])
+
+    def _page(self, keyset, cursor, limit):
+        params = {"limit": limit + 1}
+        query = (f"SELECT id, points{keyset.select()} FROM scores WHERE 1 = 1"
+                 f"{keyset.after(cursor, params)} {keyset.order_by()} LIMIT :limit")
+        with self.engine.connect() as conn:
+            rows = [dict(row._mapping) for row in conn.execute(text(query), params)]
+        return keyset.page(rows, limit)
+
+    def _walk(self, keyset, limit):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = self._page(keyset, cursor, limit)
+            seen.extend(rows)
+            if cursor is None:
+                return seen
+
+    def test_pages_cover_every_row_once_in_order(self):
+        keyset = Keyset("scores", ("points", "id"), descending=True)
+        rows = self._walk(keyset, limit=3)
+        self.assertEqual([r["id"] for r in rows], [8, 5, 2, 10, 7, 4, 1, 9, 6, 3])
+        self.assertNotIn("_key0", rows[0])
+
+    def test_index_prefix_is_bounded_on_its_own(self):
+        keyset = Keyset("scores", ("points", "id"), descending=True, index_prefix=1)
+        self.assertEqual([r["id"] for r in self._walk(keyset, limit=3)], [8, 5, 2, 10, 7, 4, 1, 9, 6, 3])
+        params = {}
+        self.assertEqual(keyset.after(encode_cursor("scores", [1, 4]), params),
+                         " AND (points) <= (:_after0) AND (points, id) < (:_after0, :_after1)")
+
+    def test_last_full_page_has_no_cursor(self):
+        rows, cursor = self._page(Keyset("scores", ("id",)), None, 10)
+        self.assertEqual(len(rows), 10)
+        self.assertIsNone(cursor)
+
+    def test_cursor_from_another_sort_is_rejected(self):
+        cursor = encode_cursor("scores:goals", [1, 2])
+        with self.assertRaises(InvalidCursor):
+            Keyset("scores:points", ("points", "id")).after(cursor, {})
+
+    def test_garbage_cursor_is_rejected(self):
+        with self.assertRaises(InvalidCursor):
+            Keyset("scores", ("id",)).after("not a cursor!", {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from types import SimpleNamespace
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.models.base import Base
+from src.models.person import Person
+from src.models.player_career import PlayerCareer
+from src.models.team_member import TeamMember
+from src.models.tournament import Tournament
+from src.services.hockey_analytics import HockeyAnalytics
+from src.services.player_statistics_service import PlayerStatisticsService
+
+
+def _stats(person_id, games, goals, assists):
+    return {"personId": person_id, "firstName": "Ola", "lastName": "Nordmann", "teamName": "Team",
+            "gamesPlayed": games, "goalsScored": goals, "assists": assists, "pts": goals + assists, "shots": 10}
+
+
+class TestPlayerCareers(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        self.session = self.Session()
+        self.session.add_all([
+            Tournament(tournament_id=1, season_id=100, season_name="2023/2024"),
+            Tournament(tournament_id=2, season_id=101, season_name="2024/2025"),
+            Tournament(tournament_id=3, season_id=101, season_name="2024/2025"),
+            # On two teams: joining team_members per person used to double the totals
+            TeamMember(person_id=7, team_id=10, nationality="NOR"),
+            TeamMember(person_id=7, team_id=11, nationality="NOR"),
+            Person(person_id=7, nationality="NOR"),
+        ])
+        self.session.commit()
+        self.service = PlayerStatisticsService()
+        self.service.settings = SimpleNamespace(INGEST_REFRESH_MODE="replace")
+
+    def tearDown(self):
+        self.session.close()
+
+    def _career(self, person_id):
+        self.session.expire_all()
+        return self.session.get(PlayerCareer, person_id)
+
+    def test_careers_follow_every_save(self):
+        self.service.save_tournament_player_statistics(self.session, 1, [_stats(7, 10, 5, 5), _stats(8, 4, 0, 1)])
+        self.service.save_tournament_player_statistics(self.session, 2, [_stats(7, 10, 3, 1)])
+        self.service.save_tournament_player_statistics(self.session, 3, [_stats(7, 5, 2, 0)])
+
+        career = self._career(7)
+        self.assertEqual((career.tournaments_played, career.seasons_played), (3, 2))
+        self.assertEqual((career.total_games, career.total_goals, career.total_points), (25, 10, 16))
+        self.assertEqual((career.points_per_game, career.career_shot_pct), (0.64, 33.33))
+        self.assertEqual([(s["season_name"], s["tournaments"], s["points"]) for s in career.seasons],
+                         [("2024/2025", 2, 6), ("2023/2024", 1, 10)])
+
+        # Person 8 drops out of tournament 1, their only tournament
+        self.service.save_tournament_player_statistics(self.session, 1, [_stats(7, 10, 5, 5)])
+        self.assertIsNone(self._career(8))
+        self.assertEqual(self._career(7).total_points, 16)
+
+    def test_both_refresh_modes_report_the_same_result(self):
+        results = []
+        for mode in ("replace", "swap"):
+            self.service.settings = SimpleNamespace(INGEST_REFRESH_MODE=mode)
+            results.append(self.service.save_tournament_player_statistics(
+                self.session, 1, [_stats(7, 10, 5, 5), _stats(8, 4, 0, 1), _stats(8, 4, 0, 1)]))
+        self.assertEqual([(type(r).__name__, r.inserted, r.rejected_count) for r in results],
+                         [("BatchInsertResult", 2, 0)] * 2)
+        self.assertEqual(self._career(7).total_points, 10)
+
+    def test_career_endpoint_reads_the_precomputed_row(self):
+        self.service.save_tournament_player_statistics(self.session, 1, [_stats(7, 10, 5, 5)])
+        self.service.save_tournament_player_statistics(self.session, 2, [_stats(7, 10, 3, 1)])
+        analytics = HockeyAnalytics()
+        analytics._get_fresh_db = self.Session
+
+        result = analytics.get_player_career_stats(7)
+        self.assertTrue(result["success"], result)
+        self.assertEqual(result["player_info"]["total_points"], 14)
+        self.assertEqual(result["player_info"]["nationality"], "NOR")
+        self.assertEqual(result["tournaments_count"], 2)
+        self.assertEqual(analytics.get_player_career_stats(99)["player_info"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
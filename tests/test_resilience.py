@@ -0,0 +1,174 @@
+import asyncio
+import random
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+import httpx
+from src.utils import resilience
+from src.utils.resilience import (
+    CircuitBreaker, CircuitOpenError, RetryBudget, RetryPolicy, UpstreamError,
+    _RetryableError, _with_retries, decorrelated_jitter, parse_retry_after, stream_json_chunks,
+)
+
+TEST_SETTINGS = SimpleNamespace(
+    UPSTREAM_BREAKER_THRESHOLD=3,
+    UPSTREAM_BREAKER_RESET_SECONDS=30.0,
+    UPSTREAM_RETRY_BUDGET_RATIO=0.2,
+    UPSTREAM_RETRY_BUDGET_RESERVE=10.0,
+    UPSTREAM_MAX_ATTEMPTS=2,
+    UPSTREAM_TIMEOUT=5.0,
+    UPSTREAM_BACKOFF_BASE=0.1,
+    UPSTREAM_BACKOFF_CAP=1.0,
+    UPSTREAM_RETRY_AFTER_CAP=60.0,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBackoff(unittest.TestCase):
+    def test_decorrelated_jitter_stays_within_bounds(self):
+        rng = random.Random(1)
+        delay = 1.0
+        for _ in range(50):
+            delay = decorrelated_jitter(delay, base=1.0, cap=30.0, rng=rng)
+            self.assertGreaterEqual(delay, 1.0)
+            self.assertLessEqual(delay, 30.0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("7"), 7.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_and_allows_one_probe(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        self.assertTrue(breaker.record_failure())
+        self.assertFalse(breaker.allow_request())
+
+        clock.now = 10
+        self.assertTrue(breaker.allow_request())   # the half-open probe
+        self.assertFalse(breaker.allow_request())  # everyone else waits for it
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow_request())
+
+    def test_failed_probe_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+        breaker.record_failure()
+        clock.now = 5
+        self.assertTrue(breaker.allow_request())
+        self.assertTrue(breaker.record_failure())
+        self.assertFalse(breaker.allow_request())
+
+
+class TestRetryBudget(unittest.TestCase):
+    def test_budget_limits_retries_to_ratio_once_reserve_is_spent(self):
+        budget = RetryBudget(ratio=0.5, reserve=2)
+        self.assertTrue(budget.try_spend())
+        self.assertTrue(budget.try_spend())
+        self.assertFalse(budget.try_spend())
+        budget.record_request()
+        budget.record_request()
+        self.assertTrue(budget.try_spend())
+
+
+class TestWithRetries(unittest.TestCase):
+    def setUp(self):
+        resilience.reset_upstream_state()
+        patcher = mock.patch.object(resilience, "get_settings", return_value=TEST_SETTINGS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sleeps = []
+
+        async def fake_sleep(seconds):
+            self.sleeps.append(seconds)
+        sleep_patcher = mock.patch.object(resilience.asyncio, "sleep", fake_sleep)
+        sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+        self.addCleanup(resilience.reset_upstream_state)
+
+    def run_attempts(self, outcomes, max_attempts=3):
+        outcomes = list(outcomes)
+
+        async def attempt_once():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        policy = RetryPolicy(max_attempts=max_attempts, backoff_base=0.1, backoff_cap=1.0, retry_after_cap=60)
+        return asyncio.run(_with_retries("http://upstream/x", "things", policy, attempt_once))
+
+    def test_retries_until_success_and_honours_retry_after(self):
+        result = self.run_attempts([_RetryableError("503", retry_after=20), {"ok": True}])
+        self.assertEqual(result, {"ok": True})
+        self.assertEqual(len(self.sleeps), 1)
+        self.assertGreaterEqual(self.sleeps[0], 20)
+        metrics = resilience.upstream_metrics()["upstream"]
+        self.assertEqual(metrics["retries"], 1)
+        self.assertEqual(metrics["retry_after_honoured"], 1)
+
+    def test_gives_up_after_max_attempts(self):
+        with self.assertRaises(UpstreamError):
+            self.run_attempts([_RetryableError("503")] * 2, max_attempts=2)
+
+    def test_open_circuit_fails_fast(self):
+        with self.assertRaises(UpstreamError):
+            self.run_attempts([_RetryableError("503")] * 3)
+        with self.assertRaises(CircuitOpenError):
+            self.run_attempts([{"ok": True}])
+        self.assertEqual(resilience.upstream_metrics()["upstream"]["short_circuited"], 1)
+
+    def test_unexpected_error_releases_the_half_open_probe(self):
+        breaker = resilience._host_state("http://upstream/x")[1].breaker
+        breaker.state, breaker.opened_at = "open", -100.0
+        with self.assertRaises(RuntimeError):
+            self.run_attempts([RuntimeError("consumer bug")])
+        self.assertFalse(breaker.probe_in_flight)
+        self.assertEqual(breaker.state, "half_open")
+        self.assertEqual(self.run_attempts([{"ok": True}]), {"ok": True})
+        self.assertEqual(breaker.state, "closed")
+
+    def stream(self, body, chunk_size):
+        real_client = httpx.AsyncClient
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+
+        async def collect():
+            chunks = []
+            with mock.patch.object(resilience.httpx, "AsyncClient",
+                                   lambda **kwargs: real_client(transport=transport, **kwargs)):
+                async for chunk in stream_json_chunks("http://upstream/x", "matches.item", chunk_size, "matches"):
+                    chunks.append(chunk)
+            return chunks
+        return asyncio.run(collect())
+
+    def test_truncated_stream_is_retried_then_fails(self):
+        body = b'{"matches": [{"id": 1}, {"id": 2}, {"id": 3}]}'
+        self.assertEqual(self.stream(body, 2), [[{"id": 1}, {"id": 2}], [{"id": 3}]])
+
+        truncated = body[:len(body) // 2]
+        with self.assertRaises(UpstreamError) as caught:
+            self.stream(truncated, 500)
+        self.assertIn("after 2 attempts", str(caught.exception))
+        self.assertEqual(resilience.upstream_metrics()["upstream"]["failed_attempts"], 2)
+
+        # Past the first chunk nothing is retried, but the error is still an UpstreamError
+        with self.assertRaises(UpstreamError) as caught:
+            self.stream(truncated, 1)
+        self.assertIn("failed after 1 records", str(caught.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from src.utils import data_version
+from src.utils.data_version import DataVersionTracker, _changes_data
+from src.utils.response_cache import VersionedResponseCache
+
+
+class TestVersionedResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = VersionedResponseCache(maxsize=2)
+        self.calls = 0
+
+    def _get(self, endpoint, params, version, value=None):
+        async def compute():
+            self.calls += 1
+            return value if value is not None else {"success": True, "n": self.calls}
+        return asyncio.run(self.cache.get_or_compute(endpoint, params, version, compute))
+
+    def test_same_version_is_served_from_cache(self):
+        first = self._get("standings", {"tournament_id": 1}, 1)
+        self.assertEqual(self._get("standings", {"tournament_id": 1}, 1), first)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_new_version_recomputes_in_the_same_slot(self):
+        self._get("filters", {}, 1)
+        self.assertEqual(self._get("filters", {}, 2)["n"], 2)
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self._get("a", {}, 1)
+        self._get("b", {}, 1)
+        self._get("a", {}, 1)
+        self._get("c", {}, 1)
+        self._get("a", {}, 1)
+        self._get("b", {}, 1)
+        self.assertEqual(self.calls, 4)
+
+    def test_failures_are_not_cached(self):
+        self._get("insights", {}, 1, value={"success": False, "error": "boom"})
+        self._get("insights", {}, 1, value={"success": False, "error": "boom"})
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+class TestDataChangeDetection(unittest.TestCase):
+    def test_writes_to_ingested_tables_count(self):
+        self.assertTrue(_changes_data("INSERT INTO team_members (person_id) VALUES (%(p)s)"))
+        self.assertTrue(_changes_data('  delete from "standings" WHERE tournament_id = 1'))
+
+    def test_reads_and_bookkeeping_do_not_count(self):
+        self.assertFalse(_changes_data("SELECT * FROM teams"))
+        self.assertFalse(_changes_data("UPDATE data_version SET version = version + 1"))
+        self.assertFalse(_changes_data("INSERT INTO stage_teams_1a2b3c4d SELECT * FROM teams"))
+
+
+class FakeVersionSession:
+    def __init__(self, version):
+        self.version = version
+
+    async def execute(self, statement):
+        return SimpleNamespace(scalar=lambda: self.version)
+
+
+class TestDataVersionTracker(unittest.TestCase):
+    def test_replica_reads_use_the_replica_version(self):
+        tracker = DataVersionTracker()
+        with mock.patch.object(data_version, "get_settings",
+                               return_value=SimpleNamespace(DATABASE_REPLICA_URL="postgresql://replica/db")):
+            tracker.start()
+        self.assertIsNone(tracker._thread)
+        # The primary's newer version must not label the replica's older data
+        tracker.version = 9
+        self.assertEqual(asyncio.run(tracker.current(FakeVersionSession(7))), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
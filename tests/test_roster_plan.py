@@ -0,0 +1,105 @@
+import unittest
+from types import SimpleNamespace
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.models.base import Base
+from src.models.person import Person
+from src.models.team_member import TeamMember
+from src.models.team_roster_count import TeamRosterCount
+from src.services.team_member_service import RosterPlan, TeamMemberService
+
+
+def _member(person_id, image_url=None, member_type="Player", position="F"):
+    return {"personId": person_id, "firstName": "Ola", "lastName": "Nordmann",
+            "birthDate": "2010-05-01T00:00:00", "imageUrl": image_url,
+            "memberType": member_type, "position": position}
+
+
+class TestRosterPlan(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        # Skip __init__, it connects to MinIO
+        self.service = TeamMemberService.__new__(TeamMemberService)
+        self.service.settings = SimpleNamespace(INGEST_REFRESH_MODE="replace", INGEST_THROTTLE_SCALE=0)
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_person_on_several_teams_gets_one_image_job(self):
+        plan = RosterPlan()
+        self.service.plan_roster(plan, {"team_id": 1, "members": [_member(10, "http://img/10"), _member(11)]})
+        self.service.plan_roster(plan, {"team_id": 2, "members": [_member(10, "http://img/10?jwt=2"), _member(10)]})
+
+        self.assertEqual(plan.member_count, 3)
+        self.assertEqual(plan.images_by_person, {10: ("http://img/10", None)})
+        self.assertEqual(plan.duplicate_image_jobs, 1)
+
+    def test_empty_roster_deletes_the_old_rows(self):
+        self.session.add_all([TeamMember(person_id=1, team_id=1), TeamMember(person_id=2, team_id=2)])
+        self.session.commit()
+
+        plan = RosterPlan()
+        self.assertEqual(self.service.plan_roster(plan, {"team_id": 1, "members": [{"firstName": "No id"}]}), 0)
+        self.assertEqual(plan.members_by_team, {1: {}})
+        self.assertEqual(self.service.save_roster_plan(self.session, plan), 0)
+
+        self.assertEqual([(m.team_id, m.person_id) for m in self.session.query(TeamMember).all()], [(2, 2)])
+        self.assertEqual(self.session.get(TeamRosterCount, 1).member_count, 0)
+
+    def test_saving_an_empty_team_deletes_its_members(self):
+        self.session.add_all([TeamMember(person_id=1, team_id=1), TeamMember(person_id=2, team_id=1)])
+        self.session.commit()
+
+        self.service.save_team_members(self.session, {"team_id": 1, "members": []})
+
+        self.assertEqual(self.session.query(TeamMember).filter(TeamMember.team_id == 1).count(), 0)
+        self.assertEqual(self.session.get(TeamRosterCount, 1).member_count, 0)
+
+    def test_save_replaces_only_planned_teams(self):
+        self.session.add_all([TeamMember(person_id=1, team_id=1), TeamMember(person_id=2, team_id=3)])
+        self.session.commit()
+
+        plan = RosterPlan()
+        self.service.plan_roster(plan, {"team_id": 1, "members": [_member(10), _member(11)]})
+        self.service.plan_roster(plan, {"team_id": 2, "members": [_member(10)]})
+        self.assertEqual(self.service.save_roster_plan(self.session, plan, teams_per_batch=1), 3)
+
+        rows = sorted((m.team_id, m.person_id) for m in self.session.query(TeamMember).all())
+        self.assertEqual(rows, [(1, 10), (1, 11), (2, 10), (3, 2)])
+
+    def test_save_writes_roster_counts(self):
+        self.session.add(TeamRosterCount(team_id=1, member_count=9, player_count=9, staff_count=0))
+        self.session.commit()
+
+        plan = RosterPlan()
+        self.service.plan_roster(plan, {"team_id": 1, "members": [
+            _member(10), _member(11, position="D"), _member(12, position=None),
+            _member(13, member_type="Coach", position=None),
+        ]})
+        self.service.save_roster_plan(self.session, plan)
+
+        counts = self.session.get(TeamRosterCount, 1)
+        self.assertEqual((counts.member_count, counts.player_count, counts.staff_count), (4, 3, 1))
+        self.assertEqual(counts.position_counts, {"F": 1, "D": 1})
+
+    def test_save_keeps_one_person_row_per_person(self):
+        self.session.add(Person(person_id=10, first_name="Ola", nationality="NOR", height=180))
+        self.session.commit()
+
+        plan = RosterPlan()
+        self.service.plan_roster(plan, {"team_id": 1, "members": [_member(10), _member(11)]})
+        self.service.plan_roster(plan, {"team_id": 2, "members": [_member(10)]})
+        self.service.save_roster_plan(self.session, plan)
+
+        self.session.expire_all()
+        persons = {p.person_id: p for p in self.session.query(Person).all()}
+        self.assertEqual(sorted(persons), [10, 11])
+        # The roster has no nationality or height; the known ones stay
+        self.assertEqual((persons[10].nationality, persons[10].height, persons[10].last_name), ("NOR", 180, "Nordmann"))
+        self.assertEqual(str(persons[11].birth_date)[:10], "2010-05-01")
+
+
+if __name__ == "__main__":
+    unittest.main()
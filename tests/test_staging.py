@@ -0,0 +1,78 @@
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.models.base import Base
+from src.models.team import Team
+from src.models.team_member import TeamMember
+from src.models.tournament import Tournament
+from src.utils.staging import StagedRefresh, recent_swap_stats
+
+
+class TestStagedRefresh(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.session.add_all([Tournament(tournament_id=1, season_id=100), Tournament(tournament_id=2, season_id=100)])
+        self.session.commit()
+        self.refresh = StagedRefresh(Team, key_columns=("team_id", "tournament_id"))
+
+    def tearDown(self):
+        self.session.close()
+
+    def _teams(self, tournament_id):
+        return [(t.team_id, t.team_name) for t in
+                self.session.query(Team).filter(Team.tournament_id == tournament_id).order_by(Team.team_id)]
+
+    def test_initial_load_inserts_everything(self):
+        stats = self.refresh.refresh(self.session, {"tournament_id": 1},
+                                     [Team(team_id=i, team_name=f"Team {i}") for i in range(1, 4)])
+
+        self.assertEqual((stats.inserted, stats.updated, stats.deleted), (3, 0, 0))
+        self.assertEqual(self._teams(1), [(1, "Team 1"), (2, "Team 2"), (3, "Team 3")])
+        self.assertIs(recent_swap_stats()[-1], stats)
+
+    def test_swap_only_touches_changed_rows_in_scope(self):
+        self.refresh.refresh(self.session, {"tournament_id": 1},
+                             [Team(team_id=i, team_name=f"Team {i}") for i in range(1, 4)])
+        self.session.add(Team(team_id=1, tournament_id=2, team_name="Other tournament"))
+        self.session.commit()
+
+        stats = self.refresh.refresh(self.session, {"tournament_id": 1}, [
+            Team(team_id=2, team_name="Team 2"),
+            Team(team_id=3, team_name="Renamed"),
+            Team(team_id=4, team_name="Team 4"),
+            Team(team_id=4, team_name="Duplicate key is skipped"),
+        ])
+
+        self.assertEqual(stats.staged_rows, 3)
+        self.assertEqual((stats.inserted, stats.updated, stats.deleted), (1, 1, 1))
+        self.assertGreaterEqual(stats.swap_seconds, 0)
+        self.assertEqual(self._teams(1), [(2, "Team 2"), (3, "Renamed"), (4, "Team 4")])
+        self.assertEqual(self._teams(2), [(1, "Other tournament")])
+
+    def test_volatile_columns_do_not_count_as_changes(self):
+        refresh = StagedRefresh(TeamMember, key_columns=("person_id", "team_id"),
+                                volatile_columns=("image_url",))
+        self.session.add(Team(team_id=10, tournament_id=1))
+        self.session.commit()
+
+        refresh.refresh(self.session, {"team_id": 10},
+                        [TeamMember(person_id=5, first_name="Kari", image_url="https://img/5?jwt=a")])
+        stats = refresh.refresh(self.session, {"team_id": 10},
+                                [TeamMember(person_id=5, first_name="Kari", image_url="https://img/5?jwt=b")])
+
+        self.assertEqual((stats.inserted, stats.updated, stats.deleted), (0, 0, 0))
+
+    def test_failed_load_leaves_target_untouched(self):
+        self.refresh.refresh(self.session, {"tournament_id": 1}, [Team(team_id=1, team_name="Team 1")])
+
+        staging = self.refresh.begin(self.session, {"tournament_id": 1})
+        staging.load([Team(team_id=2, team_name="Team 2")])
+        staging.discard()
+
+        self.assertEqual(self._teams(1), [(1, "Team 1")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.models.base import Base
+from src.models.match import Match
+from src.models.standing import Standing
+from src.services.hockey_analytics import HockeyAnalytics
+from src.services.match_service import MatchService
+from src.services.standings_engine import (PointRules, compute_standings, decided_in, parse_point_rules,
+                                           standings_timeline, OVERTIME, PENALTIES)
+
+
+def _match(match_id, home, away, home_goals=None, away_goals=None, end_result=None, round_id=None, day=1):
+    return dict(match_id=match_id, tournament_id=1, hometeam_id=home, awayteam_id=away,
+                hometeam=f"Team {home}", awayteam=f"Team {away}", hometeam_overridden_name=None,
+                awayteam_overridden_name=None, home_goals=home_goals, away_goals=away_goals,
+                match_end_result=end_result, round_id=round_id, round_name=round_id and f"Round {round_id}",
+                match_date=datetime(2024, 10, day, 18))
+
+
+MATCHES = [
+    _match(1, 10, 20, 3, 1, round_id=7, day=1),
+    _match(2, 20, 30, 2, 1, "Overtime", round_id=7, day=2),
+    _match(3, 30, 10, 4, 3, "Penalties", round_id=5, day=8),  # round ids need not follow the calendar
+    _match(4, 10, 30, 2, 2, day=15),  # no round: grouped by day
+    _match(5, 20, 10, round_id=9, day=22),  # not played yet
+]
+
+
+class TestStandingsEngine(unittest.TestCase):
+    def test_table_from_match_results(self):
+        table = {row["team_id"]: row for row in compute_standings(MATCHES, tournament_id=1)}
+
+        team = table[10]
+        self.assertEqual((team["matches_played"], team["matches_home"], team["matches_away"]), (3, 2, 1))
+        self.assertEqual((team["victories"], team["draws"], team["losses"]), (1, 1, 1))
+        self.assertEqual((team["victories_fulltime_home"], team["losses_penalties_away"]), (1, 1))
+        # Regulation win 3, draw 1, penalty loss 1
+        self.assertEqual((team["points"], team["points_home"], team["points_away"]), (5, 4, 1))
+        self.assertEqual((team["goals_scored"], team["goals_conceded"], team["goals_diff"]), (8, 7, 1))
+        self.assertEqual((team["home_record"], team["total_goals_formatted"]), ("1-1-0", "8-7"))
+
+        self.assertEqual(table[20]["points"], 2)
+        self.assertEqual((table[30]["points"], table[30]["victories_penalties_home"], table[30]["losses_overtime_away"]),
+                         (1 + 2 + 1, 1, 1))
+        self.assertEqual([row["team_id"] for row in compute_standings(MATCHES)], [10, 30, 20])
+        self.assertEqual(set(table[10]) - {"display_name"}, {c.name for c in Standing.__table__.columns}
+                         - {"id", "penalty_minutes", "team_penalty", "team_penalty_negative", "team_penalty_positive",
+                            "dispensation", "team_entry_status", "entry_id", "created_at", "updated_at"})
+
+    def test_point_rules(self):
+        rules = parse_point_rules("win=2, overtime_loss=0")
+        self.assertEqual(rules, PointRules(win=2, overtime_loss=0))
+        self.assertEqual({row["team_id"]: row["points"] for row in compute_standings(MATCHES, rules)},
+                         {10: 2 + 1 + 1, 20: 2, 30: 2 + 1})
+        with self.assertRaises(ValueError):
+            parse_point_rules("bonus=1")
+        self.assertEqual((decided_in("OT"), decided_in("Straffeslag"), decided_in(None)), (OVERTIME, PENALTIES, 0))
+
+    def test_timeline_by_round(self):
+        timeline = standings_timeline(MATCHES)
+        self.assertEqual([(r["round_name"], r["date"]) for r in timeline["rounds"]],
+                         [("Round 7", "2024-10-01"), ("Round 5", "2024-10-08"), (None, "2024-10-15")])
+        self.assertEqual([team["team_id"] for team in timeline["teams"]], [10, 20, 30])
+        self.assertEqual(timeline["series"]["points"], [[3, 4, 5], [2, 2, 2], [1, 3, 4]])
+        self.assertEqual(timeline["series"]["position"], [[1, 1, 1], [2, 3, 3], [3, 2, 2]])
+        self.assertEqual(timeline["series"]["matches_played"][1], [2, 2, 2])
+
+        # The last round is the current table
+        final = {row["team_id"]: row for row in compute_standings(MATCHES)}
+        for i, team in enumerate(timeline["teams"]):
+            for name, values in timeline["series"].items():
+                self.assertEqual(values[i][-1], final[team["team_id"]][name], name)
+
+    def test_computed_standings_against_the_stored_table(self):
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        session = Session()
+        session.add_all([Match(**match) for match in MATCHES])
+        session.add_all([Standing(tournament_id=1, team_id=10, position=1, points=5, victories=1),
+                         Standing(tournament_id=1, team_id=20, position=2, points=3)])
+        session.commit()
+        session.close()
+        analytics = HockeyAnalytics()
+        analytics._get_fresh_db = Session
+
+        result = analytics.get_computed_standings(1, compare=True)
+        self.assertTrue(result["success"], result)
+        self.assertEqual([row["display_name"] for row in result["standings"]], ["Team 10", "Team 30", "Team 20"])
+        self.assertEqual(result["differences"], [
+            {"team_id": 20, "column": "position", "computed": 3, "stored": 2},
+            {"team_id": 20, "column": "points", "computed": 2, "stored": 3},
+            {"team_id": 30, "column": None, "computed": True, "stored": False},
+        ])
+
+    def test_history_is_rebuilt_when_matches_are_saved(self):
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        service = MatchService()
+        service.settings = SimpleNamespace(INGEST_REFRESH_MODE="replace")
+
+        def api_match(match):
+            return {"matchId": match["match_id"], "hometeamId": match["hometeam_id"], "awayteamId": match["awayteam_id"],
+                    "hometeam": match["hometeam"], "awayteam": match["awayteam"], "roundId": match["round_id"],
+                    "roundName": match["round_name"], "matchDate": match["match_date"].isoformat(),
+                    "matchResult": {"homeGoals": match["home_goals"], "awayGoals": match["away_goals"],
+                                    "matchEndResult": match["match_end_result"]}}
+
+        session = Session()
+        service.save_tournament_matches(session, {"tournamentId": 1, "matches": [api_match(m) for m in MATCHES[:2]]})
+        service.save_tournament_matches(session, {"tournamentId": 1, "matches": [api_match(m) for m in MATCHES]})
+        session.close()
+
+        analytics = HockeyAnalytics()
+        analytics._get_fresh_db = Session
+        result = analytics.get_standings_history(1, team_id=30)
+        self.assertTrue(result["success"], result)
+        self.assertEqual(len(result["rounds"]), 3)
+        self.assertEqual(result["series"]["position"], [[3, 2, 2]])
+        self.assertEqual(analytics.get_standings_history(2)["rounds"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
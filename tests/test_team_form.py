@@ -0,0 +1,100 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.models.base import Base
+from src.models.team_form import TeamForm
+from src.services.hockey_analytics import HockeyAnalytics
+from src.services.match_service import MatchService
+from src.services import team_form_service
+from src.services.standings_engine import PointRules
+
+
+def _api_match(match_id, home, away, home_goals, away_goals, day):
+    return {"matchId": match_id, "hometeamId": home, "awayteamId": away,
+            "hometeam": f"Team {home}", "awayteam": f"Team {away}",
+            "matchDate": datetime(2024, 1, day, 18).isoformat(),
+            "matchResult": {"homeGoals": home_goals, "awayGoals": away_goals}}
+
+
+# Team 10, oldest first: W (home), L (away), W (home), D (away), W (home), then a match to come
+MATCHES = [
+    _api_match(1, 10, 20, 3, 1, day=1),
+    _api_match(2, 30, 10, 4, 2, day=3),
+    _api_match(3, 10, 30, 1, 0, day=5),
+    _api_match(4, 20, 10, 2, 2, day=7),
+    _api_match(5, 10, 20, 5, 0, day=9),
+    _api_match(6, 20, 30, None, None, day=11),
+]
+
+
+class TestTeamForm(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        self.session = self.Session()
+        self.service = MatchService()
+        self.service.settings = SimpleNamespace(INGEST_REFRESH_MODE="replace")
+
+    def tearDown(self):
+        self.session.close()
+
+    def _save(self, matches):
+        self.service.save_tournament_matches(self.session, {"tournamentId": 1, "matches": matches})
+
+    def test_both_refresh_modes_return_the_match_count(self):
+        counts = []
+        for mode in ("replace", "swap"):
+            self.service.settings = SimpleNamespace(INGEST_REFRESH_MODE=mode)
+            counts.append(self.service.save_tournament_matches(self.session, {"tournamentId": 1, "matches": MATCHES}))
+        self.assertEqual(counts, [len(MATCHES)] * 2)
+
+    def test_form_of_a_team(self):
+        self._save(MATCHES)
+        analytics = HockeyAnalytics()
+        analytics._get_fresh_db = self.Session
+        form = analytics.get_team_form(1, 10)["form"]
+
+        self.assertEqual((form["games_played"], form["form_last5"], form["form_last10"]), (5, "WDWLW", "WDWLW"))
+        self.assertEqual((form["points_last5"], form["goals_for_last5"], form["goals_against_last5"]), (10, 13, 7))
+        self.assertEqual((form["home_form_last5"], form["away_form_last5"]), ("WWW", "DL"))
+        self.assertEqual((form["home_points_last5"], form["away_points_last5"]), (9, 1))
+        self.assertEqual((form["streak_type"], form["streak_length"], form["unbeaten_streak"]), ("W", 1, 3))
+        self.assertEqual(form["trend"]["match_ids"], [1, 2, 3, 4, 5])
+        self.assertEqual(form["trend"]["goals_for_avg"], [3.0, 2.5, 2.0, 2.0, 2.6])
+        self.assertEqual(analytics.get_team_form(1, 99)["form"], {})
+
+    def test_only_teams_with_changed_matches_are_recomputed(self):
+        self._save(MATCHES)
+        self.assertEqual(self.session.query(TeamForm).count(), 3)
+
+        changed = [dict(match) for match in MATCHES]
+        changed[1] = _api_match(2, 30, 10, 0, 6, day=3)  # a corrected score of 30 v 10
+        with mock.patch.object(team_form_service, "compute_form", wraps=team_form_service.compute_form) as compute:
+            self._save(changed)
+            self._save(changed)  # nothing changed
+        self.assertEqual([sorted(call.args[2]) for call in compute.call_args_list], [[10, 30]])
+
+        self.session.expire_all()
+        self.assertEqual(self.session.get(TeamForm, (1, 10)).form_last5, "WDWWW")
+        self.assertEqual(self.session.get(TeamForm, (1, 20)).form_last5, "LDL")
+
+        # A team whose only played match disappears loses its row
+        self._save([match for match in changed if 30 not in (match["hometeamId"], match["awayteamId"])])
+        self.assertIsNone(self.session.get(TeamForm, (1, 30)))
+
+    def test_new_point_rules_recompute_every_team(self):
+        self._save(MATCHES)
+        self.service.point_rules = PointRules(win=2)
+        self._save(MATCHES)  # no match changed, but the rules did
+
+        self.session.expire_all()
+        self.assertEqual(self.session.get(TeamForm, (1, 10)).points_last5, 2 * 3 + 1)
+        self.assertEqual(self.session.get(TeamForm, (1, 30)).point_rules["win"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 import tempfile
+from types import SimpleNamespace
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from src.models.base import Base
@@ -24,6 +25,18 @@ class TestTeamService(unittest.TestCase):
         
         self.service = TeamService()
     
+    def test_both_refresh_modes_return_the_team_count(self):
+        session = self.Session()
+        teams = [{"teamId": team_id, "clubOrgId": None, "teamNo": 1, "team": f"Team {team_id}",
+                  "overriddenName": None, "describingName": None} for team_id in (200, 201)]
+        counts = []
+        for mode in ("replace", "swap"):
+            self.service.settings = SimpleNamespace(INGEST_REFRESH_MODE=mode)
+            counts.append(self.service.save_tournament_teams(session, {"tournamentId": 1, "teams": teams}))
+        self.assertEqual(counts, [2, 2])
+        self.assertEqual(session.query(Team).count(), 2)
+        session.close()
+
     def test_get_team_tournaments(self):
         session = self.Session()
         # Test retrieving team tournaments